@@ -0,0 +1,162 @@
+import argparse
+import itertools
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from aligner import checkpoint as checkpoint_io  # noqa: E402
+from aligner import fast_path  # noqa: E402
+from aligner import instrument  # noqa: E402
+from aligner.fm_index import FMIndex, build_fm_arrays  # noqa: E402
+from aligner.index_store import load_or_build_index  # noqa: E402
+from aligner.read_io import LineWriter, iter_positions, iter_reads, iter_records  # noqa: E402
+from aligner import results as results_io  # noqa: E402
+from aligner.results import FLAG_REVERSE, AlignmentResults, estimate_mapq  # noqa: E402
+
+MAX_MM = 2      # 최대 mismatch 허용 수 (main.cpp의 k)
+OCC_RATE = 64   # Occ checkpoint 간격 (행)
+SA_RATE = 32    # SA sample 간격 (텍스트 위치)
+
+# main.cpp first() / second() / third()와 같은 데이터셋 (reference, reads, ground truth)
+DEFAULT_PAIRS = [
+    ("1/1_reference_10M.txt", "1/1_1_mammoth_reads_10K.txt", "1/1_1_ground_truth_10K.txt"),
+    ("1/1_reference_10M.txt", "1/1_2_mammoth_reads_100K.txt", "1/1_2_ground_truth_100K.txt"),
+    ("1/1_reference_10M.txt", "1/1_3_mammoth_reads_1M.txt", "1/1_3_ground_truth_1M.txt"),
+    ("2/2_reference_10M.txt", "2/2_1_mammoth_reads_100K.txt", "2/2_1_ground_truth_100K.txt"),
+    ("2/2_reference_10M.txt", "2/2_2_mammoth_reads_100K.txt", "2/2_2_ground_truth_100K.txt"),
+    ("2/2_reference_10M.txt", "2/2_3_mammoth_reads_100K.txt", "2/2_3_ground_truth_100K.txt"),
+    ("3/3_1_reference_1M.txt", "3/3_1_mammoth_reads_100K.txt", "3/3_1_ground_truth_100K.txt"),
+    ("3/3_2_reference_10M.txt", "3/3_2_mammoth_reads_100K.txt", "3/3_2_ground_truth_100K.txt"),
+    ("3/3_3_reference_100M.txt", "3/3_3_mammoth_reads_100K.txt", "3/3_3_ground_truth_100K.txt"),
+]
+
+# FM-index 파일 로딩 (없거나 reference가 바뀌었으면 생성 후 저장)
+def load_fm_index(ref_file, index_file, reference=None, occ_rate=OCC_RATE, sa_rate=SA_RATE, force=False):
+    params = {"occ_rate": occ_rate, "sa_rate": sa_rate}
+
+    def build(ref):
+        return build_fm_arrays(ref, occ_rate=occ_rate, sa_rate=sa_rate)
+
+    idx = load_or_build_index(index_file, ref_file, "fm", params, build, reference=reference, force=force)
+    return FMIndex(idx.arrays)
+
+# 병렬 매핑 worker에서 호출 (state는 fork로 상속되므로 pickle되지 않음)
+def _map_read(state, read):
+    fm, max_mismatch, both_strands = state
+    return fm.best_hits(read, max_mismatch, both_strands=both_strands)
+
+def _exact_read(state, read):
+    fm, _, both_strands = state
+    return fm.exact_hits(read, both_strands=both_strands)
+
+# reads(iterable)의 매핑 결과 (위치, mismatch 수, 동률 위치 개수, 역방향 여부)를 입력 순서대로 yield
+# 같은 서열의 read는 한 번만 매핑하고(dedup), reference에 그대로 있는 read는 exact backward search로 끝냄(exact)
+# tiers(aligner.fast_path.TierCounts)가 주어지면 read별로 결과를 낸 tier를 집계
+def iter_map_reads(fm, reads, max_mismatch=MAX_MM, workers=1, both_strands=True, dedup=True, exact=True, tiers=None):
+    return fast_path.map_reads_tiered(_map_read, _exact_read if exact else None, (fm, max_mismatch, both_strands),
+                                      reads, workers=workers, dedup=dedup, tiers=tiers)
+
+# reads 전체 매핑 결과 [(위치, mismatch 수, 동률 위치 개수, 역방향 여부), ...]
+def map_reads(fm, reads, max_mismatch=MAX_MM, workers=1, both_strands=True, dedup=True, exact=True):
+    return list(iter_map_reads(fm, reads, max_mismatch=max_mismatch, workers=workers, both_strands=both_strands,
+                               dedup=dedup, exact=exact))
+
+# main.cpp FMIndexBWT: index 로딩 -> read 매핑 -> 정확도 / 실행 시간 출력
+# read는 스트리밍으로 읽고, out_file이 주어지면 예측 위치를 바로 기록. 매핑 결과(AlignmentResults)를 반환
+# export_args가 있으면 결과 파일 / SAM / PAF 저장. both_strands=False면 역상보 가닥은 검색하지 않음
+# checkpoint_dir이 주어지면 checkpoint_every개 read마다 매핑 결과를 저장하고, 다시 실행하면 이어서 매핑
+# dedup / exact: 중복 read 접기 / exact fast path 사용 여부 (tier별 read 비율을 출력)
+def run_fm_index_bwt(ref_file, read_file, truth_file, index_file=None, max_mismatch=MAX_MM, workers=1, out_file=None,
+                     export_args=None, both_strands=True, checkpoint_dir=None,
+                     checkpoint_every=checkpoint_io.CHECKPOINT_EVERY, dedup=True, exact=True):
+    if not (os.path.exists(ref_file) and os.path.exists(read_file) and os.path.exists(truth_file)):
+        print(f"> Skipping {ref_file} / {read_file} / {truth_file}: 파일이 존재하지 않음.")
+        return
+
+    print("============================================")
+    start = time.time()
+    fm = load_fm_index(ref_file, index_file or ref_file + ".fm.idx")
+    print(f"reference length: {fm.n}, index load/build time: {time.time() - start:.2f}초")
+
+    results = AlignmentResults()
+    tiers = fast_path.TierCounts()
+    multimapped = reversed_reads = 0
+    with LineWriter(out_file) as positions_out:
+        reads, reads_to_map = itertools.tee(iter_reads(read_file))  # 매핑이 앞서 읽은 만큼만 버퍼링됨
+        checkpoint = checkpoint_io.open_checkpoint(checkpoint_dir, ref_file, read_file, checkpoint_every, method="fm",
+                                                   max_mismatch=max_mismatch, both_strands=both_strands)
+        mappings = checkpoint_io.iter_checkpointed(
+            lambda rest: iter_map_reads(fm, rest, max_mismatch, workers=workers, both_strands=both_strands,
+                                        dedup=dedup, exact=exact, tiers=tiers),
+            reads_to_map, checkpoint)
+        for i, (read, (pos, mm, num_best, reverse)) in enumerate(zip(reads, mappings)):
+            score = len(read) - mm if pos >= 0 else 0
+            results.append(i, pos, score, mm if pos >= 0 else 0, estimate_mapq(pos, mm, num_best),
+                           FLAG_REVERSE if reverse else 0)
+            if num_best > 1:
+                multimapped += 1
+            if reverse:
+                reversed_reads += 1
+            positions_out.write(pos)
+    correct, total = results.evaluate(iter_positions(truth_file))
+    accuracy = correct / total * 100 if total else 0.0
+
+    print(f"number of patterns: {total}, max mismatches: {max_mismatch}")
+    print(f"Accuracy: {accuracy:.2f}%")
+    print(f"동률 최적 위치가 여러 개인 read: {multimapped}/{total}")
+    print(f"역상보 가닥에 매핑된 read: {reversed_reads}/{total}")
+    print(f"Fast path tier: {tiers.summary()}")
+    print(f"Execution time: {time.time() - start:.2f}초")
+
+    if export_args is not None:
+        results_io.export_from_args(export_args, results, lambda: iter_records(read_file),
+                                    os.path.basename(ref_file), fm.n)
+    return results
+
+# 인자 없이 실행하면 main.cpp와 같은 기본 데이터셋 실행
+#   build-index REF [--index IDX]              : FM-index 파일만 생성
+#   map REF READS TRUTH [--index IDX] [--out]  : index 파일을 재사용해 매핑
+#   --workers N                                : 매핑 프로세스 수
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="FM-index(BWT) 기반 read 매핑")
+    parser.add_argument("--workers", type=int, default=1, help="매핑 프로세스 수")
+    sub = parser.add_subparsers(dest="command")
+    p_build = sub.add_parser("build-index", help="FM-index 파일 생성")
+    p_build.add_argument("reference")
+    p_build.add_argument("--index", help="index 파일 경로 (기본: <reference>.fm.idx)")
+    p_build.add_argument("--occ-rate", type=int, default=OCC_RATE, help="Occ checkpoint 간격 (64 이하의 4의 배수)")
+    p_build.add_argument("--sa-rate", type=int, default=SA_RATE, help="SA sample 간격")
+    p_build.add_argument("--force", action="store_true", help="checksum이 같아도 다시 생성")
+    p_map = sub.add_parser("map", help="read 매핑 및 평가")
+    p_map.add_argument("reference")
+    p_map.add_argument("reads")
+    p_map.add_argument("truth")
+    p_map.add_argument("--index", help="index 파일 경로 (기본: <reference>.fm.idx)")
+    p_map.add_argument("-k", "--max-mismatches", type=int, default=MAX_MM, help="최대 mismatch 허용 수")
+    p_map.add_argument("--workers", type=int, default=argparse.SUPPRESS, help="매핑 프로세스 수")
+    p_map.add_argument("--out", help="read별 예측 위치를 기록할 파일 (한 줄에 하나씩, 매핑 중 바로 기록)")
+    p_map.add_argument("--forward-only", action="store_true", help="역상보 가닥은 검색하지 않음")
+    checkpoint_io.add_arguments(p_map)
+    fast_path.add_arguments(p_map)
+    instrument.add_arguments(p_map)
+    results_io.add_arguments(p_map)
+    args = parser.parse_args(argv)
+
+    if args.command == "build-index":
+        fm = load_fm_index(args.reference, args.index or args.reference + ".fm.idx",
+                           occ_rate=args.occ_rate, sa_rate=args.sa_rate, force=args.force)
+        print(f"  - BWT length: {len(fm)}")
+    elif args.command == "map":
+        with instrument.session_from_args(args):
+            run_fm_index_bwt(args.reference, args.reads, args.truth, args.index,
+                             max_mismatch=args.max_mismatches, workers=args.workers, out_file=args.out,
+                             export_args=args, both_strands=not args.forward_only,
+                             checkpoint_dir=args.checkpoint, checkpoint_every=args.checkpoint_every,
+                             dedup=not args.no_dedup, exact=not args.no_exact)
+    else:
+        for ref_file, read_file, truth_file in DEFAULT_PAIRS:
+            run_fm_index_bwt(ref_file, read_file, truth_file, workers=args.workers)
+
+if __name__ == "__main__":
+    main()
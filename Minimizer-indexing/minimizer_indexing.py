@@ -1,149 +1,301 @@
+import argparse
+import itertools
 import os
+import sys
 import time
 
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from aligner import checkpoint as checkpoint_io  # noqa: E402
+from aligner import fast_path  # noqa: E402
+from aligner import instrument  # noqa: E402
+from aligner.dna import reverse_complement  # noqa: E402
+from aligner.index_store import load_or_build_index  # noqa: E402
+from aligner.kmer_table import KmerTable  # noqa: E402
+from aligner.minimizer import build_minimizer_table, read_minimizers, vote_deltas  # noqa: E402
+from aligner.packed_sequence import PackedSequence, count_mismatches, window_mismatches  # noqa: E402
+from aligner.pileup import Pileup  # noqa: E402
+from aligner.read_io import LineWriter, iter_positions, iter_reads, iter_records  # noqa: E402
+from aligner import results as results_io  # noqa: E402
+from aligner.results import FLAG_REVERSE, AlignmentResults, estimate_mapq  # noqa: E402
+
+K = 20
+W = 8
+MAX_OCC = 500
+MAX_MM = 2
+SEED_MIN = 2
+
+DEFAULT_PAIRS = [
+    ("1_reference_10M.txt",   "1_1_mammoth_reads_10K.txt",  "1_1_ground_truth_10K.txt"),
+    ("1_reference_10M.txt",  "1_2_mammoth_reads_100K.txt",   "1_2_ground_truth_100K.txt"),
+    ("1_reference_10M.txt", "1_3_mammoth_reads_1M.txt",  "1_3_ground_truth_1M.txt"),
+]
+
 # 파일 입출력
 def load_reference_to_string(filename):
     with open(filename, 'r') as f:
         return f.read().strip()
 
+# plain / FASTA / FASTQ (.gz 포함) read 파일 로딩. 대용량은 iter_reads로 스트리밍 처리
 def load_reads_from_file(filename):
-    with open(filename, 'r') as f:
-        return [line.strip() for line in f]
+    return list(iter_reads(filename))
 
 def load_truth_positions(filename):
-    return [int(line.strip()) for line in open(filename, 'r')]
+    return list(iter_positions(filename))
 
+# rolling 2-bit k-mer 해시 + sliding window 최솟값으로 minimizer 추출 후 CSR 테이블(정렬된 key/offsets/positions) 생성
+# reference는 str 또는 PackedSequence. canonical 해시라 정방향 reference 하나로 양쪽 가닥 read를 찾음
 def build_minimizer_index(reference, k=20, w=8, max_occ=500):
-    index = {}
-    num_kmers = len(reference) - k + 1 #k-mer분할
-    for i in range(num_kmers - w + 1):
-        window_kmers = [reference[j:j + k] for j in range(i, i + w)]
-        mn = min(window_kmers)
-        mn_pos = i + window_kmers.index(mn)
-        index.setdefault(mn, []).append(mn_pos)
+    return build_minimizer_table(reference, k=k, w=w, max_occ=max_occ)
+
+# minimizer index와 2-bit 압축 reference를 index 파일에서 로딩 (reference checksum이 다르거나 파일이 없으면 새로 생성)
+def load_minimizer_index(ref_file, index_file, reference=None, k=K, w=W, max_occ=MAX_OCC, force=False):
+    params = {"k": k, "w": w, "max_occ": max_occ, "hash": "hash64-canonical"}
 
-    filtered = {m: poses for m, poses in index.items() if len(poses) <= max_occ}
-    return filtered
+    def build(ref):
+        return build_minimizer_index(ref, k=k, w=w, max_occ=max_occ).to_arrays("minimizer")
 
+    idx = load_or_build_index(index_file, ref_file, "minimizer", params, build, reference=reference, force=force)
+    return KmerTable.from_arrays(idx.arrays, "minimizer", k), PackedSequence.from_index(idx)
+
+# (위치, mismatch 수, 역상보로 매핑됐는지) 반환. 역방향 위치는 역상보 read가 reference에서 시작하는 위치
+# both_strands=False면 정방향 후보만 검증. mismatch가 같으면 정방향 -> 앞 위치 우선
 def minimizer_match(
     reference, index, read,
-    k=20, w=8, max_mismatch=2, seed_min=2
+    k=20, w=8, max_mismatch=2, seed_min=2, both_strands=True
 ):
-    read_kmers = [read[i:i + k] for i in range(len(read) - k + 1)] # read k-mer 추출
-    read_min_pairs = []
-    for i in range(len(read_kmers) - w + 1):
-        window = read_kmers[i:i + w]
-        mn = min(window)
-        mn_idx = window.index(mn)
-        read_pos = i + mn_idx
-        read_min_pairs.append((mn, read_pos))
-
-    delta_counts = {} # delta 카운팅
-    for mn, rpos in read_min_pairs:
-        if mn not in index:
-            continue
-        for refpos in index[mn]:
-            delta = refpos - rpos
-            delta_counts[delta] = delta_counts.get(delta, 0) + 1
-
-    candidates = [d for d, cnt in delta_counts.items() if cnt >= seed_min]
-    best_pos, best_mm = -1, max_mismatch + 1
-
-    for delta in candidates: #후보 delta 중 최적 위치 탐색
-        if delta < 0 or delta + len(read) > len(reference):
-            continue
-        window_seq = reference[delta : delta + len(read)]
-        mismatches = sum(1 for a, b in zip(read, window_seq) if a != b)
-        if mismatches <= max_mismatch and mismatches < best_mm:
-            best_mm = mismatches
-            best_pos = delta
-
-    return best_pos, best_mm
+    with instrument.stage("minimizer.extract"):
+        hashes, read_pos, read_strand = read_minimizers(read, k, w) # read minimizer 추출 (reference와 같은 해시)
+    with instrument.stage("minimizer.vote"):
+        deltas, reverse, counts = vote_deltas(index, hashes, read_pos, read_strand, len(read)) # delta 카운팅
+
+    keep = (counts >= seed_min) & (deltas >= 0) & (deltas + len(read) <= len(reference))
+    if not both_strands:
+        keep &= ~reverse
+    forward_cand, reverse_cand = deltas[keep & ~reverse], deltas[keep & reverse]
+    instrument.count("minimizer.reads")
+    instrument.observe("minimizer.seed_hits", counts.sum())
+    instrument.observe("minimizer.candidates", len(forward_cand) + len(reverse_cand))
+    if len(forward_cand) + len(reverse_cand) == 0:
+        return -1, max_mismatch + 1, False
+
+    # 후보 delta 전체를 한 번에 비교해 최적 위치 탐색 (reference는 str 또는 PackedSequence)
+    with instrument.stage("minimizer.verify"):
+        mismatches = np.concatenate((window_mismatches(reference, read, forward_cand),
+                                     window_mismatches(reference, reverse_complement(read), reverse_cand)))
+    best = int(np.argmin(mismatches))
+    if mismatches[best] > max_mismatch:
+        return -1, max_mismatch + 1, False
+    if best < len(forward_cand):
+        return int(forward_cand[best]), int(mismatches[best]), False
+    return int(reverse_cand[best - len(forward_cand)]), int(mismatches[best]), True
+
+# read 전체가 reference에 그대로 있으면 minimizer_match와 같은 (위치, 0, 역방향 여부), 아니면 None
+# read 첫 window의 minimizer 하나만 테이블에서 찾아 후보를 만들고 Hamming 거리 0인 가장 앞 위치를 고름 (정방향 우선)
+def minimizer_exact_match(reference, index, read, k=20, w=8, both_strands=True):
+    L = len(read)
+    if L < k + w - 1:
+        return None
+    hashes, read_pos, read_strand = read_minimizers(read[:k + w - 1], k, w)
+    if len(hashes) == 0:
+        return None
+    deltas, reverse, _ = vote_deltas(index, hashes, read_pos, read_strand, L)
+    keep = (deltas >= 0) & (deltas + L <= len(reference))
+    forward_cand = deltas[keep & ~reverse]
+    if len(forward_cand):
+        exact = forward_cand[window_mismatches(reference, read, forward_cand) == 0]
+        if len(exact):
+            return int(exact.min()), 0, False
+    reverse_cand = deltas[keep & reverse] if both_strands else deltas[:0]
+    if len(reverse_cand):
+        exact = reverse_cand[window_mismatches(reference, reverse_complement(read), reverse_cand) == 0]
+        if len(exact):
+            return int(exact.min()), 0, True
+    return None
+
+# 병렬 매핑 worker에서 호출 (state는 fork로 상속되므로 pickle되지 않음)
+def _map_read(state, read):
+    reference, index, k, w, max_mismatch, seed_min, both_strands = state
+    return minimizer_match(reference, index, read, k=k, w=w, max_mismatch=max_mismatch, seed_min=seed_min,
+                           both_strands=both_strands)
+
+def _exact_read(state, read):
+    reference, index, k, w, _, _, both_strands = state
+    return minimizer_exact_match(reference, index, read, k=k, w=w, both_strands=both_strands)
 
+# reads(iterable)의 매핑 결과 (위치, mismatch 수, 역방향 여부)를 입력 순서대로 yield (workers > 1이면 프로세스 병렬)
+# 같은 서열의 read는 한 번만 매핑하고(dedup), reference에 그대로 있는 read는 exact 조회로 끝냄(exact)
+# tiers(aligner.fast_path.TierCounts)가 주어지면 read별로 결과를 낸 tier를 집계
+def iter_map_reads(reference, index, reads, k=20, w=8, max_mismatch=2, seed_min=2, workers=1, both_strands=True,
+                   dedup=True, exact=True, tiers=None):
+    state = (reference, index, k, w, max_mismatch, seed_min, both_strands)
+    return fast_path.map_reads_tiered(_map_read, _exact_read if exact else None, state, reads, workers=workers,
+                                      dedup=dedup, tiers=tiers)
+
+# reads 전체 매핑 결과 [(위치, mismatch 수, 역방향 여부), ...]
+def map_reads(reference, index, reads, k=20, w=8, max_mismatch=2, seed_min=2, workers=1, both_strands=True,
+              dedup=True, exact=True):
+    return list(iter_map_reads(reference, index, reads, k=k, w=w, max_mismatch=max_mismatch,
+                               seed_min=seed_min, workers=workers, both_strands=both_strands,
+                               dedup=dedup, exact=exact))
+
+# reads / truth_positions는 list 또는 generator (스트리밍). positions_out(LineWriter)이 주어지면 예측 위치를 바로 기록
+# truth_positions 개수가 read 수와 다르면 ValueError
+# 복원 결과는 Pileup (매핑 성공한 read의 위치별 염기 count -> consensus). 문자열은 str(reconstructed)
+# results(AlignmentResults)가 주어지면 read별 매핑 결과를 함께 기록. 역방향 read는 역상보로 pileup에 더함
+# checkpoint(aligner.checkpoint.Checkpoint)가 주어지면 완료된 batch는 저장된 결과를 쓰고 나머지만 매핑
+# dedup / exact / tiers는 iter_map_reads와 같음
 def reconstruct_genome_with_reads(
     reference, reads, truth_positions, index,
-    k=20, w=8, max_mismatch=2, seed_min=2
+    k=20, w=8, max_mismatch=2, seed_min=2, workers=1, positions_out=None, results=None, both_strands=True,
+    checkpoint=None, dedup=True, exact=True, tiers=None
 ):
-    reconstructed = list(reference)
+    reconstructed = Pileup(reference)
     matched_reads = 0
-    total_reads = len(reads)
+    total_reads = 0
+    reads, reads_to_map = itertools.tee(reads)  # 매핑이 앞서 읽은 만큼만 버퍼링됨
+    mappings = checkpoint_io.iter_checkpointed(
+        lambda rest: iter_map_reads(reference, index, rest, k=k, w=w, max_mismatch=max_mismatch,
+                                    seed_min=seed_min, workers=workers, both_strands=both_strands,
+                                    dedup=dedup, exact=exact, tiers=tiers),
+        reads_to_map, checkpoint)
 
-    for i, read in enumerate(reads): # 각 read 순회하며 매핑 및 재구성
-        true_pos = truth_positions[i]
-        pred_pos, mm = minimizer_match(
-            reference, index, read,
-            k=k, w=w, max_mismatch=max_mismatch, seed_min=seed_min
-        )
+    truth_positions = iter(truth_positions)
+    for read, (pred_pos, mm, reverse) in zip(reads, mappings): # 각 read 순회하며 재구성
+        total_reads += 1
+        true_pos = next(truth_positions, None)
+        if true_pos is None:
+            raise ValueError(f"정답 위치가 read 수보다 적습니다 ({total_reads}번째 read의 정답 위치가 없음)")
+        if positions_out is not None:
+            positions_out.write(pred_pos)
+        if results is not None:
+            mapped = pred_pos >= 0
+            results.append(total_reads - 1, pred_pos, len(read) - mm if mapped else 0, mm if mapped else 0,
+                           estimate_mapq(pred_pos, mm), FLAG_REVERSE if reverse else 0)
         if pred_pos == true_pos and mm <= max_mismatch: #매핑 성공 조건
-            for j, base in enumerate(read):
-                reconstructed[pred_pos + j] = base
+            reconstructed.add(pred_pos, reverse_complement(read) if reverse else read)
             matched_reads += 1
+    if next(truth_positions, None) is not None:
+        raise ValueError(f"정답 위치가 read 수({total_reads})보다 많습니다")
 
-    return ''.join(reconstructed), matched_reads, total_reads
+    return reconstructed, matched_reads, total_reads
 
-#원본 reference와 비교
-def evaluate_reconstruction(reference, reconstructed): 
+#원본 reference와 비교 (reference는 PackedSequence 또는 str, reconstructed는 Pileup / str)
+def evaluate_reconstruction(reference, reconstructed):
     assert len(reference) == len(reconstructed)
-    matches = sum(1 for a, b in zip(reference, reconstructed) if a == b)
+    if isinstance(reconstructed, Pileup):
+        return 1 - reconstructed.count_differences(reference) / len(reference)
+    ref_codes = reference.codes() if isinstance(reference, PackedSequence) else reference
+    matches = len(reference) - count_mismatches(ref_codes, reconstructed)
     return matches / len(reference)
 
-def run_mapping_and_evaluation():
-    K = 20
-    W = 8
-    MAX_OCC = 500
-    MAX_MM = 2
-    SEED_MIN = 2
+# export_args가 있으면 매핑 결과를 결과 파일 / SAM / PAF로 저장 (aligner.results.add_arguments 옵션)
+# checkpoint_dir이 주어지면 checkpoint_every개 read마다 매핑 결과를 저장하고, 다시 실행하면 이어서 매핑
+# dedup / exact: 중복 read 접기 / exact fast path 사용 여부 (tier별 read 비율을 출력)
+def run_pair(ref_file, read_file, truth_file, index_file=None, workers=1, out_file=None, export_args=None,
+             both_strands=True, checkpoint_dir=None, checkpoint_every=checkpoint_io.CHECKPOINT_EVERY,
+             dedup=True, exact=True):
+    if not (os.path.exists(ref_file) and os.path.exists(read_file) and os.path.exists(truth_file)):
+        print(f"> Skipping {ref_file} / {read_file} / {truth_file}: 파일이 존재하지 않음.")
+        return
 
-    pairs = [
-        ("1_reference_10M.txt",   "1_1_mammoth_reads_10K.txt",  "1_1_ground_truth_10K.txt"),
-        ("1_reference_10M.txt",  "1_2_mammoth_reads_100K.txt",   "1_2_ground_truth_100K.txt"),
-        ("1_reference_10M.txt", "1_3_mammoth_reads_1M.txt",  "1_3_ground_truth_1M.txt"),
-    ]
+    print(f"\n=== Processing {ref_file} & {read_file} ===")
+    start_time = time.time()
 
-    for ref_file, read_file, truth_file in pairs:
-        if not (os.path.exists(ref_file) and os.path.exists(read_file) and os.path.exists(truth_file)):
-            print(f"> Skipping {ref_file} / {read_file} / {truth_file}: 파일이 존재하지 않음.")
-            continue
-
-        print(f"\n=== Processing {ref_file} & {read_file} ===")
-        start_time = time.time()
-
-        # 레퍼런스 로딩
-        reference = load_reference_to_string(ref_file)
-        # Reads & Ground truth 로딩
-        reads = load_reads_from_file(read_file)
-        truth_positions = load_truth_positions(truth_file)
-
-        # Minimizer 인덱스 생성
-        print("> Building minimizer index ...")
-        idx_start = time.time()
-        index = build_minimizer_index(reference, k=K, w=W, max_occ=MAX_OCC)
-        idx_elapsed = time.time() - idx_start
-        print(f"  - Unique minimizers after filtering: {len(index)}")
-        print(f"  - (Index build time: {idx_elapsed:.2f} sec)")
+    # Reads & Ground truth 스트리밍 (파일 전체를 메모리에 올리지 않음)
+    reads = iter_reads(read_file)
+    truth_positions = iter_positions(truth_file)
+
+    # Minimizer 인덱스 + 2-bit 압축 레퍼런스 로딩 (없거나 reference가 바뀌었으면 생성)
+    idx_start = time.time()
+    index, reference = load_minimizer_index(ref_file, index_file or ref_file + ".minimizer.idx")
+    idx_elapsed = time.time() - idx_start
+    print(f"  - Unique minimizers after filtering: {len(index)}")
+    print(f"  - (Index load/build time: {idx_elapsed:.2f} sec)")
 
-        # 매핑 및 재구성
-        print("> Performing mapping & reconstruction ...")
-        recon_start = time.time()
+    checkpoint = checkpoint_io.open_checkpoint(checkpoint_dir, ref_file, read_file, checkpoint_every,
+                                               method="minimizer", k=K, w=W, max_occ=MAX_OCC, max_mismatch=MAX_MM,
+                                               seed_min=SEED_MIN, both_strands=both_strands)
+
+    # 매핑 및 재구성
+    print("> Performing mapping & reconstruction ...")
+    recon_start = time.time()
+    results = AlignmentResults()
+    tiers = fast_path.TierCounts()
+    with LineWriter(out_file) as positions_out:
         reconstructed, matched_reads, total_reads = reconstruct_genome_with_reads(
             reference, reads, truth_positions, index,
-            k=K, w=W, max_mismatch=MAX_MM, seed_min=SEED_MIN
+            k=K, w=W, max_mismatch=MAX_MM, seed_min=SEED_MIN, workers=workers,
+            positions_out=positions_out, results=results, both_strands=both_strands, checkpoint=checkpoint,
+            dedup=dedup, exact=exact, tiers=tiers
         )
-        recon_elapsed = time.time() - recon_start
+    recon_elapsed = time.time() - recon_start
+    if export_args is not None:
+        results_io.export_from_args(export_args, results, lambda: iter_records(read_file),
+                                    os.path.basename(ref_file), len(reference))
+
+    # 정확도 계산
+    read_level_acc = matched_reads / total_reads * 100 if total_reads else 0.0
+    base_level_acc = evaluate_reconstruction(reference, reconstructed) * 100
+
+    # 결과 출력
+    print(f"  * Read-level mapping accuracy (≦{MAX_MM} mismatch): " # read 예측 위치 == 실제 위치 정확도
+          f"{matched_reads}/{total_reads} = {read_level_acc:.2f}%")
+    print(f"  * Base-level reconstruction accuracy: {base_level_acc:.2f}%") # 원래 reference와 일치하는 염기의 비율 정확도
+    print(f"  * Reverse-strand reads: {int(np.count_nonzero(results['flags'] & FLAG_REVERSE))}/{total_reads}")
+    print(f"  * Fast path tiers: {tiers.summary()}")
+    print(f"  * (Mapping & reconstruction time: {recon_elapsed:.2f} sec)")
 
-        # 정확도 계산
-        read_level_acc = matched_reads / total_reads * 100
-        base_level_acc = evaluate_reconstruction(reference, reconstructed) * 100
+    total_elapsed = time.time() - start_time
+    print(f"  => Total elapsed for this pair: {total_elapsed:.2f} sec "
+          f"({total_elapsed/60:.2f} min)\n")
 
-        # 결과 출력
-        print(f"  * Read-level mapping accuracy (≦{MAX_MM} mismatch): " # read 예측 위치 == 실제 위치 정확도
-              f"{matched_reads}/{total_reads} = {read_level_acc:.2f}%")
-        print(f"  * Base-level reconstruction accuracy: {base_level_acc:.2f}%") # 원래 reference와 일치하는 염기의 비율 정확도
-        print(f"  * (Mapping & reconstruction time: {recon_elapsed:.2f} sec)")
+# checkpoint_dir이 주어지면 pair마다 <checkpoint_dir>/<read 파일 이름> 에 checkpoint 저장
+def run_mapping_and_evaluation(pairs=DEFAULT_PAIRS, workers=1, checkpoint_dir=None,
+                               checkpoint_every=checkpoint_io.CHECKPOINT_EVERY):
+    for ref_file, read_file, truth_file in pairs:
+        pair_checkpoint = os.path.join(checkpoint_dir, os.path.basename(read_file)) if checkpoint_dir else None
+        run_pair(ref_file, read_file, truth_file, workers=workers, checkpoint_dir=pair_checkpoint,
+                 checkpoint_every=checkpoint_every)
+
+# 인자 없이 실행하면 기본 데이터셋 일괄 실행
+#   build-index REF [--index IDX]          : index 파일만 생성
+#   map REF READS TRUTH [--index IDX]      : index 파일을 재사용해 매핑 (READS는 plain / FASTA / FASTQ, .gz 가능)
+#   --workers N                            : 매핑 프로세스 수
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Minimizer 기반 read 매핑")
+    parser.add_argument("--workers", type=int, default=1, help="매핑 프로세스 수")
+    sub = parser.add_subparsers(dest="command")
+    p_build = sub.add_parser("build-index", help="minimizer index 파일 생성")
+    p_build.add_argument("reference")
+    p_build.add_argument("--index", help="index 파일 경로 (기본: <reference>.minimizer.idx)")
+    p_build.add_argument("--force", action="store_true", help="checksum이 같아도 다시 생성")
+    p_map = sub.add_parser("map", help="read 매핑 및 평가")
+    p_map.add_argument("reference")
+    p_map.add_argument("reads")
+    p_map.add_argument("truth")
+    p_map.add_argument("--index", help="index 파일 경로 (기본: <reference>.minimizer.idx)")
+    p_map.add_argument("--workers", type=int, default=argparse.SUPPRESS, help="매핑 프로세스 수")
+    p_map.add_argument("--out", help="read별 예측 위치를 기록할 파일 (한 줄에 하나씩, 매핑 중 바로 기록)")
+    p_map.add_argument("--forward-only", action="store_true", help="역상보 가닥은 검색하지 않음")
+    checkpoint_io.add_arguments(p_map)
+    fast_path.add_arguments(p_map)
+    instrument.add_arguments(p_map)
+    results_io.add_arguments(p_map)
+    args = parser.parse_args(argv)
 
-        total_elapsed = time.time() - start_time
-        print(f"  => Total elapsed for this pair: {total_elapsed:.2f} sec "
-              f"({total_elapsed/60:.2f} min)\n")
+    if args.command == "build-index":
+        index, _ = load_minimizer_index(args.reference, args.index or args.reference + ".minimizer.idx", force=args.force)
+        print(f"  - Unique minimizers after filtering: {len(index)}")
+    elif args.command == "map":
+        with instrument.session_from_args(args):
+            run_pair(args.reference, args.reads, args.truth, args.index, workers=args.workers, out_file=args.out,
+                     export_args=args, both_strands=not args.forward_only,
+                     checkpoint_dir=args.checkpoint, checkpoint_every=args.checkpoint_every,
+                     dedup=not args.no_dedup, exact=not args.no_exact)
+    else:
+        run_mapping_and_evaluation(workers=args.workers)
 
 if __name__ == "__main__":
-    run_mapping_and_evaluation()
+    main()
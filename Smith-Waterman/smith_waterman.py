@@ -1,5 +1,30 @@
+import argparse
+import itertools
+import os
+import sys
 import time
 
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from aligner import checkpoint as checkpoint_io  # noqa: E402
+from aligner import fast_path  # noqa: E402
+from aligner import instrument  # noqa: E402
+from aligner.index_store import load_or_build_index  # noqa: E402
+from aligner.kmer_table import KmerTable, build_kmer_table  # noqa: E402
+from aligner.packed_sequence import OUT_OF_RANGE, PackedSequence, hamming_distances  # noqa: E402
+from aligner.read_io import LineWriter, iter_positions, iter_reads, iter_records  # noqa: E402
+from aligner import results as results_io  # noqa: E402
+from aligner.results import FLAG_REVERSE, MAPQ_MAX, AlignmentResults, parse_cigar  # noqa: E402
+from aligner.dna import UNKNOWN_CODE, encode_bases, int_to_kmer, kmer_ints, reverse_complement  # noqa: E402
+from aligner.sw_kernel import sw_align, sw_score_batch  # noqa: E402
+
+SW_BAND = 10  # seed 대각선에서 허용하는 최대 indel 누적 (banded SW 폭)
+MAX_SEED_HITS = 200  # 등장 위치가 이보다 많은 (반복 서열) seed는 투표에서 제외
+MAX_CANDIDATES = 8  # read 하나당 SW extension을 수행할 최대 대각선 수
+MAX_OCC = MAX_SEED_HITS  # k-mer index에서 제외(mask)할 반복 k-mer의 등장 횟수 기준
+STRIDE = 1  # k-mer index에 stride 간격 위치만 저장 (1이면 모든 위치)
+
 def smith_waterman(seq1, seq2, match_score=2, mismatch_penalty=-1, gap_penalty=-2):
     m, n = len(seq1), len(seq2)
 
@@ -30,81 +55,310 @@ def smith_waterman(seq1, seq2, match_score=2, mismatch_penalty=-1, gap_penalty=-
 
     return max_score, max_pos
 
-def seed_and_extend(reference, read, kmer_index, seed_len=10):
+# 후보 시작 위치들의 window를 (후보 수, window 길이) 코드 행렬로 가져옴 (reference 범위 밖 / N은 255)
+def candidate_windows(reference, starts, width):
+    if isinstance(reference, PackedSequence):
+        return reference.windows(starts, width)
+    windows = np.full((len(starts), width), OUT_OF_RANGE, dtype=np.uint8)
+    for row, start in enumerate(starts):
+        codes = encode_bases(reference[start:start + width])
+        windows[row, :len(codes)] = np.where(codes < UNKNOWN_CODE, codes, OUT_OF_RANGE)
+    return windows
+
+# read 안의 seed 시작 위치: seed_len 간격 블록마다 stride개의 연속 위치
+# (index가 stride 간격으로 표본 추출돼 있어도 블록마다 정확히 하나의 seed가 표본 위치와 맞음)
+def seed_offsets(read_len, seed_len, stride=1):
+    blocks = np.arange(0, read_len - seed_len + 1, seed_len, dtype=np.int64)
+    offsets = (blocks[:, None] + np.arange(stride, dtype=np.int64)[None, :]).reshape(-1)
+    return offsets[offsets <= read_len - seed_len]
+
+# read를 seed 여러 개로 나눠 k-mer index(KmerTable)에서 한 번에 찾고, (reference 위치 - seed 위치) 대각선에 투표
+# 반복 서열 seed(등장 > max_seed_hits, index에서 mask된 k-mer)는 건너뛰고,
+# 득표 상위 top_n개 대각선만 반환 (득표 내림차순, 동률이면 위치 순)
+def vote_seed_diagonals(read, kmer_index, seed_len, max_seed_hits=MAX_SEED_HITS, top_n=MAX_CANDIDATES):
+    offsets = seed_offsets(len(read), seed_len, getattr(kmer_index, "stride", 1))
+    keys = kmer_ints(encode_bases(read), seed_len)[offsets]
+    lo, hi = kmer_index.ranges(keys)
+    counts = hi - lo
+    counts[(counts > max_seed_hits) | (keys < 0)] = 0
+    total = int(counts.sum())
+    instrument.observe("sw.seed_hits", total)
+    if total == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+    owner = np.repeat(np.arange(len(keys)), counts)
+    idx = np.repeat(lo - np.cumsum(counts) + counts, counts) + np.arange(total)
+    diags, votes = np.unique(kmer_index.positions[idx].astype(np.int64) - offsets[owner], return_counts=True)
+    order = np.lexsort((diags, -votes))[:top_n]
+    return diags[order], votes[order]
+
+# seed 투표 상위 대각선마다 window를 잘라 banded SW 점수를 한 번에 계산 (band=None이면 전체 DP)
+# both_strands면 역상보 read도 같은 k-mer index로 seed 투표 / extension 후 점수가 높은 쪽을 고름 (동점이면 정방향)
+# (위치, 점수, 역방향 여부) 반환. 역방향 위치는 역상보 read가 reference에서 시작하는 위치
+def seed_and_extend(reference, read, kmer_index, seed_len=10, band=SW_BAND,
+                    max_seed_hits=MAX_SEED_HITS, top_n=MAX_CANDIDATES, both_strands=True):
+    L = len(read)
+    strands = [read, reverse_complement(read)] if both_strands else [read]
+    instrument.count("sw.reads")
+    best_pos, best_score, best_reverse = -1, -1, False
+    for reverse, query in enumerate(strands):
+        with instrument.stage("sw.seed"):
+            diags, _ = vote_seed_diagonals(query, kmer_index, seed_len, max_seed_hits=max_seed_hits, top_n=top_n)
+        instrument.observe("sw.candidates", len(diags))
+        if len(diags) == 0:
+            continue
+
+        instrument.count("sw.extension_calls", len(diags))
+        with instrument.stage("sw.extend"):
+            win_starts = np.maximum(0, diags)
+            windows = candidate_windows(reference, win_starts, L)
+            scores, _, _ = sw_score_batch(query, windows, band=band)
+
+        best = int(np.argmax(scores))  # 동점이면 득표가 많은 대각선
+        if scores[best] > best_score:
+            best_pos, best_score, best_reverse = int(diags[best]), int(scores[best]), bool(reverse)
+    return best_pos, best_score, best_reverse
+
+# read 전체가 reference에 그대로 있으면 seed_and_extend와 같은 (위치, 점수, 역방향 여부), 아니면 None
+# 첫 seed 블록의 k-mer(stride개)로 후보 위치를 찾아 Hamming 거리 0인 가장 앞 위치를 고름 (정방향 우선)
+# reference는 seed_and_extend와 같이 str 또는 PackedSequence (후보 window는 candidate_windows로 가져옴)
+# 첫 seed가 mask됐거나 등장이 max_seed_hits보다 많은 등 판단할 수 없으면 None (full 경로로 처리)
+def exact_match(reference, read, kmer_index, max_seed_hits=MAX_SEED_HITS, both_strands=True, match_score=2):
+    L, k = len(read), kmer_index.k
+    stride = getattr(kmer_index, "stride", 1)
+    strands = [read, reverse_complement(read)] if both_strands else [read]
+    for reverse, query in enumerate(strands):
+        offsets = seed_offsets(L, k, stride)[:stride]
+        keys = kmer_ints(encode_bases(query), k)[offsets]
+        if len(keys) == 0 or np.any(keys < 0) or any(kmer_index.is_masked(key) for key in keys.tolist()):
+            return None
+        lo, hi = kmer_index.ranges(keys)
+        if int((hi - lo).sum()) > max_seed_hits:
+            return None
+        starts = np.concatenate([kmer_index.positions[a:b].astype(np.int64) - offset
+                                 for a, b, offset in zip(lo.tolist(), hi.tolist(), offsets.tolist())])
+        starts = starts[(starts >= 0) & (starts + L <= len(reference))]
+        if len(starts):
+            exact = starts[hamming_distances(encode_bases(query), candidate_windows(reference, starts, L)) == 0]
+            if len(exact):
+                return int(exact.min()), match_score * L, bool(reverse)
+    return None
+
+# 매핑 위치의 window(read 길이 + band)에서 read를 banded SW로 정렬(traceback)해 (점수, 정렬 시작 위치, CIGAR, NM) 반환
+# NM: M 칸의 불일치 수 + 삽입 / 결실 길이 (soft clip 제외). reverse면 역상보 read 기준
+# score(매핑 점수)가 pos에서의 ungapped 정렬 점수와 같으면(score가 없으면 완전 일치면) 그 정렬이 최적이므로
+# traceback 없이 "<길이>M"
+def align_read(reference, read, pos, band=SW_BAND, reverse=False, score=None, match_score=2, mismatch_penalty=-1):
+    if reverse:
+        read = reverse_complement(read)
     L = len(read)
-    ref_len = len(reference)
-    start_idx = L // 2 - seed_len // 2
-    seed = read[start_idx:start_idx + seed_len]
-    positions = kmer_index.get(seed, [])
-
-    best_score = -1
-    best_pos = -1
-
-    for pos in positions:
-        win_start = max(0, pos - start_idx)
-        win_end = min(ref_len, win_start + len(read))
-        window = reference[win_start : win_end]
-        score, _ = smith_waterman(read, window)
-        if score > best_score:
-            best_score = score
-            best_pos = pos - start_idx
-
-    return best_pos, best_score
-
-def build_kmer_index(reference, k):
+    window_start = max(0, pos)
+    window = candidate_windows(reference, [window_start], L + band)[0]  # 결실만큼 window를 늘림
+    codes = encode_bases(read)
+    if pos >= 0:
+        mismatches = int(np.count_nonzero(codes != window[:L]))
+        ungapped = match_score * (L - mismatches) + mismatch_penalty * mismatches
+        if (mismatches == 0 if score is None else score == ungapped):
+            return ungapped, pos, f"{L}M", mismatches
+    score, start, _, cigar = sw_align(codes, window, match_score=match_score,
+                                      mismatch_penalty=mismatch_penalty, band=band)
+    nm, i, j = 0, 0, start
+    for n, op in parse_cigar(cigar):
+        if op == "M":
+            nm += int(np.count_nonzero(codes[i:i + n] != window[j:j + n]))
+            i, j = i + n, j + n
+        elif op == "D":
+            nm, j = nm + n, j + n
+        else:
+            nm, i = nm + (n if op == "I" else 0), i + n
+    return score, window_start + start, cigar, nm
+
+# 매핑된 read의 CIGAR 계산. 점수가 min_score 미만이면 None (reverse면 역상보 read 기준)
+def extend_cigar(reference, read, pos, min_score=0, band=SW_BAND, reverse=False):
+    if pos < 0:
+        return None
+    score, _, cigar, _ = align_read(reference, read, pos, band=band, reverse=reverse)
+    return cigar if score >= min_score else None
+
+def build_kmer_index(reference, k, stride=STRIDE, max_occ=MAX_OCC):
     """
-    reference 문자열에서 k-mer 인덱스를 딕셔너리 형태로 생성
-    key: k-mer 문자열
-    value: [등장 위치 인덱스 리스트]
+    reference(str 또는 PackedSequence)에서 k-mer 인덱스를 KmerTable(CSR 배열) 형태로 생성
+    key: k-mer의 2-bit 정수 (get / in / []는 k-mer 문자열로도 조회 가능)
+    value: [등장 위치 배열] (stride > 1이면 stride 배수 위치만)
+    등장 횟수가 max_occ를 넘는 반복 k-mer는 빼고 masked_keys / masked_counts에 기록 (None이면 모두 유지)
     """
-    index = {}
-    for i in range(len(reference) - k + 1):
-        kmer = reference[i:i + k]
-        if kmer in index:
-            index[kmer].append(i)
-        else:
-            index[kmer] = [i]
-    return index
-
-def evaluate_accuracy(true_positions, predicted_positions):
-    correct = 0
-    total = min(len(true_positions), len(predicted_positions))
-    for i in range(total):
-        if true_positions[i] == predicted_positions[i]:
-            correct += 1
-    accuracy = (correct / total) * 100
-    return accuracy, correct, total
+    return build_kmer_table(reference, k, stride=stride, max_occ=max_occ)
+
+# k-mer index와 2-bit 압축 reference를 index 파일에서 로딩 (reference checksum이 다르거나 파일이 없으면 새로 생성)
+def load_kmer_index(ref_file, index_file, k, reference=None, stride=STRIDE, max_occ=MAX_OCC, force=False):
+    def build(ref):
+        return build_kmer_index(ref, k, stride=stride, max_occ=max_occ).to_arrays("kmer")
+
+    params = {"k": k, "stride": stride, "max_occ": max_occ}
+    idx = load_or_build_index(index_file, ref_file, "kmer", params, build, reference=reference, force=force)
+    return KmerTable.from_arrays(idx.arrays, "kmer", k, stride=stride), PackedSequence.from_index(idx)
+
+# mask된 반복 k-mer를 등장 횟수 내림차순으로 기록 (k-mer<TAB>횟수)
+def write_masked_kmers(kmer_index, filename):
+    order = np.argsort(-np.asarray(kmer_index.masked_counts), kind="stable")
+    with LineWriter(filename) as out:
+        for key, count in zip(kmer_index.masked_keys[order].tolist(), kmer_index.masked_counts[order].tolist()):
+            out.write(f"{int_to_kmer(key, kmer_index.k)}\t{count}")
+
+# 병렬 매핑 worker에서 호출 (state는 fork로 상속되므로 pickle되지 않음)
+def _map_read(state, read):
+    reference, kmer_index, seed_len, both_strands = state
+    return seed_and_extend(reference, read, kmer_index, seed_len=seed_len, both_strands=both_strands)
+
+def _exact_read(state, read):
+    reference, kmer_index, _, both_strands = state
+    return exact_match(reference, read, kmer_index, both_strands=both_strands)
+
+# reads(iterable)의 매핑 결과 (위치, 점수, 역방향 여부)를 입력 순서대로 yield (workers > 1이면 프로세스 병렬)
+# 같은 서열의 read는 한 번만 매핑하고(dedup), reference에 그대로 있는 read는 exact 조회로 끝냄(exact)
+# tiers(aligner.fast_path.TierCounts)가 주어지면 read별로 결과를 낸 tier를 집계
+def iter_map_reads(reference, reads, kmer_index, seed_len=20, workers=1, both_strands=True, dedup=True, exact=True,
+                   tiers=None):
+    return fast_path.map_reads_tiered(_map_read, _exact_read if exact else None,
+                                      (reference, kmer_index, seed_len, both_strands), reads, workers=workers,
+                                      dedup=dedup, tiers=tiers)
+
+# reads 전체 매핑 결과 [(위치, 점수, 역방향 여부), ...]
+def map_reads(reference, reads, kmer_index, seed_len=20, workers=1, both_strands=True, dedup=True, exact=True):
+    return list(iter_map_reads(reference, reads, kmer_index, seed_len=seed_len, workers=workers,
+                               both_strands=both_strands, dedup=dedup, exact=exact))
 
 def load_reference(filename="reference_10M.txt"):
     with open(filename, "r") as f:
         return f.read().strip()
 
+# plain / FASTA / FASTQ (.gz 포함) read 파일 로딩. 대용량은 iter_reads로 스트리밍 처리
 def load_reads(filename="mammoth_reads_100K.txt"):
-    with open(filename, "r") as f:
-        return [line.strip() for line in f.readlines()]
+    return list(iter_reads(filename))
 
 def load_ground_truth(filename="ground_truth_100K.txt"):
-    with open(filename, "r") as f:
-        return [int(line.strip()) for line in f.readlines()]
-
-# 1. 파일 로딩
-reference = load_reference("reference_100M.txt")
-reads = load_reads("mammoth_reads_1M.txt")
-true_positions = load_ground_truth("ground_truth_1M.txt")
-
-# 2. 매칭
-start_time = time.time()   # 매칭 시작 시간 기록
-k = 20
-kmer_index = build_kmer_index(reference, k)
-predicted_positions = []
-
-for i in range(10000):
-    pred_pos, _ = seed_and_extend(reference, reads[i], kmer_index, seed_len=k)
-    predicted_positions.append(pred_pos)
-end_time = time.time()  #매칭 종료 시간 기록
-elapsed_time = end_time - start_time
-print(f"Total Matching Time : {elapsed_time:.2f} seconds")
-
-# 3. 정확도 평가
-accuracy, correct, total = evaluate_accuracy(true_positions, predicted_positions)
-print(f"\n Accuracy: {accuracy:.2f}% ({correct}/{total} matched)")
\ No newline at end of file
+    return list(iter_positions(filename))
+
+# SW 점수를 MAPQ 범위로 환산 (완전 일치 점수 = match_score * read 길이가 최댓값)
+def score_to_mapq(score, read_len, match_score=2):
+    if score <= 0 or read_len == 0:
+        return 0
+    return min(MAPQ_MAX, MAPQ_MAX * score // (match_score * read_len))
+
+# read 파일을 스트리밍으로 읽어 매핑하고 결과를 바로 기록 (num_reads=None이면 전체)
+# 매핑 결과(AlignmentResults)로 정확도를 평가하고 반환. export_args가 있으면 결과 파일 / SAM / PAF 저장
+# both_strands=False면 역상보 가닥은 검색하지 않음
+# checkpoint_dir이 주어지면 checkpoint_every개 read마다 매핑 결과를 저장하고, 다시 실행하면 이어서 매핑
+# dedup / exact: 중복 read 접기 / exact fast path 사용 여부 (tier별 read 비율을 출력)
+def run_mapping(ref_file, read_file, truth_file, index_file=None, k=20, num_reads=10000, workers=1,
+                cigar_out=None, cigar_min_score=100, out_file=None, export_args=None, both_strands=True,
+                stride=STRIDE, max_occ=MAX_OCC, checkpoint_dir=None, checkpoint_every=checkpoint_io.CHECKPOINT_EVERY,
+                dedup=True, exact=True):
+    # 1. 파일 로딩 (reference는 index 파일의 2-bit 압축본, read는 스트리밍)
+    reads = itertools.islice(iter_reads(read_file), num_reads)
+
+    # 2. 매칭 및 정확도 계산
+    start_time = time.time()   # 매칭 시작 시간 기록
+    kmer_index, reference = load_kmer_index(ref_file, index_file or ref_file + ".kmer.idx", k,
+                                            stride=stride, max_occ=max_occ)
+    reads, reads_to_map = itertools.tee(reads)  # 매핑이 앞서 읽은 만큼만 버퍼링됨
+    checkpoint = checkpoint_io.open_checkpoint(checkpoint_dir, ref_file, read_file, checkpoint_every, method="sw",
+                                               k=k, stride=stride, max_occ=max_occ, num_reads=num_reads,
+                                               both_strands=both_strands)
+    tiers = fast_path.TierCounts()
+    mappings = checkpoint_io.iter_checkpointed(
+        lambda rest: iter_map_reads(reference, rest, kmer_index, seed_len=k, workers=workers,
+                                    both_strands=both_strands, dedup=dedup, exact=exact, tiers=tiers),
+        reads_to_map, checkpoint)
+
+    results = AlignmentResults()
+    with LineWriter(out_file) as positions_out, LineWriter(cigar_out) as cigar_writer:
+        for i, (read, (pos, score, reverse)) in enumerate(zip(reads, mappings)):
+            cigar = None
+            if pos >= 0:
+                # 매핑 위치의 gapped 정렬 (SAM CIGAR / POS, NM = 불일치 + indel 길이)
+                _, start, cigar, mismatches = align_read(reference, read, pos, reverse=reverse, score=score)
+                results.append(i, pos, score, mismatches, score_to_mapq(score, len(read)),
+                               FLAG_REVERSE if reverse else 0, cigar=cigar, cigar_pos=start)
+            else:
+                results.append(i, pos)
+            positions_out.write(pos)
+            # (선택) 점수 기준을 넘은 read의 CIGAR 저장: 위치, 점수, CIGAR(기준 미만이면 *)
+            if cigar_out:
+                cigar_writer.write(f"{pos}\t{score}\t{cigar if score >= cigar_min_score else '*'}")
+    end_time = time.time()  #매칭 종료 시간 기록
+    elapsed_time = end_time - start_time
+    print(f"Total Matching Time : {elapsed_time:.2f} seconds")
+    print(f"Fast path tiers : {tiers.summary()}")
+
+    # 3. 정확도 평가
+    correct, total = results.evaluate(iter_positions(truth_file))
+    accuracy = (correct / total) * 100 if total else 0.0
+    print(f"\n Accuracy: {accuracy:.2f}% ({correct}/{total} matched)")
+
+    if export_args is not None:
+        results_io.export_from_args(export_args, results, lambda: itertools.islice(iter_records(read_file), num_reads),
+                                    os.path.basename(ref_file), len(reference))
+    return results
+
+# build-index / map 공통 index 옵션 (map에서도 같은 값을 줘야 index 파일을 재사용함)
+def add_index_arguments(parser):
+    parser.add_argument("--stride", type=int, default=STRIDE, help="stride 간격 위치의 k-mer만 index에 저장")
+    parser.add_argument("--max-occ", type=int, default=MAX_OCC,
+                        help="등장 횟수가 이보다 많은 반복 k-mer는 index에서 제외 (0이면 제외하지 않음)")
+
+# 인자 없이 실행하면 기본 데이터셋(reference_100M / mammoth_reads_1M) 실행
+#   build-index REF [--index IDX]          : index 파일만 생성
+#   map REF READS TRUTH [--index IDX]      : index 파일을 재사용해 매핑 (READS는 plain / FASTA / FASTQ, .gz 가능)
+#   --workers N                            : 매핑 프로세스 수
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Seed-and-extend (Smith-Waterman) read 매핑")
+    parser.add_argument("--workers", type=int, default=1, help="매핑 프로세스 수")
+    sub = parser.add_subparsers(dest="command")
+    p_build = sub.add_parser("build-index", help="k-mer index 파일 생성")
+    p_build.add_argument("reference")
+    p_build.add_argument("--index", help="index 파일 경로 (기본: <reference>.kmer.idx)")
+    p_build.add_argument("-k", type=int, default=20)
+    add_index_arguments(p_build)
+    p_build.add_argument("--force", action="store_true", help="checksum이 같아도 다시 생성")
+    p_build.add_argument("--masked-out", help="mask된 반복 k-mer 목록을 저장할 파일 (k-mer<TAB>등장 횟수)")
+    p_map = sub.add_parser("map", help="read 매핑 및 평가")
+    p_map.add_argument("reference")
+    p_map.add_argument("reads")
+    p_map.add_argument("truth")
+    p_map.add_argument("--index", help="index 파일 경로 (기본: <reference>.kmer.idx)")
+    p_map.add_argument("-k", type=int, default=20)
+    add_index_arguments(p_map)
+    p_map.add_argument("--num-reads", type=int, default=10000, help="매핑할 read 수 (0이면 전체)")
+    p_map.add_argument("--out", help="read별 예측 위치를 기록할 파일 (한 줄에 하나씩, 매핑 중 바로 기록)")
+    p_map.add_argument("--workers", type=int, default=argparse.SUPPRESS, help="매핑 프로세스 수")
+    p_map.add_argument("--cigar-out", help="read별 위치/점수/CIGAR를 저장할 파일")
+    p_map.add_argument("--cigar-min-score", type=int, default=100, help="CIGAR를 계산할 최소 SW 점수")
+    p_map.add_argument("--forward-only", action="store_true", help="역상보 가닥은 검색하지 않음")
+    checkpoint_io.add_arguments(p_map)
+    fast_path.add_arguments(p_map)
+    instrument.add_arguments(p_map)
+    results_io.add_arguments(p_map)
+    args = parser.parse_args(argv)
+
+    if args.command == "build-index":
+        kmer_index, _ = load_kmer_index(args.reference, args.index or args.reference + ".kmer.idx", args.k,
+                                        stride=args.stride, max_occ=args.max_occ or None, force=args.force)
+        print(f"  - Unique k-mers: {len(kmer_index)}")
+        print(f"  - Masked repeat k-mers: {len(kmer_index.masked_keys)}")
+        if args.masked_out:
+            write_masked_kmers(kmer_index, args.masked_out)
+    elif args.command == "map":
+        with instrument.session_from_args(args):
+            run_mapping(args.reference, args.reads, args.truth, args.index, k=args.k,
+                        num_reads=args.num_reads or None, workers=args.workers,
+                        cigar_out=args.cigar_out, cigar_min_score=args.cigar_min_score, out_file=args.out,
+                        export_args=args, both_strands=not args.forward_only,
+                        stride=args.stride, max_occ=args.max_occ or None,
+                        checkpoint_dir=args.checkpoint, checkpoint_every=args.checkpoint_every,
+                        dedup=not args.no_dedup, exact=not args.no_exact)
+    else:
+        run_mapping("reference_100M.txt", "mammoth_reads_1M.txt", "ground_truth_1M.txt", workers=args.workers)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+# 세 가지 정렬기(Smith-Waterman, Minimizer, Suffix Array)가 공유하는 공통 모듈
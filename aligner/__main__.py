@@ -0,0 +1,6 @@
+# python -m aligner <command> [args ...] (aligner.cli)
+import sys
+
+from aligner.cli import main
+
+sys.exit(main())
@@ -0,0 +1,261 @@
+# SW / minimizer / suffix array / FM-index 정렬기를 같은 기준으로 측정하는 벤치마크
+# (method, dataset)마다 새 프로세스(fork)에서 index 생성 -> 매핑 -> 평가를 실행하고 JSON으로 기록
+#   - index_build_sec / index_size_bytes : 임시 디렉터리에 index 파일을 새로 만드는 시간과 크기
+#   - map_sec / reads_per_sec           : read 스트리밍 + 매핑 + 평가 시간
+#   - accuracy                          : 예측 위치 == 정답 위치인 read 비율(%), mapped는 위치를 낸 read 비율(%)
+#   - peak_rss_mb                       : 해당 프로세스(와 매핑 worker)의 최대 RSS
+# --baseline으로 이전 결과 JSON과 비교해 허용 범위를 벗어나면 종료 코드 1
+#   python -m aligner.benchmark --methods sa fm --max-reads 10000 --json-out bench.json
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import shutil
+import sys
+import time
+
+from aligner import scripts
+from aligner.parallel import fork_available
+from aligner.read_io import iter_positions, iter_reads
+from aligner.scripts import REPO_ROOT
+DATA_DIR = os.path.join(REPO_ROOT, "genome_generation")
+MAX_MM = 2
+
+# genome_generation 데이터셋: 이름 -> (reference, reads, ground truth)
+DATASETS = {
+    "1_1": ("1_reference_10M.txt", "1_1_mammoth_reads_10K.txt", "1_1_ground_truth_10K.txt"),
+    "1_2": ("1_reference_10M.txt", "1_2_mammoth_reads_100K.txt", "1_2_ground_truth_100K.txt"),
+    "1_3": ("1_reference_10M.txt", "1_3_mammoth_reads_1M.txt", "1_3_ground_truth_1M.txt"),
+    "2_1": ("2_reference_10M.txt", "2_1_mammoth_reads_100K.txt", "2_1_ground_truth_100K.txt"),
+    "2_2": ("2_reference_10M.txt", "2_2_mammoth_reads_100K.txt", "2_2_ground_truth_100K.txt"),
+    "2_3": ("2_reference_10M.txt", "2_3_mammoth_reads_100K.txt", "2_3_ground_truth_100K.txt"),
+    "3_1": ("3_1_reference_1M.txt", "3_1_mammoth_reads_100K.txt", "3_1_ground_truth_100K.txt"),
+    "3_2": ("3_2_reference_10M.txt", "3_2_mammoth_reads_100K.txt", "3_2_ground_truth_100K.txt"),
+    "3_3": ("3_3_reference_100M.txt", "3_3_mammoth_reads_100K.txt", "3_3_ground_truth_100K.txt"),
+}
+
+# 비교 기준 허용 범위: 정확도는 %p 감소, 속도는 비율 감소, 메모리는 비율 증가
+DEFAULT_TOLERANCES = {"accuracy": 0.5, "speed": 0.2, "memory": 0.2}
+
+
+# 각 정렬기: index 로딩/생성 함수 (module, ref_file, index_file) -> state
+# 매핑 함수 (module, state, reads, workers) -> 예측 위치 iterator
+def _sw_index(module, ref_file, index_file):
+    return module.load_kmer_index(ref_file, index_file, 20, force=True)
+
+def _sw_map(module, state, reads, workers):
+    kmer_index, reference = state
+    return (pos for pos, *_ in module.iter_map_reads(reference, reads, kmer_index, seed_len=20, workers=workers))
+
+def _minimizer_index(module, ref_file, index_file):
+    return module.load_minimizer_index(ref_file, index_file, force=True)
+
+def _minimizer_map(module, state, reads, workers):
+    index, reference = state
+    mappings = module.iter_map_reads(reference, index, reads, k=module.K, w=module.W, max_mismatch=MAX_MM,
+                                     seed_min=module.SEED_MIN, workers=workers)
+    return (pos for pos, *_ in mappings)
+
+def _sa_index(module, ref_file, index_file):
+    return module.load_suffix_array_index(ref_file, index_file, force=True)
+
+def _sa_map(module, state, reads, workers):
+    sa, reference = state
+    return (pos for pos, *_ in module.iter_alignments(reference, reads, MAX_MM, sa, workers=workers))
+
+def _fm_index(module, ref_file, index_file):
+    return module.load_fm_index(ref_file, index_file, force=True)
+
+def _fm_map(module, state, reads, workers):
+    return (pos for pos, *_ in module.iter_map_reads(state, reads, MAX_MM, workers=workers))
+
+
+# 이름(aligner.scripts.SCRIPTS) -> (index 함수, 매핑 함수)
+METHODS = {
+    "sw": (_sw_index, _sw_map),
+    "minimizer": (_minimizer_index, _minimizer_map),
+    "sa": (_sa_index, _sa_map),
+    "fm": (_fm_index, _fm_map),
+}
+
+
+# 현재 프로세스와 종료된 자식 프로세스 중 최대 RSS (MB)
+# multiprocessing / resource / tempfile은 측정을 실행할 때 처음 import (CLI 시작 비용을 줄임)
+def peak_rss_mb() -> float:
+    import resource
+    scale = 1 << 20 if sys.platform == "darwin" else 1 << 10  # macOS는 byte, Linux는 KB 단위
+    usage = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    return usage / scale
+
+
+# 한 (method, dataset) 조합 측정. 결과 dict 반환
+def run_case(method: str, dataset: str, ref_file: str, read_file: str, truth_file: str,
+             index_dir: str, max_reads: int = 0, workers: int = 1) -> dict:
+    index_fn, map_fn = METHODS[method]
+    module = scripts.load(method)
+    index_file = os.path.join(index_dir, f"{dataset}.{method}.idx")
+
+    start = time.perf_counter()
+    state = index_fn(module, ref_file, index_file)
+    build_sec = time.perf_counter() - start
+
+    reads = iter_reads(read_file)
+    truth = iter_positions(truth_file)
+    if max_reads:
+        reads = itertools.islice(reads, max_reads)
+    total = correct = mapped = 0
+    start = time.perf_counter()
+    for true_pos, pos in zip(truth, map_fn(module, state, reads, workers)):
+        total += 1
+        if pos == true_pos:
+            correct += 1
+        if pos >= 0:
+            mapped += 1
+    map_sec = time.perf_counter() - start
+
+    return {
+        "method": method,
+        "dataset": dataset,
+        "reference": os.path.basename(ref_file),
+        "reads": os.path.basename(read_file),
+        "num_reads": total,
+        "workers": workers,
+        "index_build_sec": round(build_sec, 4),
+        "index_size_bytes": os.path.getsize(index_file),
+        "map_sec": round(map_sec, 4),
+        "reads_per_sec": round(total / map_sec, 2) if map_sec > 0 else 0.0,
+        "accuracy": round(correct / total * 100, 4) if total else 0.0,
+        "mapped": round(mapped / total * 100, 4) if total else 0.0,
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+
+def _run_case_child(conn, args):
+    try:
+        conn.send(("ok", run_case(*args)))
+    except Exception as exc:  # 자식 프로세스의 예외는 결과로 전달
+        conn.send(("error", f"{type(exc).__name__}: {exc}"))
+    finally:
+        conn.close()
+
+
+# 측정을 새 프로세스에서 실행해 peak RSS가 다른 조합과 섞이지 않게 함 (fork 불가 환경은 현재 프로세스에서 실행)
+def run_case_isolated(*args) -> dict:
+    if not fork_available():
+        return run_case(*args)
+    import multiprocessing as mp
+    ctx = mp.get_context("fork")
+    parent_conn, child_conn = ctx.Pipe(duplex=False)
+    proc = ctx.Process(target=_run_case_child, args=(child_conn, args))
+    proc.start()
+    child_conn.close()
+    status, payload = parent_conn.recv()
+    proc.join()
+    if status != "ok":
+        raise RuntimeError(payload)
+    return payload
+
+
+# 선택한 method x dataset 전체 실행. 파일이 없는 dataset은 skipped로 기록
+def run_benchmark(methods: list, datasets: dict, index_dir: str = None, max_reads: int = 0, workers: int = 1) -> dict:
+    import tempfile
+    own_dir = index_dir is None
+    index_dir = index_dir or tempfile.mkdtemp(prefix="aligner-bench-")
+    results, skipped = [], []
+    try:
+        for dataset, (ref_file, read_file, truth_file) in datasets.items():
+            missing = [f for f in (ref_file, read_file, truth_file) if not os.path.exists(f)]
+            if missing:
+                skipped.append({"dataset": dataset, "missing": missing})
+                print(f"> Skipping {dataset}: 파일이 존재하지 않음 ({', '.join(missing)})")
+                continue
+            for method in methods:
+                print(f"> {method} / {dataset} ...", flush=True)
+                result = run_case_isolated(method, dataset, ref_file, read_file, truth_file,
+                                           index_dir, max_reads, workers)
+                print(f"  - build {result['index_build_sec']:.2f}s, {result['reads_per_sec']:.0f} reads/s, "
+                      f"accuracy {result['accuracy']:.2f}%, peak RSS {result['peak_rss_mb']:.0f} MB")
+                results.append(result)
+    finally:
+        if own_dir:
+            shutil.rmtree(index_dir, ignore_errors=True)
+    return {
+        "version": 1,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "max_reads": max_reads,
+        "results": results,
+        "skipped": skipped,
+    }
+
+
+# baseline 대비 정확도 / 속도 / 메모리가 허용 범위를 벗어난 항목 메시지 리스트
+def compare_to_baseline(report: dict, baseline: dict, tolerances: dict = None) -> list:
+    tol = dict(DEFAULT_TOLERANCES, **(tolerances or {}))
+    previous = {(r["method"], r["dataset"]): r for r in baseline.get("results", [])}
+    regressions = []
+    for result in report["results"]:
+        base = previous.get((result["method"], result["dataset"]))
+        if base is None:
+            continue
+        name = f"{result['method']}/{result['dataset']}"
+        if result["accuracy"] < base["accuracy"] - tol["accuracy"]:
+            regressions.append(f"{name}: accuracy {base['accuracy']:.2f}% -> {result['accuracy']:.2f}%")
+        if result["reads_per_sec"] < base["reads_per_sec"] * (1 - tol["speed"]):
+            regressions.append(f"{name}: reads/s {base['reads_per_sec']:.0f} -> {result['reads_per_sec']:.0f}")
+        if result["peak_rss_mb"] > base["peak_rss_mb"] * (1 + tol["memory"]):
+            regressions.append(f"{name}: peak RSS {base['peak_rss_mb']:.0f} MB -> {result['peak_rss_mb']:.0f} MB")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="정렬기 통합 벤치마크 (JSON 출력, baseline 회귀 비교)")
+    parser.add_argument("--methods", nargs="+", choices=list(METHODS), default=list(METHODS))
+    parser.add_argument("--datasets", nargs="+", choices=list(DATASETS), help="genome_generation 데이터셋 (기본: 전체)")
+    parser.add_argument("--data-dir", default=DATA_DIR, help="데이터셋 파일 디렉터리")
+    parser.add_argument("--case", nargs=3, action="append", metavar=("REF", "READS", "TRUTH"),
+                        help="직접 지정한 데이터셋 (여러 번 사용 가능, 지정하면 --datasets 무시)")
+    parser.add_argument("--max-reads", type=int, default=0, help="dataset마다 앞에서부터 사용할 read 수 (0이면 전체)")
+    parser.add_argument("--workers", type=int, default=1, help="매핑 프로세스 수")
+    parser.add_argument("--index-dir", help="index 파일 디렉터리 (기본: 임시 디렉터리, 끝나면 삭제)")
+    parser.add_argument("--json-out", help="결과 JSON 저장 경로 (기본: 표준 출력)")
+    parser.add_argument("--baseline", help="비교할 이전 결과 JSON")
+    parser.add_argument("--accuracy-tolerance", type=float, default=DEFAULT_TOLERANCES["accuracy"], help="허용 정확도 감소 (%%p)")
+    parser.add_argument("--speed-tolerance", type=float, default=DEFAULT_TOLERANCES["speed"], help="허용 reads/s 감소 비율")
+    parser.add_argument("--memory-tolerance", type=float, default=DEFAULT_TOLERANCES["memory"], help="허용 peak RSS 증가 비율")
+    args = parser.parse_args(argv)
+
+    if args.case:
+        datasets = {f"case{i}": tuple(case) for i, case in enumerate(args.case, 1)}
+    else:
+        names = args.datasets or list(DATASETS)
+        datasets = {name: tuple(os.path.join(args.data_dir, f) for f in DATASETS[name]) for name in names}
+
+    report = run_benchmark(args.methods, datasets, index_dir=args.index_dir,
+                           max_reads=args.max_reads, workers=args.workers)
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.json_out:
+        with open(args.json_out, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+        tolerances = {"accuracy": args.accuracy_tolerance, "speed": args.speed_tolerance,
+                      "memory": args.memory_tolerance}
+        regressions = compare_to_baseline(report, baseline, tolerances)
+        for message in regressions:
+            print(f"REGRESSION {message}")
+        if regressions:
+            return 1
+        print("baseline 대비 회귀 없음")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+# 긴 매핑 실행의 checkpoint (완료된 read batch의 매핑 결과를 디렉터리에 저장하고, 재시작하면 이어서 실행)
+# - 매핑 결과 tuple(위치, mismatch 수, 역방향 여부 등 정수)을 batch_size개씩 int64 배열(.npy)로 저장
+# - manifest.json: 실행 key(reference checksum, read 파일 크기 / 수정 시각, 매핑 파라미터)와 완료된 batch 목록
+#   key가 다르면(다른 입력 / 파라미터) 이전 checkpoint를 지우고 처음부터 실행
+# - 재시작하면 저장된 batch의 결과를 매핑 없이 그대로 내보내고 나머지 read부터 매핑을 이어감
+#   (위치 파일 / pileup / 정확도는 호출 쪽이 결과를 처음부터 다시 받아 만들므로 중단 없이 실행한 결과와 같음)
+# batch / manifest는 임시 파일에 쓴 뒤 교체하므로 저장 도중 중단돼도 마지막으로 완료된 batch까지는 유효함
+
+import collections
+import itertools
+import json
+import os
+
+import numpy as np
+
+from aligner.index_store import reference_checksum
+
+CHECKPOINT_EVERY = 10000  # batch 하나의 read 수
+_MANIFEST = "manifest.json"
+
+
+class Checkpoint:
+    def __init__(self, directory: str, key: dict, batch_size: int = CHECKPOINT_EVERY):
+        self.directory = directory
+        self.key = key
+        self.batch_size = batch_size
+        self.batches = []  # 완료된 batch 파일 이름 (순서대로)
+        self.done = 0      # 완료된 read 수
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    # manifest를 읽어 key가 같으면 완료 목록을 이어받고, 다르면 이전 batch 파일 삭제
+    def _load(self) -> None:
+        try:
+            with open(self._path(_MANIFEST)) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            manifest = None
+        if manifest is not None and manifest.get("key") == self.key:
+            self.batches = manifest["batches"]
+            self.done = manifest["done"]
+            return
+        if manifest is not None:
+            print(f"> Checkpoint {self.directory}: 입력 / 파라미터가 달라 처음부터 실행")
+        self.clear()
+
+    def _write_manifest(self) -> None:
+        tmp = self._path(_MANIFEST + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump({"key": self.key, "batches": self.batches, "done": self.done}, f)
+        os.replace(tmp, self._path(_MANIFEST))
+
+    # 저장된 batch와 manifest 삭제
+    def clear(self) -> None:
+        for name in os.listdir(self.directory):
+            if name.startswith("batch_") or name.startswith(_MANIFEST):
+                os.remove(self._path(name))
+        self.batches = []
+        self.done = 0
+
+    # 완료된 batch 배열을 순서대로 yield (행 하나가 read 하나의 매핑 결과)
+    def completed_batches(self):
+        for name in self.batches:
+            yield np.load(self._path(name))
+
+    # 매핑 결과 tuple 목록을 batch 하나로 저장하고 manifest 갱신
+    def save_batch(self, rows: list) -> None:
+        name = f"batch_{len(self.batches):06d}.npy"
+        tmp = self._path(name + ".tmp")
+        with open(tmp, "wb") as f:
+            np.save(f, np.asarray(rows, dtype=np.int64))
+        os.replace(tmp, self._path(name))
+        self.batches.append(name)
+        self.done += len(rows)
+        self._write_manifest()
+
+
+# checkpoint 재사용 여부를 정하는 실행 key (read 파일은 내용 대신 크기 / 수정 시각으로 확인)
+def run_key(reference_path: str, read_path: str, **params) -> dict:
+    stat = os.stat(read_path)
+    return {
+        "reference": reference_checksum(reference_path),
+        "reads": [os.path.abspath(read_path), stat.st_size, stat.st_mtime_ns],
+        "params": params,
+    }
+
+
+# directory가 None이면 None (checkpoint 없이 실행)
+def open_checkpoint(directory: str, reference_path: str, read_path: str, batch_size: int = CHECKPOINT_EVERY,
+                    **params):
+    if not directory:
+        return None
+    checkpoint = Checkpoint(directory, run_key(reference_path, read_path, batch_size=batch_size, **params),
+                            batch_size)
+    if checkpoint.done:
+        print(f"> Resuming from checkpoint {directory}: {checkpoint.done} reads 완료")
+    return checkpoint
+
+
+# map_fn(reads) -> 매핑 결과 iterator 를 checkpoint와 함께 실행해 read 순서대로 결과 yield
+# 완료된 batch는 저장된 결과를 내보내고 그만큼 reads를 건너뛴 뒤, 나머지 결과를 batch_size개마다 저장
+def iter_checkpointed(map_fn, reads, checkpoint: Checkpoint = None):
+    if checkpoint is None:
+        yield from map_fn(reads)
+        return
+    reads = iter(reads)
+    for batch in checkpoint.completed_batches():
+        collections.deque(itertools.islice(reads, len(batch)), maxlen=0)
+        for row in batch.tolist():
+            yield tuple(row)
+    # batch가 차면 마지막 결과를 내보내기 전에 저장 (호출 쪽이 zip 등으로 마지막 결과 뒤에 멈춰도 저장됨)
+    pending = []
+    for result in map_fn(reads):
+        pending.append(result)
+        if len(pending) >= checkpoint.batch_size:
+            checkpoint.save_batch(pending)
+            pending = []
+        yield result
+    if pending:
+        checkpoint.save_batch(pending)
+
+
+# 매핑 스크립트 공통 옵션: --checkpoint DIR / --checkpoint-every N
+def add_arguments(parser) -> None:
+    parser.add_argument("--checkpoint", metavar="DIR",
+                        help="완료된 read batch를 저장할 디렉터리 (중단 후 같은 명령으로 다시 실행하면 이어서 실행)")
+    parser.add_argument("--checkpoint-every", type=int, default=CHECKPOINT_EVERY, metavar="N",
+                        help="checkpoint batch 하나의 read 수")
@@ -0,0 +1,49 @@
+# 정렬기 / 도구 통합 명령:  python -m aligner <command> [args ...]
+#   sw / minimizer / sa / fm  : 각 정렬 스크립트의 main (build-index / map, 인자 없이 실행하면 기본 데이터셋)
+#   genome / simulate         : genome_generation 데이터 생성 스크립트
+#   benchmark / server        : aligner.benchmark / aligner.server
+# 고른 명령의 모듈만 import하므로 python -m aligner --help / 서버 client 명령은 numpy를 읽지 않음
+#   python -m aligner fm map ref.txt reads.txt truth.txt --out positions.txt
+#   python -m aligner server --socket /tmp/aligner.sock serve
+
+import argparse
+import importlib
+import sys
+
+from aligner.scripts import SCRIPTS, load
+
+# 이름 -> (aligner 안의 모듈 이름, 설명). SCRIPTS의 스크립트와 함께 명령으로 노출
+MODULES = {
+    "benchmark": ("aligner.benchmark", "정렬기 통합 벤치마크 (JSON 출력, baseline 회귀 비교)"),
+    "server": ("aligner.server", "index를 메모리에 유지하는 매핑 서버 / client"),
+}
+
+
+def build_parser() -> argparse.ArgumentParser:
+    commands = {name: help_text for name, (_, help_text) in list(SCRIPTS.items()) + list(MODULES.items())}
+    width = max(map(len, commands))
+    parser = argparse.ArgumentParser(
+        prog="aligner", description="고대 DNA read 정렬기 모음",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="commands:\n" + "\n".join(f"  {name:<{width}}  {text}" for name, text in commands.items())
+        + "\n\n각 명령의 옵션: aligner <command> --help")
+    parser.add_argument("command", choices=list(commands), metavar="command", help="실행할 명령 (아래 목록)")
+    return parser
+
+
+# 선택한 명령의 main(argv)에 나머지 인자를 그대로 넘김 (usage의 prog는 "aligner <command>")
+def main(argv=None):
+    argv = list(sys.argv[1:] if argv is None else argv)
+    parser = build_parser()
+    if not argv or argv[0].startswith("-"):
+        parser.parse_args(argv[:1])  # --help 출력 또는 command 누락 오류로 종료
+    command, rest = argv[0], argv[1:]
+    parser.parse_args([command])  # 알 수 없는 command면 오류로 종료
+    module = importlib.import_module(MODULES[command][0]) if command in MODULES else load(command)
+
+    prog = sys.argv[0]
+    sys.argv[0] = f"aligner {command}"
+    try:
+        return module.main(rest)
+    finally:
+        sys.argv[0] = prog
@@ -0,0 +1,97 @@
+# 염기서열 2-bit 인코딩 유틸리티
+# A=0, C=1, G=2, T=3, 그 외 문자(N 등)=4
+
+import numpy as np
+
+BASES = "ACGT"
+UNKNOWN_CODE = 4
+
+# ASCII -> 코드 변환 테이블 (소문자도 허용)
+_ENCODE_TABLE = np.full(256, UNKNOWN_CODE, dtype=np.uint8)
+for _code, _base in enumerate(BASES):
+    _ENCODE_TABLE[ord(_base)] = _code
+    _ENCODE_TABLE[ord(_base.lower())] = _code
+
+# 코드 -> ASCII 변환 테이블
+_DECODE_TABLE = np.frombuffer(b"ACGTN", dtype=np.uint8)
+
+# 상보 염기 (코드: A<->T, C<->G, N은 그대로 / 문자열: 대소문자 유지, 그 외 문자는 그대로)
+_COMPLEMENT_CODES = np.array([3, 2, 1, 0, UNKNOWN_CODE], dtype=np.uint8)
+_COMPLEMENT_TEXT = str.maketrans("ACGTacgt", "TGCAtgca")
+
+
+# 문자열/bytes를 염기 코드(uint8, 0~4) 배열로 변환
+def encode_bases(seq) -> np.ndarray:
+    if isinstance(seq, str):
+        seq = seq.encode("ascii")
+    return _ENCODE_TABLE[np.frombuffer(seq, dtype=np.uint8)]
+
+
+# 염기 코드 배열을 문자열로 복원
+def decode_bases(codes: np.ndarray) -> str:
+    return _DECODE_TABLE[np.asarray(codes)].tobytes().decode("ascii")
+
+
+# 역상보 서열 (str이면 str, 코드 배열이면 코드 배열)
+def reverse_complement(seq):
+    if isinstance(seq, str):
+        return seq.translate(_COMPLEMENT_TEXT)[::-1]
+    if isinstance(seq, bytes):
+        return seq.decode("ascii").translate(_COMPLEMENT_TEXT)[::-1].encode("ascii")
+    return _COMPLEMENT_CODES[np.asarray(seq)[::-1]]
+
+
+# 염기 코드를 1바이트에 4개씩 압축 (i번째 염기는 (i % 4) * 2 비트 위치). 4(N)는 A로 저장됨
+def pack_2bit(codes: np.ndarray) -> np.ndarray:
+    codes = np.asarray(codes, dtype=np.uint8) & 3
+    pad = (-len(codes)) % 4
+    if pad:
+        codes = np.concatenate((codes, np.zeros(pad, dtype=np.uint8)))
+    quad = codes.reshape(-1, 4)
+    return (quad[:, 0] | (quad[:, 1] << 2) | (quad[:, 2] << 4) | (quad[:, 3] << 6)).astype(np.uint8)
+
+
+# k-mer 문자열을 2-bit 정수 key로 변환 (k <= 31)
+def kmer_to_int(kmer: str) -> int:
+    value = 0
+    for base in kmer:
+        code = _ENCODE_TABLE[ord(base)]
+        if code == UNKNOWN_CODE:
+            return -1
+        value = (value << 2) | int(code)
+    return value
+
+
+# 2-bit 정수 key를 k-mer 문자열로 복원 (kmer_to_int의 역)
+def int_to_kmer(key: int, k: int) -> str:
+    return "".join(BASES[(key >> (2 * (k - 1 - i))) & 3] for i in range(k))
+
+
+# 염기 코드 배열의 모든 k-mer를 2-bit 정수 key로 변환. N을 포함한 k-mer는 -1
+def kmer_ints(codes: np.ndarray, k: int) -> np.ndarray:
+    n = len(codes) - k + 1
+    if n <= 0:
+        return np.zeros(0, dtype=np.int64)
+    keys = np.zeros(n, dtype=np.int64)
+    has_unknown = np.zeros(n, dtype=bool)
+    for j in range(k):
+        window = codes[j:j + n]
+        keys = (keys << 2) | (window & 3)
+        has_unknown |= window == UNKNOWN_CODE
+    keys[has_unknown] = -1
+    return keys
+
+
+# 모든 k-mer의 canonical key (정방향 key와 역상보 key 중 작은 값)와 방향 (역상보 key를 골랐으면 1)
+# 정방향 read와 역상보 read가 같은 key를 만들므로 한 가닥만 index해도 양쪽 가닥을 찾을 수 있음
+# N 포함 k-mer와 자기 자신이 역상보인 k-mer(방향을 정할 수 없음)는 key -1
+def canonical_kmer_ints(codes: np.ndarray, k: int):
+    keys = kmer_ints(codes, k)
+    n = len(keys)
+    rc_keys = np.zeros(n, dtype=np.int64)
+    for j in range(k):
+        rc_keys |= (3 - (codes[j:j + n] & 3)).astype(np.int64) << (2 * j)
+    strand = (rc_keys < keys).astype(np.uint8)
+    canonical = np.where(strand == 1, rc_keys, keys)
+    canonical[(keys < 0) | (rc_keys == keys)] = -1
+    return canonical, strand
@@ -0,0 +1,124 @@
+# 매핑 전처리: 중복 read 접기 + 완전 일치(exact) fast path
+# read 하나는 아래 tier 중 하나에서 결과가 정해짐
+#   duplicate : 앞서 나온 read와 서열이 같음 -> 먼저 나온 read의 결과를 그대로 씀 (다시 매핑하지 않음)
+#   exact     : read 전체가 reference(정방향 / 역상보)에 그대로 있음 -> 정렬기별 exact 조회 한 번으로 결과 결정
+#   full      : 위 두 경우가 아니면 기존 매핑 경로 (seed_and_extend / minimizer_match / pigeonhole / backtracking)
+# - 중복 제거: DEDUP_BATCH개씩 read를 모아 같은 서열을 (read -> 개수)로 접고, 처음 나온 서열만 매핑.
+#   이전 batch에서 매핑한 서열은 최대 DEDUP_CACHE개까지 결과를 기억해 batch를 넘는 중복도 재사용
+# - exact 조회는 worker 안에서 실행 (aligner.parallel의 fork worker / chunk 단위 그대로)
+# - exact 조회 결과는 full 경로가 같은 read에 내는 결과와 같은 형태 / 같은 tie-break(정방향 -> 앞 위치)를 따름
+#   tier별 read 수는 TierCounts로 집계 (계측이 켜져 있으면 fast_path.<tier> counter에도 기록)
+
+from aligner import instrument
+from aligner.parallel import iter_chunks, map_batches_parallel, map_reads_parallel
+
+DUPLICATE = "duplicate"
+EXACT = "exact"
+FULL = "full"
+TIERS = (DUPLICATE, EXACT, FULL)
+
+DEDUP_BATCH = 1 << 14   # 중복을 접는 단위 (read 수)
+DEDUP_CACHE = 1 << 18   # batch를 넘어 결과를 기억할 최대 서열 수
+
+
+# tier별 read 수
+class TierCounts:
+    def __init__(self):
+        self.counts = dict.fromkeys(TIERS, 0)
+        self.unique = 0         # 매핑한 서로 다른 서열 수
+        self.max_copies = 0     # batch 하나에서 가장 많이 반복된 서열의 개수
+
+    def add(self, tier: str, n: int = 1) -> None:
+        if n:
+            self.counts[tier] += n
+            instrument.count("fast_path." + tier, n)
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+    # tier별 비율 (0~1)
+    def fractions(self) -> dict:
+        total = self.total
+        return {tier: count / total if total else 0.0 for tier, count in self.counts.items()}
+
+    def summary(self) -> str:
+        fractions = self.fractions()
+        parts = [f"{tier} {self.counts[tier]} ({fractions[tier] * 100:.1f}%)" for tier in TIERS]
+        return " / ".join(parts) + f" of {self.total} reads"
+
+
+# worker: exact 조회가 결과를 내면 그대로, 아니면 full 매핑. (tier, 결과) 반환
+def _map_read_tiered(state, read):
+    exact_fn, map_fn, inner = state
+    if exact_fn is not None:
+        hit = exact_fn(inner, read)
+        if hit is not None:
+            return EXACT, hit
+    return FULL, map_fn(inner, read)
+
+
+# worker: chunk 단위 버전. exact_batch_fn(state, reads)는 read별 결과 또는 None 목록
+def _map_batch_tiered(state, reads):
+    exact_fn, map_fn, inner = state
+    hits = exact_fn(inner, reads) if exact_fn is not None else [None] * len(reads)
+    rest = [read for read, hit in zip(reads, hits) if hit is None]
+    mapped = iter(map_fn(inner, rest) if rest else [])
+    return [(EXACT, hit) if hit is not None else (FULL, next(mapped)) for hit in hits]
+
+
+# map_unique(reads) -> (tier, 결과) iterator 를 중복 제거와 함께 실행해 read 순서대로 결과만 yield
+def iter_tiered(map_unique, reads, tiers: TierCounts = None, dedup: bool = True, batch_size: int = DEDUP_BATCH,
+                cache_size: int = DEDUP_CACHE):
+    tiers = TierCounts() if tiers is None else tiers
+    if not dedup:
+        for tier, result in map_unique(reads):
+            tiers.add(tier)
+            tiers.unique += 1
+            yield result
+        return
+    cache = {}  # 이전 batch에서 매핑한 서열 -> 결과
+    for batch in iter_chunks(reads, batch_size):
+        copies = {}  # 서열 -> 이 batch에서의 개수 (처음 나온 순서 유지)
+        for read in batch:
+            copies[read] = copies.get(read, 0) + 1
+        new = [read for read in copies if read not in cache]
+        found = {}
+        for read, (tier, result) in zip(new, map_unique(new)):
+            found[read] = result
+            tiers.add(tier)
+            tiers.add(DUPLICATE, copies[read] - 1)
+        tiers.add(DUPLICATE, len(batch) - sum(copies[read] for read in new))
+        tiers.unique += len(new)
+        tiers.max_copies = max(tiers.max_copies, max(copies.values()))
+        for read in batch:
+            result = found.get(read)
+            yield cache[read] if result is None else result
+        for read in new[:max(0, cache_size - len(cache))]:
+            cache[read] = found[read]
+
+
+# map_reads_parallel + 중복 제거 / exact fast path
+# map_fn(state, read) -> 결과, exact_fn(state, read) -> 결과 또는 None (None이면 exact tier 없이 full 매핑만)
+def map_reads_tiered(map_fn, exact_fn, state, reads, workers: int = 1, dedup: bool = True,
+                     tiers: TierCounts = None):
+    def map_unique(unique_reads):
+        return map_reads_parallel(_map_read_tiered, (exact_fn, map_fn, state), unique_reads, workers=workers)
+    return iter_tiered(map_unique, reads, tiers, dedup=dedup)
+
+
+# map_batches_parallel + 중복 제거 / exact fast path
+# map_batch_fn(state, reads) -> 결과 list, exact_batch_fn(state, reads) -> read별 결과 또는 None list
+def map_batches_tiered(map_batch_fn, exact_batch_fn, state, reads, workers: int = 1, dedup: bool = True,
+                       tiers: TierCounts = None):
+    def map_unique(unique_reads):
+        return map_batches_parallel(_map_batch_tiered, (exact_batch_fn, map_batch_fn, state), unique_reads,
+                                    workers=workers)
+    return iter_tiered(map_unique, reads, tiers, dedup=dedup)
+
+
+# 매핑 스크립트 공통 옵션: --no-dedup / --no-exact
+def add_arguments(parser) -> None:
+    parser.add_argument("--no-dedup", action="store_true", help="같은 서열의 read도 각각 매핑 (중복 제거 끄기)")
+    parser.add_argument("--no-exact", action="store_true",
+                        help="read 전체 exact 조회 없이 모든 read를 기존 매핑 경로로 처리")
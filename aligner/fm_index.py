@@ -0,0 +1,291 @@
+# FM-index (BWT backward search) 엔진 - BWT_FMIndex/main.cpp의 파이썬 버전
+# - BWT: 2-bit 압축 ('$' 행은 A로 저장하고 dollar_row로 따로 기억)
+# - Occ: occ_rate 행마다 A/C/G/T 누적 개수 checkpoint, 나머지는 압축 BWT 블록을 정수로 읽어 popcount
+# - SA: 텍스트 위치가 sa_rate의 배수인 행만 저장 (bitvector + rank로 찾고, 나머지는 LF로 이동해 계산)
+# 전체 SA(int32, 4바이트/염기) 대신 약 0.25 + 16/occ_rate + 4.25/sa_rate 바이트/염기만 사용
+# - N: 텍스트에는 A로 넣고 N 구간 목록(fm.n_runs)을 따로 저장. 검색 결과 중 N 자리에 read의 A가 놓인 위치는
+#   그만큼 mismatch를 더해 다시 판정 (reference의 N은 항상 mismatch)
+
+import numpy as np
+
+from aligner import instrument
+from aligner.dna import UNKNOWN_CODE, encode_bases, pack_2bit, reverse_complement
+from aligner.packed_sequence import unknown_runs
+from aligner.sa_builder import build_suffix_array
+
+MASK_01 = int("01" * 64, 2)  # 2-bit 칸마다 하위 비트만 1 (최대 64칸)
+
+
+# reference(str / 염기 코드 배열)로 FM-index section들을 생성 (prefix "fm.")
+# chunk_size: Occ / SA sample 계산을 나눠 처리할 행 수 (occ_rate, 64의 배수로 맞춤)
+def build_fm_arrays(reference, occ_rate: int = 64, sa_rate: int = 32, chunk_size: int = 1 << 22) -> dict:
+    if occ_rate % 4 or not 0 < occ_rate <= 64:
+        raise ValueError(f"occ_rate는 64 이하의 4의 배수여야 합니다: {occ_rate}")
+    codes = reference if isinstance(reference, np.ndarray) else encode_bases(reference)
+    n_runs = unknown_runs(codes)
+    if len(n_runs):
+        codes = np.where(codes < UNKNOWN_CODE, codes, 0).astype(np.uint8)  # N 자리는 A로 저장
+    n = len(codes)
+    rows = n + 1  # '$' 포함
+
+    # SA(T$) = [n] + SA(T): '$'로 시작하는 접미사가 항상 첫 행
+    sa = build_suffix_array(codes)
+    bwt = np.empty(rows, dtype=np.uint8)
+    bwt[0] = codes[-1] if n else 0
+    bwt[1:] = codes[sa - 1]  # sa == 0 인 행은 '$' 자리 (아래에서 A로 저장)
+    dollar_row = int(np.flatnonzero(sa == 0)[0]) + 1 if n else 0
+    bwt[dollar_row] = 0
+
+    counts = np.bincount(bwt, minlength=4).astype(np.int64)
+    counts[0] -= 1  # '$' 행 제외
+    first = np.concatenate(([1], 1 + np.cumsum(counts)[:-1])).astype(np.int64)
+
+    # Occ checkpoint: occ[b, c] = bwt[0:b*occ_rate]에 있는 c의 개수
+    step = max(occ_rate, chunk_size // 64 * 64)
+    num_blocks = (rows + occ_rate - 1) // occ_rate
+    block_counts = np.zeros((num_blocks, 4), dtype=np.int64)
+    for start in range(0, rows, step):
+        block = bwt[start:start + step].astype(np.int64)
+        block_ids = np.arange(start, start + len(block), dtype=np.int64) // occ_rate
+        block_counts += np.bincount(block_ids * 4 + block, minlength=num_blocks * 4).reshape(num_blocks, 4)
+    block_counts[dollar_row // occ_rate, 0] -= 1
+    occ = np.zeros((num_blocks + 1, 4), dtype=np.uint32 if n < 1 << 32 else np.uint64)
+    np.cumsum(block_counts, axis=0, out=occ[1:])
+
+    # SA sample: 텍스트 위치가 sa_rate 배수인 행 표시 + 64행 단위 rank checkpoint
+    sampled = np.zeros(rows, dtype=bool)
+    sampled[0] = n % sa_rate == 0
+    sampled[1:] = sa % sa_rate == 0
+    sa_values = np.concatenate(([n], sa))[sampled].astype(sa.dtype)
+    bits = np.packbits(sampled, bitorder="little")
+    bits = np.concatenate((bits, np.zeros((-len(bits)) % 8, dtype=np.uint8))).view(np.uint64)
+    word_counts = np.add.reduceat(sampled, np.arange(0, rows, 64)) if rows else np.zeros(0, dtype=np.int64)
+    sa_rank = np.concatenate(([0], np.cumsum(word_counts)[:-1])).astype(np.uint32 if n < 1 << 32 else np.uint64)
+
+    return {
+        "fm.bwt": pack_2bit(bwt),
+        "fm.meta": np.array([n, dollar_row, occ_rate, sa_rate], dtype=np.int64),
+        "fm.first": first,
+        "fm.occ": occ.reshape(-1),
+        "fm.sa_bits": bits,
+        "fm.sa_rank": sa_rank,
+        "fm.sa_values": sa_values,
+        "fm.n_runs": n_runs,
+    }
+
+
+# numpy 배열을 복사 없이 파이썬 int로 인덱싱할 수 있는 memoryview로 변환
+def _int_view(array: np.ndarray) -> memoryview:
+    array = np.ascontiguousarray(array)
+    return memoryview(array).cast("B").cast(array.dtype.char)
+
+
+class FMIndex:
+    # arrays: build_fm_arrays 결과 (또는 같은 section을 가진 index 파일). 배열은 memoryview로 복사 없이 접근
+    def __init__(self, arrays):
+        n, dollar_row, occ_rate, sa_rate = (int(v) for v in arrays["fm.meta"])
+        self.n = n
+        self.dollar_row = dollar_row
+        self.occ_rate = occ_rate
+        self.sa_rate = sa_rate
+        self.first = [int(v) for v in arrays["fm.first"]]
+        self._bwt = _int_view(arrays["fm.bwt"])
+        self._occ = _int_view(arrays["fm.occ"])
+        self._sa_bits = _int_view(arrays["fm.sa_bits"])
+        self._sa_rank = _int_view(arrays["fm.sa_rank"])
+        self._sa_values = _int_view(arrays["fm.sa_values"])
+        # N 구간 목록 (fm.n_runs가 없는 예전 index는 A/C/G/T만으로 만든 것)
+        self.n_runs = np.asarray(arrays["fm.n_runs"]) if "fm.n_runs" in arrays else np.zeros((0, 2), dtype=np.int64)
+        # c가 모든 2-bit 칸을 채운 값 (XOR하면 c인 칸만 00이 됨)
+        self._fill = [MASK_01 * c for c in range(4)]
+
+    @classmethod
+    def from_reference(cls, reference, occ_rate: int = 64, sa_rate: int = 32) -> "FMIndex":
+        return cls(build_fm_arrays(reference, occ_rate=occ_rate, sa_rate=sa_rate))
+
+    # BWT 행 수 ('$' 포함)
+    def __len__(self) -> int:
+        return self.n + 1
+
+    # BWT의 row번째 문자 코드 ('$' 행은 -1)
+    def bwt_code(self, row: int) -> int:
+        if row == self.dollar_row:
+            return -1
+        return (self._bwt[row >> 2] >> ((row & 3) << 1)) & 3
+
+    # Occ(c, i): bwt[0:i]에 있는 c의 개수
+    def occ(self, c: int, i: int) -> int:
+        block, rest = divmod(i, self.occ_rate)
+        count = self._occ[block * 4 + c]
+        if rest:
+            start = block * self.occ_rate
+            word = int.from_bytes(self._bwt[start >> 2:(start + rest + 3) >> 2], "little")
+            word ^= self._fill[c]
+            # 각 2-bit 칸이 00(= c)이면 하위 비트에 1이 남음
+            count += (~(word | (word >> 1)) & MASK_01 & ((1 << (2 * rest)) - 1)).bit_count()
+            if c == 0 and start <= self.dollar_row < i:
+                count -= 1
+        return count
+
+    # LF mapping으로 SA 구간 [lo, hi)를 문자 c만큼 왼쪽으로 확장
+    def extend(self, c: int, lo: int, hi: int) -> tuple:
+        base = self.first[c]
+        return base + self.occ(c, lo), base + self.occ(c, hi)
+
+    # pattern과 정확히 일치하는 SA 구간 [lo, hi) (없으면 lo >= hi)
+    # reference에 N이 있으면 N 자리를 A로 맞춘 위치도 포함됨 (locate 후 _unknown_matches로 걸러냄)
+    def backward_search(self, pattern) -> tuple:
+        codes = pattern if isinstance(pattern, np.ndarray) else encode_bases(pattern)
+        lo, hi = 0, self.n + 1
+        for c in codes[::-1].tolist():
+            if c >= UNKNOWN_CODE:
+                return 0, 0
+            lo, hi = self.extend(c, lo, hi)
+            if lo >= hi:
+                return lo, lo
+        return lo, hi
+
+    # SA 행 row의 텍스트 위치: 샘플된 행이 나올 때까지 LF로 이동한 횟수를 더함
+    def locate(self, row: int) -> int:
+        steps = 0
+        while True:
+            word = self._sa_bits[row >> 6]
+            bit = row & 63
+            if (word >> bit) & 1:
+                rank = self._sa_rank[row >> 6] + (word & ((1 << bit) - 1)).bit_count()
+                return self._sa_values[rank] + steps
+            c = self.bwt_code(row)
+            row = self.first[c] + self.occ(c, row)
+            steps += 1
+
+    # SA 구간 [lo, hi)의 텍스트 위치들 (오름차순)
+    def locate_range(self, lo: int, hi: int) -> list:
+        return sorted(self.locate(row) for row in range(lo, hi))
+
+    # pos에 놓인 read(codes)의 A 중 reference N 자리에 놓인 개수 (검색에서는 일치로 셌지만 실제로는 mismatch)
+    def _unknown_matches(self, pos: int, codes: np.ndarray) -> int:
+        end = pos + len(codes)
+        first = int(np.searchsorted(self.n_runs[:, 1], pos, side="right"))
+        extra = 0
+        for run_start, run_end in self.n_runs[first:].tolist():
+            if run_start >= end:
+                break
+            extra += int(np.count_nonzero(codes[max(run_start, pos) - pos:min(run_end, end) - pos] == 0))
+        return extra
+
+    # search_intervals 결과의 텍스트 위치들. reference에 N이 있으면 N 자리 mismatch를 더해 budget을 넘는 위치는 제외
+    def _locate_hits(self, intervals: list, codes: np.ndarray, budget: int) -> list:
+        if not len(self.n_runs):
+            return [self.locate(row) for lo, hi, _ in intervals for row in range(lo, hi)]
+        positions = []
+        for lo, hi, mm in intervals:
+            for row in range(lo, hi):
+                pos = self.locate(row)
+                if mm + self._unknown_matches(pos, codes) <= budget:
+                    positions.append(pos)
+        return positions
+
+    # lower[i]: pattern[0:i]를 맞추는 데 필요한 mismatch 수의 하한
+    # 오른쪽부터 backward search로 reference에 없는 구간을 잘라내며, 구간이 prefix 안에 완전히 들어간 개수를 셈
+    def mismatch_lower_bounds(self, codes: list) -> list:
+        m = len(codes)
+        lower = [0] * (m + 1)
+        end = m
+        lo, hi = 0, self.n + 1
+        cuts = []
+        for pos in range(m - 1, -1, -1):
+            c = codes[pos]
+            if c < UNKNOWN_CODE:
+                lo, hi = self.extend(c, lo, hi)
+            if c >= UNKNOWN_CODE or lo >= hi:
+                cuts.append(end)  # [pos, end) 구간은 reference에 없음
+                end = pos
+                lo, hi = 0, self.n + 1
+        for cut_end in cuts:
+            for i in range(cut_end, m + 1):
+                lower[i] += 1
+        return lower
+
+    # main.cpp approxSearch와 같은 mismatch backtracking (재귀 대신 stack 사용)
+    # 오른쪽 끝부터 한 글자씩 확장하며 다른 염기로의 치환을 최대 max_mismatches번 허용하고,
+    # 남은 prefix의 mismatch 하한으로 가망 없는 가지를 잘라냄. (lo, hi, mismatch 수) 리스트 반환
+    def search_intervals(self, pattern, max_mismatches: int, lower: list = None) -> list:
+        codes = (pattern if isinstance(pattern, np.ndarray) else encode_bases(pattern)).tolist()
+        if lower is None:
+            lower = self.mismatch_lower_bounds(codes)
+        if lower[len(codes)] > max_mismatches:
+            return []
+        results = []
+        stack = [(len(codes), 0, self.n + 1, 0)]
+        while stack:
+            pos, lo, hi, mm = stack.pop()
+            if pos == 0:
+                results.append((lo, hi, mm))
+                continue
+            pos -= 1
+            target = codes[pos]
+            # 치환 가지를 먼저 쌓고 정확히 일치하는 가지를 마지막에 쌓아 먼저 탐색
+            if mm < max_mismatches:
+                for c in range(4):
+                    if c != target:
+                        new_lo, new_hi = self.extend(c, lo, hi)
+                        if new_lo < new_hi and mm + 1 + lower[pos] <= max_mismatches:
+                            stack.append((pos, new_lo, new_hi, mm + 1))
+            if target < UNKNOWN_CODE:
+                new_lo, new_hi = self.extend(target, lo, hi)
+                if new_lo < new_hi and mm + lower[pos] <= max_mismatches:
+                    stack.append((pos, new_lo, new_hi, mm))
+        return results
+
+    # max_mismatches 이내로 일치하는 텍스트 위치들 (main.cpp searchWithMismatch, 오름차순)
+    def search_with_mismatches(self, pattern, max_mismatches: int) -> list:
+        codes = pattern if isinstance(pattern, np.ndarray) else encode_bases(pattern)
+        return sorted(self._locate_hits(self.search_intervals(codes, max_mismatches), codes, max_mismatches))
+
+    # read 전체가 정확히 일치할 때의 best_hits 결과 (backward search 한 번, mismatch 하한 / backtracking 없음)
+    # 양쪽 가닥 모두 일치하는 위치가 없으면 None
+    def exact_hits(self, read, both_strands: bool = True):
+        codes = read if isinstance(read, np.ndarray) else encode_bases(read)
+        strands = [codes, reverse_complement(codes)] if both_strands else [codes]
+        with instrument.stage("fm.exact"):
+            ranges = [self.backward_search(strand) for strand in strands]
+        if all(lo >= hi for lo, hi in ranges):
+            return None
+        positions = [self.locate_range(lo, hi) for lo, hi in ranges]
+        if len(self.n_runs):
+            positions = [[pos for pos in strand_positions if not self._unknown_matches(pos, strand)]
+                         for strand, strand_positions in zip(strands, positions)]
+            if not any(positions):
+                return None
+        reverse = not positions[0]
+        return min(positions[1] if reverse else positions[0]), 0, sum(map(len, positions)), reverse
+
+    # 하나의 read에 대해 (최적 위치, mismatch 수, 같은 mismatch 수의 위치 개수, 역방향 여부)
+    # mismatch 허용치를 0부터 늘려 가며 처음 결과가 나온 단계에서 멈춤. 없으면 (-1, max_mismatches + 1, 0, False)
+    # both_strands면 같은 index에 역상보 read도 같은 허용치로 검색 (역방향 위치는 역상보 read의 시작 위치)
+    # 같은 단계에서 양쪽 가닥이 모두 맞으면 정방향 위치를 쓰고, 동률 위치 개수는 두 가닥을 합침
+    def best_hits(self, read, max_mismatches: int, both_strands: bool = True) -> tuple:
+        codes = read if isinstance(read, np.ndarray) else encode_bases(read)
+        strands = [codes, reverse_complement(codes)] if both_strands else [codes]
+        instrument.count("fm.reads")
+        with instrument.stage("fm.search"):
+            lowers = [self.mismatch_lower_bounds(strand.tolist()) for strand in strands]
+        found = positions = [[] for _ in strands]
+        for budget in range(min(lower[-1] for lower in lowers), max_mismatches + 1):
+            with instrument.stage("fm.search"):
+                found = [self.search_intervals(strand, budget, lower) if lower[-1] <= budget else []
+                         for strand, lower in zip(strands, lowers)]
+            if not any(found):
+                continue
+            # N 자리 mismatch를 더하면 budget을 넘는 위치만 있으면 허용치를 늘려 계속 (N이 없으면 항상 여기서 끝)
+            with instrument.stage("fm.locate"):
+                positions = [self._locate_hits(intervals, strand, budget) for intervals, strand in zip(found, strands)]
+            if any(positions):
+                break
+        instrument.observe("fm.intervals", sum(len(intervals) for intervals in found))
+        if not any(positions):
+            return -1, max_mismatches + 1, 0, False
+        num_best = sum(len(strand_positions) for strand_positions in positions)
+        instrument.observe("fm.candidates", num_best)
+        reverse = not positions[0]
+        return min(positions[1] if reverse else positions[0]), budget, num_best, reverse
@@ -0,0 +1,146 @@
+# 버전이 있는 바이너리 index 파일 포맷 (세 정렬기가 공유)
+#
+# [magic 8B][header 길이 8B][JSON header][padding][section 0][section 1]...
+# - header: 포맷 버전, index 종류, 파라미터, reference 파일 checksum, 각 section의 dtype/shape/offset
+# - section: 2-bit 압축 reference, suffix array, minimizer / k-mer 테이블 등 numpy 배열
+# 로딩은 numpy.memmap으로 하므로 시작이 빠르고, 여러 worker 프로세스가 같은 page를 공유함
+
+import hashlib
+import json
+import os
+import struct
+
+import numpy as np
+
+from aligner.packed_sequence import PackedSequence
+
+MAGIC = b"ALNIDX\x00\x01"
+FORMAT_VERSION = 2  # 2: reference.n_runs(N 구간) section 추가 (이전 버전 index는 다시 생성)
+_ALIGN = 64  # section 시작 위치 정렬 (bytes)
+
+
+class IndexFile:
+    def __init__(self, path: str, header: dict, arrays: dict):
+        self.path = path
+        self.header = header
+        self.arrays = arrays
+
+    @property
+    def kind(self) -> str:
+        return self.header["kind"]
+
+    @property
+    def params(self) -> dict:
+        return self.header["params"]
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.arrays[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.arrays
+
+
+# reference 파일 내용의 sha256 (1MB 단위로 읽어 메모리 사용 최소화)
+def reference_checksum(reference_path: str) -> str:
+    digest = hashlib.sha256()
+    with open(reference_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# arrays를 하나의 index 파일로 저장 (임시 파일에 쓴 뒤 교체)
+def save_index(path: str, kind: str, params: dict, checksum: str, arrays: dict) -> None:
+    arrays = {name: np.ascontiguousarray(arr) for name, arr in arrays.items()}
+    sections = {}
+    offset = 0
+    for name, arr in arrays.items():
+        offset = (offset + _ALIGN - 1) // _ALIGN * _ALIGN
+        sections[name] = {"dtype": arr.dtype.str, "shape": list(arr.shape), "offset": offset}
+        offset += arr.nbytes
+
+    header = {
+        "version": FORMAT_VERSION,
+        "kind": kind,
+        "params": params,
+        "reference_checksum": checksum,
+        "sections": sections,
+    }
+    header_bytes = json.dumps(header).encode("utf-8")
+    data_start = (len(MAGIC) + 8 + len(header_bytes) + _ALIGN - 1) // _ALIGN * _ALIGN
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", len(header_bytes)))
+        f.write(header_bytes)
+        for name, arr in arrays.items():
+            f.seek(data_start + sections[name]["offset"])
+            f.write(arr.tobytes())
+    os.replace(tmp_path, path)
+
+
+# index 파일의 header만 읽음 (포맷이 맞지 않으면 ValueError)
+def read_header(path: str) -> dict:
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"index 파일 형식이 아닙니다: {path}")
+        (header_len,) = struct.unpack("<Q", f.read(8))
+        header = json.loads(f.read(header_len).decode("utf-8"))
+    if header.get("version") != FORMAT_VERSION:
+        raise ValueError(f"지원하지 않는 index 버전입니다: {header.get('version')} (현재 {FORMAT_VERSION})")
+    header["_data_start"] = (len(MAGIC) + 8 + header_len + _ALIGN - 1) // _ALIGN * _ALIGN
+    return header
+
+
+# index 파일을 memmap으로 로딩 (배열 데이터는 실제 접근 시점에 page 단위로 읽힘)
+def load_index(path: str) -> IndexFile:
+    header = read_header(path)
+    arrays = {}
+    for name, sec in header["sections"].items():
+        shape = tuple(sec["shape"])
+        if int(np.prod(shape)) == 0:
+            arrays[name] = np.zeros(shape, dtype=np.dtype(sec["dtype"]))
+            continue
+        arrays[name] = np.memmap(path, dtype=np.dtype(sec["dtype"]), mode="r",
+                                 offset=header["_data_start"] + sec["offset"], shape=shape)
+    return IndexFile(path, header, arrays)
+
+
+# 기존 index 파일이 같은 reference / 종류 / 파라미터로 만들어졌는지 확인
+def index_is_current(index_path: str, kind: str, params: dict, checksum: str) -> bool:
+    if not os.path.exists(index_path):
+        return False
+    try:
+        header = read_header(index_path)
+    except ValueError:
+        return False
+    return (header["kind"] == kind and header["params"] == params
+            and header["reference_checksum"] == checksum)
+
+
+# 2-bit 압축 reference section (N 위치는 reference.n_runs 구간 목록으로 따로 저장)
+def packed_reference_arrays(reference: str) -> dict:
+    packed = PackedSequence.from_string(reference)
+    return {"reference.packed": packed.packed,
+            "reference.length": np.array([len(reference)], dtype=np.int64),
+            "reference.n_runs": packed.n_runs}
+
+
+# checksum이 일치하면 기존 index를 로딩하고, 아니면 build_fn(reference)로 새로 만들어 저장 후 로딩
+# build_fn은 {section 이름: numpy 배열} 딕셔너리를 반환해야 함
+def load_or_build_index(index_path: str, reference_path: str, kind: str, params: dict,
+                        build_fn, reference: str = None, force: bool = False) -> IndexFile:
+    checksum = reference_checksum(reference_path)
+    if not force and index_is_current(index_path, kind, params, checksum):
+        print(f"> Loading {kind} index from {index_path} (checksum 일치, 재생성 생략)")
+        return load_index(index_path)
+
+    print(f"> Building {kind} index -> {index_path}")
+    if reference is None:
+        with open(reference_path, "r") as f:
+            reference = f.read().strip()
+    arrays = packed_reference_arrays(reference)
+    arrays.update(build_fn(reference))
+    save_index(index_path, kind, params, checksum, arrays)
+    return load_index(index_path)
@@ -0,0 +1,218 @@
+# 매핑 파이프라인 단계별 계측 (counter / timer / histogram)
+# 기본은 꺼져 있고, 꺼져 있을 때 count / observe는 플래그 확인만, stage는 공유 no-op context만 반환
+#   instrument.enable()
+#   with instrument.stage("minimizer.verify"):      # 누적 시간 / 호출 수 (+ tracemalloc 중이면 할당 byte)
+#       ...
+#   instrument.count("sw.extension_calls", len(diags))
+#   instrument.observe("minimizer.candidates", len(candidates))   # 값별 빈도 histogram
+#   instrument.dump_json("stats.json")
+# 병렬 매핑 worker의 계측 결과는 chunk마다 부모 프로세스로 합쳐짐 (aligner.parallel)
+
+import contextlib
+import json
+import time
+import tracemalloc
+
+
+class Stats:
+    def __init__(self):
+        self.enabled = False
+        self.reset()
+
+    def reset(self) -> None:
+        self.counters = {}
+        self.timers = {}       # 이름 -> [호출 수, 누적 초]
+        self.histograms = {}   # 이름 -> {값: 빈도}
+
+    # JSON으로 저장 가능한 dict (histogram 값은 정렬된 문자열 key)
+    def snapshot(self) -> dict:
+        timers = {}
+        for name, (calls, seconds) in sorted(self.timers.items()):
+            timers[name] = {"calls": calls, "seconds": round(seconds, 6),
+                            "mean_us": round(seconds / calls * 1e6, 3) if calls else 0.0}
+        histograms = {}
+        for name, hist in sorted(self.histograms.items()):
+            total = sum(hist.values())
+            weighted = sum(value * freq for value, freq in hist.items())
+            histograms[name] = {"count": total, "mean": round(weighted / total, 3) if total else 0.0,
+                                "min": min(hist), "max": max(hist),
+                                "bins": {str(value): hist[value] for value in sorted(hist)}}
+        return {"counters": dict(sorted(self.counters.items())), "timers": timers, "histograms": histograms}
+
+    # 다른 프로세스에서 만든 snapshot을 합침
+    def merge(self, snapshot: dict) -> None:
+        for name, value in snapshot["counters"].items():
+            self.counters[name] = self.counters.get(name, 0) + value
+        for name, timer in snapshot["timers"].items():
+            entry = self.timers.setdefault(name, [0, 0.0])
+            entry[0] += timer["calls"]
+            entry[1] += timer["seconds"]
+        for name, hist in snapshot["histograms"].items():
+            target = self.histograms.setdefault(name, {})
+            for value, freq in hist["bins"].items():
+                value = int(value)
+                target[value] = target.get(value, 0) + freq
+
+
+STATS = Stats()
+
+
+class _Stage:
+    __slots__ = ("name", "start", "traced")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.traced = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        entry = STATS.timers.setdefault(self.name, [0, 0.0])
+        entry[0] += 1
+        entry[1] += elapsed
+        if self.traced is not None:
+            grown = tracemalloc.get_traced_memory()[0] - self.traced
+            if grown > 0:
+                count(self.name + ".bytes", grown)
+        return False
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+def enable() -> None:
+    STATS.enabled = True
+
+
+def disable() -> None:
+    STATS.enabled = False
+
+
+def enabled() -> bool:
+    return STATS.enabled
+
+
+def reset() -> None:
+    STATS.reset()
+
+
+# 이름별 누적 counter
+def count(name: str, value: int = 1) -> None:
+    if STATS.enabled:
+        STATS.counters[name] = STATS.counters.get(name, 0) + int(value)
+
+
+# 정수 값 하나를 histogram에 추가 (read당 후보 수 등)
+def observe(name: str, value: int) -> None:
+    if STATS.enabled:
+        hist = STATS.histograms.setdefault(name, {})
+        value = int(value)
+        hist[value] = hist.get(value, 0) + 1
+
+
+# 여러 값을 한 번에 histogram에 추가 (꺼져 있으면 values를 순회하지 않음)
+def observe_many(name: str, values) -> None:
+    if STATS.enabled:
+        for value in values:
+            observe(name, value)
+
+
+# with 블록 실행 시간을 name 타이머에 누적
+def stage(name: str):
+    return _Stage(name) if STATS.enabled else _NULL_STAGE
+
+
+def snapshot() -> dict:
+    return STATS.snapshot()
+
+
+def merge(data: dict) -> None:
+    STATS.merge(data)
+
+
+def dump_json(filename: str) -> None:
+    with open(filename, "w") as f:
+        json.dump(STATS.snapshot(), f, indent=2)
+        f.write("\n")
+
+
+# with 블록 동안 cProfile 실행. filename이 있으면 pstats 파일로 저장, 없으면 상위 top개 함수 출력
+@contextlib.contextmanager
+def profile_session(filename: str = None, sort: str = "cumulative", top: int = 30):
+    import cProfile  # --profile을 쓸 때만 import (pstats는 import 비용이 큼)
+    import io
+    import pstats
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        if filename:
+            profiler.dump_stats(filename)
+        else:
+            out = io.StringIO()
+            pstats.Stats(profiler, stream=out).sort_stats(sort).print_stats(top)
+            print(out.getvalue())
+
+
+# with 블록 동안 tracemalloc 실행. 최대 할당량을 counter로 남기고 할당이 많은 위치 top개 출력
+# (실행 중에는 stage()가 단계별 할당 byte도 기록)
+@contextlib.contextmanager
+def tracemalloc_session(top: int = 10):
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    try:
+        yield
+    finally:
+        _, peak = tracemalloc.get_traced_memory()
+        count("tracemalloc.peak_bytes", peak)
+        snapshot_ = tracemalloc.take_snapshot()
+        if started:
+            tracemalloc.stop()
+        print(f"tracemalloc peak: {peak / (1 << 20):.1f} MB")
+        for stat in snapshot_.statistics("lineno")[:top]:
+            print(f"  {stat}")
+
+
+# 매핑 스크립트 공통 옵션: --stats FILE / --profile [FILE] / --trace-memory
+def add_arguments(parser) -> None:
+    parser.add_argument("--stats", metavar="FILE", help="단계별 counter / timer / histogram을 JSON으로 저장")
+    parser.add_argument("--profile", nargs="?", const="", metavar="FILE",
+                        help="cProfile 실행 (FILE이 있으면 pstats 파일 저장, 없으면 상위 함수 출력)")
+    parser.add_argument("--trace-memory", action="store_true", help="tracemalloc으로 할당량 추적")
+
+
+# add_arguments로 받은 옵션에 따라 계측 / 프로파일링을 켜고 블록이 끝나면 결과 저장
+@contextlib.contextmanager
+def session_from_args(args):
+    stats_file = getattr(args, "stats", None)
+    profile = getattr(args, "profile", None)
+    trace_memory = getattr(args, "trace_memory", False)
+    with contextlib.ExitStack() as stack:
+        if stats_file or trace_memory:
+            reset()
+            enable()
+            stack.callback(disable)
+        if stats_file:
+            stack.callback(dump_json, stats_file)
+        if profile is not None:
+            stack.enter_context(profile_session(profile or None))
+        if trace_memory:
+            stack.enter_context(tracemalloc_session())
+        yield
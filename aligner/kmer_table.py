@@ -0,0 +1,147 @@
+# CSR(정렬된 key + offsets + positions) 형태의 k-mer / minimizer 위치 테이블
+# dict of list와 같은 방식(get, in, [])으로 조회할 수 있음
+# 등장 횟수가 max_occ를 넘는 반복 key는 테이블에서 빼고 masked_keys / masked_counts에 따로 기록
+# (reference 염기당 key 8 + offset 4 + 위치 4 바이트 정도, stride로 표본 추출하면 그만큼 줄어듦)
+
+import numpy as np
+
+from aligner.dna import encode_bases, kmer_ints, kmer_to_int
+from aligner.packed_sequence import PackedSequence
+
+
+class KmerTable:
+    def __init__(self, keys: np.ndarray, offsets: np.ndarray, positions: np.ndarray, k: int,
+                 masked_keys: np.ndarray = None, masked_counts: np.ndarray = None, stride: int = 1):
+        self.keys = keys            # 정렬된 고유 key (int64)
+        self.offsets = offsets      # key i의 위치는 positions[offsets[i]:offsets[i + 1]]
+        self.positions = positions  # reference 상의 위치
+        self.k = k
+        self.masked_keys = np.zeros(0, dtype=np.int64) if masked_keys is None else masked_keys  # 정렬된 반복 key
+        self.masked_counts = np.zeros(0, dtype=np.int64) if masked_counts is None else masked_counts
+        self.stride = stride        # reference에서 stride 간격 위치의 k-mer만 저장했는지
+
+    # (key, 위치) 쌍으로 CSR 테이블 생성. 같은 key 안에서는 위치 오름차순 (입력이 위치 순이면 그대로 유지)
+    # max_occ가 주어지면 등장 횟수가 그보다 많은 key는 masked_keys / masked_counts로 옮김
+    @classmethod
+    def from_pairs(cls, keys: np.ndarray, positions: np.ndarray, k: int, max_occ: int = None,
+                   stride: int = 1) -> "KmerTable":
+        order = np.argsort(keys, kind="stable")
+        keys = keys[order].astype(np.int64)
+        uniq, starts, counts = np.unique(keys, return_index=True, return_counts=True)
+        del keys
+        masked_keys = np.zeros(0, dtype=np.int64)
+        masked_counts = np.zeros(0, dtype=np.int64)
+        if max_occ is not None:
+            repeat = counts > max_occ
+            masked_keys, masked_counts = uniq[repeat], counts[repeat].astype(np.int64)
+            uniq, starts, counts = uniq[~repeat], starts[~repeat], counts[~repeat]
+
+        total = int(counts.sum())
+        offset_dtype = np.int32 if total <= np.iinfo(np.int32).max else np.int64
+        offsets = np.zeros(len(uniq) + 1, dtype=offset_dtype)
+        np.cumsum(counts, out=offsets[1:])
+        take = order[np.repeat(starts - offsets[:-1], counts) + np.arange(total)]
+        max_pos = int(positions.max()) if len(positions) else 0
+        pos_dtype = np.int32 if max_pos <= np.iinfo(np.int32).max else np.int64
+        return cls(uniq, offsets, positions[take].astype(pos_dtype), k, masked_keys, masked_counts, stride)
+
+    # {k-mer 문자열: [위치, ...]} 딕셔너리를 CSR 형태로 변환
+    @classmethod
+    def from_dict(cls, index: dict, k: int) -> "KmerTable":
+        items = sorted((kmer_to_int(kmer), poses) for kmer, poses in index.items())
+        keys = np.fromiter((key for key, _ in items), dtype=np.int64, count=len(items))
+        counts = np.fromiter((len(poses) for _, poses in items), dtype=np.int64, count=len(items))
+        offsets = np.zeros(len(items) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        max_pos = max((max(poses) for _, poses in items if poses), default=0)
+        pos_dtype = np.int32 if max_pos <= np.iinfo(np.int32).max else np.int64
+        positions = np.fromiter((p for _, poses in items for p in poses), dtype=pos_dtype, count=int(offsets[-1]))
+        return cls(keys, offsets, positions, k)
+
+    # index 파일 저장용 배열 묶음
+    def to_arrays(self, prefix: str) -> dict:
+        return {
+            f"{prefix}.keys": self.keys,
+            f"{prefix}.offsets": self.offsets,
+            f"{prefix}.positions": self.positions,
+            f"{prefix}.masked_keys": self.masked_keys,
+            f"{prefix}.masked_counts": self.masked_counts,
+        }
+
+    # masked section이 없는 예전 index 파일도 로딩 가능
+    @classmethod
+    def from_arrays(cls, arrays: dict, prefix: str, k: int, stride: int = 1) -> "KmerTable":
+        return cls(arrays[f"{prefix}.keys"], arrays[f"{prefix}.offsets"], arrays[f"{prefix}.positions"], k,
+                   arrays.get(f"{prefix}.masked_keys"), arrays.get(f"{prefix}.masked_counts"), stride)
+
+    # 반복 서열로 제외된 key인지
+    def is_masked(self, key) -> bool:
+        if isinstance(key, str):
+            key = kmer_to_int(key)
+        i = int(np.searchsorted(self.masked_keys, key))
+        return i < len(self.masked_keys) and self.masked_keys[i] == key
+
+    def _slot(self, key):
+        if isinstance(key, str):
+            key = kmer_to_int(key)
+        i = int(np.searchsorted(self.keys, key))
+        if i < len(self.keys) and self.keys[i] == key:
+            return i
+        return -1
+
+    # 여러 key를 한 번에 조회: key i의 위치는 positions[lo[i]:hi[i]] (없는 key는 lo == hi)
+    def ranges(self, keys):
+        keys = np.asarray(keys, dtype=np.int64)
+        if len(self.keys) == 0:
+            empty = np.zeros(len(keys), dtype=np.int64)
+            return empty, empty
+        slot = np.minimum(np.searchsorted(self.keys, keys), len(self.keys) - 1)
+        found = self.keys[slot] == keys
+        lo = np.where(found, self.offsets[slot], 0)
+        hi = np.where(found, self.offsets[slot + 1], 0)
+        return lo, hi
+
+    def get(self, key, default=None):
+        i = self._slot(key)
+        if i < 0:
+            return default
+        return self.positions[self.offsets[i]:self.offsets[i + 1]]
+
+    def __contains__(self, key) -> bool:
+        return self._slot(key) >= 0
+
+    def __getitem__(self, key):
+        i = self._slot(key)
+        if i < 0:
+            raise KeyError(key)
+        return self.positions[self.offsets[i]:self.offsets[i + 1]]
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+
+# reference(str 또는 PackedSequence)의 모든 k-mer(stride > 1이면 stride 배수 위치만) 위치 테이블 생성
+# chunk 단위로 2-bit 정수 key를 만들어 Python 객체 없이 배열로만 처리. N을 포함한 k-mer는 제외
+def build_kmer_table(reference, k: int, stride: int = 1, max_occ: int = None,
+                     chunk_size: int = 1 << 22) -> KmerTable:
+    if not 0 < k <= 31:
+        raise ValueError(f"k는 1~31이어야 합니다: {k}")
+    if stride < 1:
+        raise ValueError(f"stride는 1 이상이어야 합니다: {stride}")
+    num_kmers = max(len(reference) - k + 1, 0)
+    chunk_size -= chunk_size % stride  # chunk 경계에서도 stride 배수 위치가 유지되도록
+    all_keys, all_pos = [], []
+    for start in range(0, num_kmers, chunk_size):
+        stop = min(start + chunk_size, num_kmers)
+        if isinstance(reference, PackedSequence):
+            codes = reference.codes(start, stop + k - 1)
+        else:
+            codes = encode_bases(reference[start:stop + k - 1])
+        keys = kmer_ints(codes, k)[::stride]
+        pos = np.arange(start, stop, stride, dtype=np.int64)
+        valid = keys >= 0
+        all_keys.append(keys[valid])
+        all_pos.append(pos[valid])
+    keys = np.concatenate(all_keys) if all_keys else np.zeros(0, dtype=np.int64)
+    pos = np.concatenate(all_pos) if all_pos else np.zeros(0, dtype=np.int64)
+    return KmerTable.from_pairs(keys, pos, k, max_occ=max_occ, stride=stride)
@@ -0,0 +1,118 @@
+# 벡터화된 (k, w)-minimizer 추출 및 CSR minimizer 테이블 생성
+# k-mer는 2-bit 정수로 만든 뒤 가역(invertible) 해시를 적용해 비교하므로 사전순(A가 많은 k-mer) 편향이 없음
+# reference와 read 양쪽 모두 같은 함수로 추출하므로 결과가 정확히 일치함
+# k-mer는 canonical key(정방향 / 역상보 중 작은 값)로 해시하므로 역상보 read도 같은 minimizer를 가짐.
+# 테이블 위치는 (reference 위치 << 1) | 방향 으로 저장해 index 크기를 늘리지 않고 양쪽 가닥을 찾음
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from aligner.dna import canonical_kmer_ints, encode_bases
+from aligner.kmer_table import KmerTable
+from aligner.packed_sequence import PackedSequence
+
+INVALID_HASH = np.uint64(np.iinfo(np.uint64).max)  # N을 포함한 k-mer (minimizer로 선택되지 않음)
+
+
+# 2k 비트 정수에 대한 가역 해시 (minimap2의 hash64), 결과도 2k 비트 안에 있음
+def hash64(keys: np.ndarray, k: int) -> np.ndarray:
+    mask = np.uint64((1 << (2 * k)) - 1)
+    key = keys.astype(np.uint64)
+    with np.errstate(over="ignore"):
+        key = (~key + (key << np.uint64(21))) & mask
+        key = key ^ (key >> np.uint64(24))
+        key = (key + (key << np.uint64(3)) + (key << np.uint64(8))) & mask
+        key = key ^ (key >> np.uint64(14))
+        key = (key + (key << np.uint64(2)) + (key << np.uint64(4))) & mask
+        key = key ^ (key >> np.uint64(28))
+        key = (key + (key << np.uint64(31))) & mask
+    return key
+
+
+# 염기 코드 배열의 모든 k-mer의 canonical 해시와 방향 (N 포함 / 자기 역상보 k-mer는 INVALID_HASH)
+def kmer_hashes(codes: np.ndarray, k: int):
+    keys, strand = canonical_kmer_ints(codes, k)
+    hashes = hash64(np.maximum(keys, 0), k)
+    hashes[keys < 0] = INVALID_HASH
+    return hashes, strand
+
+
+# 각 window(연속된 w개의 k-mer)의 최솟값 위치. 동률이면 가장 왼쪽 (sliding window argmin)
+def window_min_positions(hashes: np.ndarray, w: int) -> np.ndarray:
+    if len(hashes) < w:
+        return np.zeros(0, dtype=np.int64)
+    windows = sliding_window_view(hashes, w)
+    return np.arange(len(windows), dtype=np.int64) + np.argmin(windows, axis=1)
+
+
+# 염기 코드 배열에서 minimizer (해시, 위치, 방향) 추출. 연속된 window가 같은 위치를 고르면 한 번만 기록
+def extract_minimizers(codes: np.ndarray, k: int, w: int, offset: int = 0):
+    hashes, strand = kmer_hashes(codes, k)
+    pos = window_min_positions(hashes, w)
+    if len(pos):
+        keep = np.ones(len(pos), dtype=bool)
+        keep[1:] = pos[1:] != pos[:-1]
+        pos = pos[keep]
+        pos = pos[hashes[pos] != INVALID_HASH]
+    return hashes[pos], pos + offset, strand[pos]
+
+
+# read 문자열의 minimizer (해시, read 내 위치, 방향)
+def read_minimizers(read, k: int, w: int):
+    codes = encode_bases(read) if isinstance(read, (str, bytes)) else np.asarray(read)
+    return extract_minimizers(codes, k, w)
+
+
+# reference(str 또는 PackedSequence) 구간을 염기 코드로 변환
+def _reference_codes(reference, start: int, stop: int) -> np.ndarray:
+    if isinstance(reference, PackedSequence):
+        return reference.codes(start, stop)
+    return encode_bases(reference[start:stop])
+
+
+# reference 전체의 minimizer 테이블 생성 (chunk 단위 처리로 중간 배열 크기를 제한)
+# 등장 횟수가 max_occ를 넘는 minimizer는 제외 (masked_keys / masked_counts에 기록)
+def build_minimizer_table(reference, k: int = 20, w: int = 8, max_occ: int = 500,
+                          chunk_size: int = 1 << 22) -> KmerTable:
+    num_windows = len(reference) - k - w + 2
+    all_hashes, all_pos, all_strand = [], [], []
+    last_pos = -1
+    for start in range(0, max(num_windows, 0), chunk_size):
+        stop = min(start + chunk_size, num_windows)
+        codes = _reference_codes(reference, start, stop + w + k - 2)
+        hashes, pos, strand = extract_minimizers(codes, k, w, offset=start)
+        # 이전 chunk의 마지막 window와 같은 위치를 고른 경우 중복 제거
+        if len(pos) and pos[0] == last_pos:
+            hashes, pos, strand = hashes[1:], pos[1:], strand[1:]
+        if len(pos):
+            last_pos = pos[-1]
+        all_hashes.append(hashes)
+        all_pos.append(pos)
+        all_strand.append(strand)
+
+    hashes = np.concatenate(all_hashes) if all_hashes else np.zeros(0, dtype=np.uint64)
+    pos = np.concatenate(all_pos) if all_pos else np.zeros(0, dtype=np.int64)
+    strand = np.concatenate(all_strand) if all_strand else np.zeros(0, dtype=np.uint8)
+    pos = (pos << 1) | strand  # 방향을 위치의 최하위 비트에 저장
+
+    # 해시 기준 정렬 (같은 해시 안에서는 위치 오름차순) 후 CSR 구성
+    return KmerTable.from_pairs(hashes.astype(np.int64), pos, k, max_occ=max_occ)
+
+
+# read minimizer들을 테이블에서 찾아 read 시작 위치 delta별로 투표. (delta, 역방향 여부, 지지하는 minimizer 수) 반환
+# read와 reference의 minimizer 방향이 같으면 정방향 (delta = reference 위치 - read 위치),
+# 다르면 역상보 read가 reference에 놓이는 위치 (delta = reference 위치 - (read_len - read 위치 - k))
+def vote_deltas(table: KmerTable, hashes: np.ndarray, read_pos: np.ndarray, read_strand: np.ndarray, read_len: int):
+    lo, hi = table.ranges(hashes.astype(np.int64))
+    counts = hi - lo
+    total = int(counts.sum())
+    if total == 0:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, np.zeros(0, dtype=bool), empty
+    owner = np.repeat(np.arange(len(hashes)), counts)
+    idx = np.repeat(lo - np.cumsum(counts) + counts, counts) + np.arange(total)
+    entries = table.positions[idx].astype(np.int64)
+    reverse = (entries & 1) ^ read_strand[owner].astype(np.int64)
+    read_offset = np.where(reverse == 1, read_len - read_pos[owner] - table.k, read_pos[owner])
+    keys, votes = np.unique(((entries >> 1) - read_offset) * 2 + reverse, return_counts=True)
+    return keys >> 1, (keys & 1).astype(bool), votes
@@ -0,0 +1,162 @@
+# 2-bit 압축 염기서열 (PackedSequence)과 벡터화된 mismatch(Hamming distance) 계산
+# 1바이트에 염기 4개를 저장하므로 파이썬 str(1바이트/염기) 대비 메모리가 약 1/4
+# 2-bit에 담을 수 없는 N 등은 A로 압축하고, 그 위치는 [시작, 끝) 구간 목록(n_runs)으로 따로 기억해
+# codes / 문자열 복원에서는 N(UNKNOWN_CODE)으로, windows(mismatch 비교)에서는 OUT_OF_RANGE로 되돌림
+
+import numpy as np
+
+from aligner.dna import UNKNOWN_CODE, decode_bases, encode_bases, pack_2bit
+
+OUT_OF_RANGE = 255  # reference 범위를 벗어난 위치의 코드 (항상 mismatch로 계산)
+
+
+_NO_RUNS = np.zeros((0, 2), dtype=np.int64)
+
+
+# 염기 코드 배열에서 A/C/G/T가 아닌 위치의 [시작, 끝) 구간 목록 ((구간 수, 2) int64, offset만큼 이동)
+def unknown_runs(codes: np.ndarray, offset: int = 0) -> np.ndarray:
+    unknown = np.concatenate(([False], np.asarray(codes) >= UNKNOWN_CODE, [False]))
+    edges = np.flatnonzero(unknown[1:] != unknown[:-1]).astype(np.int64)
+    return edges.reshape(-1, 2) + offset
+
+
+class PackedSequence:
+    # packed: 2-bit 압축 배열 (다른 PackedSequence / memmap과 공유 가능), start/length: 이 view가 가리키는 구간
+    # n_runs: packed 기준 N 구간 목록 (unknown_runs 형식, 없으면 N 없음). view도 같은 목록을 공유
+    def __init__(self, packed: np.ndarray, length: int, start: int = 0, n_runs: np.ndarray = None):
+        self.packed = packed
+        self.start = start
+        self.length = length
+        self.n_runs = _NO_RUNS if n_runs is None else n_runs
+
+    @classmethod
+    def from_codes(cls, codes: np.ndarray) -> "PackedSequence":
+        return cls(pack_2bit(codes), len(codes), n_runs=unknown_runs(codes))
+
+    @classmethod
+    def from_string(cls, seq) -> "PackedSequence":
+        return cls.from_codes(encode_bases(seq))
+
+    # 텍스트 파일을 chunk 단위로 읽어 압축 (파일 전체를 str로 올리지 않음, 공백/줄바꿈 무시)
+    @classmethod
+    def from_file(cls, filename: str, chunk_size: int = 1 << 22) -> "PackedSequence":
+        parts = []
+        runs = []
+        leftover = np.zeros(0, dtype=np.uint8)
+        length = 0
+        with open(filename, "rb") as f:
+            for block in iter(lambda: f.read(chunk_size), b""):
+                codes = encode_bases(b"".join(block.split()))
+                runs.append(unknown_runs(codes, length))
+                length += len(codes)
+                codes = np.concatenate((leftover, codes))
+                cut = len(codes) // 4 * 4
+                parts.append(pack_2bit(codes[:cut]))
+                leftover = codes[cut:]
+        if len(leftover):
+            parts.append(pack_2bit(leftover))
+        packed = np.concatenate(parts) if parts else np.zeros(0, dtype=np.uint8)
+        return cls(packed, length, n_runs=_merge_runs(runs))
+
+    # index 파일(aligner.index_store)에 저장된 reference section을 복사 없이 사용
+    @classmethod
+    def from_index(cls, index) -> "PackedSequence":
+        return cls(index["reference.packed"], int(index["reference.length"][0]), n_runs=index["reference.n_runs"])
+
+    def __len__(self) -> int:
+        return self.length
+
+    @property
+    def nbytes(self) -> int:
+        return (self.length + 3) // 4
+
+    # 정수 인덱스는 염기 문자, 슬라이스는 같은 버퍼를 공유하는 PackedSequence view 반환 (복사 없음)
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(self.length)
+            if step != 1:
+                raise ValueError("PackedSequence는 step이 1인 슬라이스만 지원합니다")
+            return PackedSequence(self.packed, max(0, stop - start), self.start + start, self.n_runs)
+        if key < 0:
+            key += self.length
+        if not 0 <= key < self.length:
+            raise IndexError(key)
+        return decode_bases(self.codes(key, key + 1))
+
+    # [start, stop) 구간의 염기 코드 배열 (0~3, N 구간은 UNKNOWN_CODE)
+    def codes(self, start: int = 0, stop: int = None) -> np.ndarray:
+        stop = self.length if stop is None else min(stop, self.length)
+        if start >= stop:
+            return np.zeros(0, dtype=np.uint8)
+        lo, hi = self.start + start, self.start + stop
+        idx = np.arange(lo, hi, dtype=np.int64)
+        out = (self.packed[idx >> 2] >> ((idx & 3) << 1).astype(np.uint8)) & 3
+        if len(self.n_runs):
+            first = int(np.searchsorted(self.n_runs[:, 1], lo, side="right"))
+            last = int(np.searchsorted(self.n_runs[:, 0], hi, side="left"))
+            for run_start, run_end in self.n_runs[first:last].tolist():
+                out[max(run_start, lo) - lo:min(run_end, hi) - lo] = UNKNOWN_CODE
+        return out
+
+    def __str__(self) -> str:
+        return decode_bases(self.codes())
+
+    # 여러 시작 위치의 window를 한 번에 (len(starts), width) 코드 행렬로 복원
+    # 범위를 벗어난 위치와 N 위치는 OUT_OF_RANGE (read의 어떤 염기와도 mismatch)
+    def windows(self, starts, width: int) -> np.ndarray:
+        starts = np.asarray(starts, dtype=np.int64).reshape(-1)
+        return self.at(starts[:, None] + np.arange(width, dtype=np.int64)[None, :])
+
+    # 임의 모양의 위치 배열에서 염기 코드를 한 번에 가져옴 (범위 밖 / N은 windows와 같이 OUT_OF_RANGE)
+    def at(self, pos: np.ndarray) -> np.ndarray:
+        pos = np.asarray(pos, dtype=np.int64)
+        valid = (pos >= 0) & (pos < self.length)
+        idx = np.where(valid, pos, 0) + self.start
+        out = (self.packed[idx >> 2] >> ((idx & 3) << 1).astype(np.uint8)) & 3
+        if len(self.n_runs):
+            run = np.maximum(np.searchsorted(self.n_runs[:, 0], idx, side="right") - 1, 0)
+            valid &= ~((idx >= self.n_runs[run, 0]) & (idx < self.n_runs[run, 1]))
+        out[~valid] = OUT_OF_RANGE
+        return out
+
+    # read 하나를 여러 후보 시작 위치와 한 번에 비교해 위치별 mismatch 개수 반환
+    def hamming(self, read, starts) -> np.ndarray:
+        read_codes = encode_bases(read) if isinstance(read, (str, bytes)) else np.asarray(read)
+        return hamming_distances(read_codes, self.windows(starts, len(read_codes)))
+
+
+# reference(str 또는 PackedSequence)의 starts 위치마다 read와의 mismatch 개수 (str reference는 후보 구간만 변환)
+def window_mismatches(reference, read, starts) -> np.ndarray:
+    if isinstance(reference, PackedSequence):
+        return reference.hamming(read, starts)
+    read_codes = encode_bases(read) if isinstance(read, (str, bytes)) else np.asarray(read)
+    width = len(read_codes)
+    windows = np.full((len(starts), width), OUT_OF_RANGE, dtype=np.uint8)
+    for row, start in enumerate(np.asarray(starts, dtype=np.int64).tolist()):
+        codes = encode_bases(reference[start:start + width])
+        windows[row, :len(codes)] = np.where(codes < UNKNOWN_CODE, codes, OUT_OF_RANGE)
+    return hamming_distances(read_codes, windows)
+
+
+# chunk별 N 구간 목록을 하나로 합침 (chunk 경계에서 이어지는 구간은 하나로)
+def _merge_runs(runs: list) -> np.ndarray:
+    runs = np.concatenate(runs) if runs else _NO_RUNS
+    if len(runs) < 2:
+        return runs
+    joined = runs[1:, 0] == runs[:-1, 1]
+    starts = runs[np.concatenate(([True], ~joined)), 0]
+    ends = runs[np.concatenate((~joined, [True])), 1]
+    return np.stack((starts, ends), axis=1)
+
+
+# read 코드 배열과 window 코드 행렬의 행별 mismatch 개수 (read의 N은 항상 mismatch)
+def hamming_distances(read_codes: np.ndarray, windows: np.ndarray) -> np.ndarray:
+    return np.count_nonzero(windows != read_codes[None, :], axis=1)
+
+
+# 길이가 같은 두 서열(str 또는 코드 배열)의 mismatch 개수. 길이가 다르면 짧은 쪽 기준
+def count_mismatches(seq1, seq2) -> int:
+    a = encode_bases(seq1) if isinstance(seq1, (str, bytes)) else np.asarray(seq1)
+    b = encode_bases(seq2) if isinstance(seq2, (str, bytes)) else np.asarray(seq2)
+    n = min(len(a), len(b))
+    return int(np.count_nonzero(a[:n] != b[:n]))
@@ -0,0 +1,103 @@
+# 프로세스 풀 기반 병렬 read 매핑
+# index / reference(state)는 pickle하지 않고 fork 시점에 worker로 상속시킴
+# (pool마다 initializer로 자기 state를 설정하므로 여러 thread가 동시에 pool을 만들어도 state가 섞이지 않음)
+# (index_store로 로딩한 memmap 배열은 모든 worker가 같은 page cache를 공유)
+# 결과는 입력 read 순서대로 반환되므로 단일 프로세스 실행과 결과가 동일함
+# 계측(aligner.instrument)이 켜져 있으면 worker의 chunk별 계측 결과를 부모 프로세스에 합침
+
+import collections
+import itertools
+import threading
+
+from aligner import instrument
+
+_shared_state = None  # worker 프로세스에서 map_fn에 넘겨줄 state (_init_worker가 설정)
+_fork_lock = threading.Lock()  # pool 생성(fork)을 thread 사이에서 한 번에 하나씩
+
+
+# multiprocessing은 병렬 실행이 필요할 때 처음 import (workers=1 실행 / CLI 시작 비용을 줄임)
+def fork_available() -> bool:
+    import multiprocessing as mp
+    return "fork" in mp.get_all_start_methods()
+
+
+# reads를 chunk_size개씩 묶음 (list가 아닌 iterable도 가능)
+def iter_chunks(reads, chunk_size: int):
+    it = iter(reads)
+    while True:
+        chunk = list(itertools.islice(it, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+# fork된 worker에서 한 번 실행: 이 pool의 state 설정 (fork 방식이라 initargs는 pickle되지 않고 그대로 상속됨)
+def _init_worker(state):
+    global _shared_state
+    _shared_state = state
+
+
+def _map_chunk(args):
+    map_fn, chunk = args
+    return [map_fn(_shared_state, read) for read in chunk]
+
+
+def _map_batch(args):
+    map_batch_fn, chunk = args
+    return map_batch_fn(_shared_state, chunk)
+
+
+# worker에서 chunk 하나를 처리하고 (결과, 이 chunk의 계측 snapshot) 반환
+def _instrumented(args):
+    worker_fn, task = args
+    instrument.reset()
+    results = worker_fn(task)
+    return results, instrument.snapshot()
+
+
+def _collect(async_result, traced: bool):
+    results = async_result.get()
+    if traced:
+        results, stats = results
+        instrument.merge(stats)
+    return results
+
+
+def _run_chunks(worker_fn, map_fn, state, reads, workers, chunk_size):
+    import multiprocessing as mp
+    traced = instrument.enabled()
+    with _fork_lock:
+        pool = mp.get_context("fork").Pool(workers, initializer=_init_worker, initargs=(state,))
+    with pool:
+        pending = collections.deque()
+        for chunk in iter_chunks(reads, chunk_size):
+            if traced:
+                task = pool.apply_async(_instrumented, ((worker_fn, (map_fn, chunk)),))
+            else:
+                task = pool.apply_async(worker_fn, ((map_fn, chunk),))
+            pending.append(task)
+            if len(pending) >= workers * 2:
+                yield from _collect(pending.popleft(), traced)
+        while pending:
+            yield from _collect(pending.popleft(), traced)
+
+
+# reads의 각 read에 map_fn(state, read)를 적용한 결과를 입력 순서대로 yield
+# 동시에 처리 중인 chunk는 workers * 2개로 제한 (read를 한꺼번에 메모리에 올리지 않음)
+# workers <= 1 이거나 fork를 쓸 수 없는 환경이면 현재 프로세스에서 순차 실행
+def map_reads_parallel(map_fn, state, reads, workers: int = 1, chunk_size: int = 256):
+    if workers <= 1 or not fork_available():
+        for read in reads:
+            yield map_fn(state, read)
+        return
+    yield from _run_chunks(_map_chunk, map_fn, state, reads, workers, chunk_size)
+
+
+# map_reads_parallel과 같지만 map_batch_fn(state, reads_chunk)가 chunk 단위로 결과 list를 반환
+# (여러 read를 묶어 벡터화하는 매퍼용. 순차 실행일 때도 chunk_size개씩 묶어서 호출)
+def map_batches_parallel(map_batch_fn, state, reads, workers: int = 1, chunk_size: int = 1024):
+    if workers <= 1 or not fork_available():
+        for chunk in iter_chunks(reads, chunk_size):
+            yield from map_batch_fn(state, chunk)
+        return
+    yield from _run_chunks(_map_batch, map_batch_fn, state, reads, workers, chunk_size)
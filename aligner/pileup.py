@@ -0,0 +1,135 @@
+# 정렬된 read로 reference를 복원하는 pileup (위치별 A/C/G/T 가중 count, uint16)
+# - read를 add()로 모았다가 batch_size개마다 한 번에 scatter-add (같은 칸은 np.unique + bincount로 합산)
+# - count 배열은 read가 덮은 BLOCK_SIZE 구간만 할당 (100M reference에 100K read면 대부분 비어 있음)
+# - consensus: 가중 count 최댓값 염기. 동률이면 reference 염기 우선, read가 없는 위치는 reference 염기
+#   (reference의 N은 read가 덮지 않으면 N으로 남음)
+# - damage_weight: read 양 끝 DAMAGE_END 염기의 C->T / G->A 불일치(고대 DNA 손상 의심)에 주는 가중치
+#   (일반 관측은 FULL_WEIGHT. damage_weight=None이면 모든 관측이 같은 가중치인 단순 다수결)
+# 결과는 write_consensus로 block 단위로 바로 파일에 기록 (str / list 전체를 만들지 않음)
+
+import numpy as np
+
+from aligner.dna import UNKNOWN_CODE, encode_bases, decode_bases
+from aligner.packed_sequence import PackedSequence
+
+BLOCK_BITS = 16
+BLOCK_SIZE = 1 << BLOCK_BITS
+FULL_WEIGHT = 4
+DAMAGE_WEIGHT = 1
+DAMAGE_END = 5
+COUNT_MAX = np.iinfo(np.uint16).max
+
+
+class Pileup:
+    # reference: 복원의 바탕이 되는 PackedSequence (또는 str)
+    def __init__(self, reference, damage_weight: int = DAMAGE_WEIGHT, batch_size: int = 4096):
+        self.reference = reference if isinstance(reference, PackedSequence) else PackedSequence.from_string(reference)
+        self.length = len(self.reference)
+        self.damage_weight = damage_weight
+        self.batch_size = batch_size
+        self.blocks = {}  # block 번호 -> (BLOCK_SIZE, 4) uint16 count
+        self._pending = []
+        self.reads_added = 0
+
+    def __len__(self) -> int:
+        return self.length
+
+    # 정렬된 read 하나 추가 (pos < 0 이면 무시). 실제 반영은 batch_size개가 모였을 때 / flush()
+    def add(self, pos: int, read: str) -> None:
+        if pos < 0:
+            return
+        self._pending.append((pos, read))
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    # 모아 둔 read를 read 길이별로 묶어 한 번에 반영
+    def flush(self) -> None:
+        pending, self._pending = self._pending, []
+        by_length = {}
+        for pos, read in pending:
+            by_length.setdefault(len(read), []).append((pos, read))
+        for read_len, group in by_length.items():
+            positions = np.array([pos for pos, _ in group], dtype=np.int64)
+            codes = encode_bases("".join(read for _, read in group)).reshape(len(group), read_len)
+            self.add_batch(positions, codes)
+
+    # 같은 길이 read의 코드 행렬 (m, L)을 시작 위치 positions에 scatter-add
+    def add_batch(self, positions: np.ndarray, codes: np.ndarray) -> None:
+        m, read_len = codes.shape
+        if m == 0 or read_len == 0:
+            return
+        self.reads_added += m
+        genome_pos = positions[:, None] + np.arange(read_len, dtype=np.int64)[None, :]
+        valid = (codes < UNKNOWN_CODE) & (genome_pos >= 0) & (genome_pos < self.length)
+        weights = np.full(codes.shape, FULL_WEIGHT, dtype=np.int64)
+        if self.damage_weight is not None and self.damage_weight != FULL_WEIGHT:
+            ends = np.zeros(read_len, dtype=bool)
+            ends[:DAMAGE_END] = True
+            ends[max(0, read_len - DAMAGE_END):] = True
+            ref_codes = self.reference.windows(positions, read_len)
+            damaged = ((codes == 3) & (ref_codes == 1)) | ((codes == 0) & (ref_codes == 2))  # C->T, G->A
+            weights[damaged & ends[None, :]] = self.damage_weight
+        else:
+            weights[:] = 1
+
+        # 같은 (위치, 염기) 칸의 가중치를 먼저 합친 뒤 block별로 더함 (uint16 최댓값에서 멈춤)
+        cells, inverse = np.unique(genome_pos[valid] * 4 + codes[valid], return_inverse=True)
+        sums = np.bincount(inverse, weights=weights[valid]).astype(np.int64)
+        block_ids = cells >> (BLOCK_BITS + 2)
+        bounds = np.flatnonzero(np.diff(block_ids)) + 1
+        for block_cells, block_sums in zip(np.split(cells, bounds), np.split(sums, bounds)):
+            block_id = int(block_cells[0]) >> (BLOCK_BITS + 2)
+            block = self.blocks.get(block_id)
+            if block is None:
+                block = self.blocks[block_id] = np.zeros((BLOCK_SIZE, 4), dtype=np.uint16)
+            view = block.reshape(-1)
+            local = block_cells & (BLOCK_SIZE * 4 - 1)
+            view[local] = np.minimum(view[local] + block_sums, COUNT_MAX)
+
+    # [start, stop) 구간의 consensus 염기 코드
+    def consensus(self, start: int = 0, stop: int = None) -> np.ndarray:
+        self.flush()
+        stop = self.length if stop is None else min(stop, self.length)
+        if start >= stop:
+            return np.zeros(0, dtype=np.uint8)
+        out = self.reference.codes(start, stop)
+        for block_id in range(start >> BLOCK_BITS, ((stop - 1) >> BLOCK_BITS) + 1):
+            block = self.blocks.get(block_id)
+            if block is None:
+                continue
+            block_start = block_id << BLOCK_BITS
+            lo, hi = max(start, block_start), min(stop, block_start + BLOCK_SIZE)
+            counts = block[lo - block_start:hi - block_start]
+            ref = out[lo - start:hi - start]
+            best = counts.max(axis=1)
+            covered = best > 0
+            # 동률이면 reference 염기를 유지, reference 염기가 최댓값이 아니면(N 포함) 가장 작은 코드의 최댓값 염기
+            keep_ref = (ref < UNKNOWN_CODE) & (counts[np.arange(len(ref)), np.minimum(ref, 3)] == best)
+            change = covered & ~keep_ref
+            ref[change] = counts[change].argmax(axis=1)
+        return out
+
+    def __str__(self) -> str:
+        return decode_bases(self.consensus())
+
+    # 읽은 read가 하나라도 덮은 위치 수
+    def covered_bases(self) -> int:
+        self.flush()
+        return sum(int(np.count_nonzero(block.any(axis=1))) for block in self.blocks.values())
+
+    # consensus를 chunk_size 단위로 파일에 기록 (줄바꿈 없이 한 줄)
+    def write_consensus(self, filename: str, chunk_size: int = 1 << 22) -> None:
+        with open(filename, "w") as f:
+            for start in range(0, self.length, chunk_size):
+                f.write(decode_bases(self.consensus(start, start + chunk_size)))
+
+    # consensus와 other(PackedSequence / str / 코드 배열)가 다른 위치 수 (chunk 단위로 비교)
+    def count_differences(self, other, chunk_size: int = 1 << 22) -> int:
+        if isinstance(other, str):
+            other = PackedSequence.from_string(other)
+        total = 0
+        for start in range(0, self.length, chunk_size):
+            stop = min(start + chunk_size, self.length)
+            expected = other.codes(start, stop) if isinstance(other, PackedSequence) else np.asarray(other[start:stop])
+            total += int(np.count_nonzero(self.consensus(start, stop) != expected))
+        return total
@@ -0,0 +1,103 @@
+# read 파일 스트리밍 입출력
+# 지원 형식: 한 줄에 read 하나(plain), FASTA, FASTQ (각각 .gz 압축 가능). 형식은 첫 글자로 자동 판별
+# 파일 전체를 list로 올리지 않고 generator로 읽으므로 read 수와 무관하게 메모리 사용량이 일정함
+
+import gzip
+import itertools
+
+PLAIN, FASTA, FASTQ = "plain", "fasta", "fastq"
+
+
+# gzip 여부를 magic byte로 판별해 텍스트 모드로 열기
+def open_text(filename: str, mode: str = "r"):
+    if "r" in mode:
+        with open(filename, "rb") as f:
+            is_gzip = f.read(2) == b"\x1f\x8b"
+    else:
+        is_gzip = filename.endswith(".gz")
+    if is_gzip:
+        return gzip.open(filename, mode + "t")
+    return open(filename, mode)
+
+
+def _record_name(header: str) -> str:
+    parts = header[1:].split()
+    return parts[0] if parts else ""
+
+
+def _detect_format(first_line: str) -> str:
+    if first_line.startswith(">"):
+        return FASTA
+    if first_line.startswith("@"):
+        return FASTQ
+    return PLAIN
+
+
+# (이름, 서열)을 하나씩 yield. plain 형식은 이름이 read_{번호}
+def iter_records(filename: str):
+    with open_text(filename) as f:
+        lines = (line.strip() for line in f)
+        lines = itertools.dropwhile(lambda line: not line, lines)
+        first = next(lines, None)
+        if first is None:
+            return
+        lines = itertools.chain([first], lines)
+        fmt = _detect_format(first)
+
+        if fmt == PLAIN:
+            for i, line in enumerate(line for line in lines if line):
+                yield f"read_{i}", line
+        elif fmt == FASTA:
+            name, parts = None, []
+            for line in lines:
+                if line.startswith(">"):
+                    if name is not None:
+                        yield name, "".join(parts)
+                    name, parts = _record_name(line), []
+                elif line:
+                    parts.append(line)
+            if name is not None:
+                yield name, "".join(parts)
+        else:
+            for header in lines:
+                if not header:
+                    continue
+                seq = next(lines, "")
+                next(lines, None)  # '+' 줄
+                next(lines, None)  # quality 줄
+                yield _record_name(header), seq
+
+
+# 서열만 하나씩 yield
+def iter_reads(filename: str):
+    for _, seq in iter_records(filename):
+        yield seq
+
+
+# 정답 위치 파일(한 줄에 정수 하나)을 하나씩 yield
+def iter_positions(filename: str):
+    with open_text(filename) as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield int(line)
+
+
+# 결과를 한 줄씩 바로 파일에 기록 (filename이 None이면 아무것도 하지 않음)
+class LineWriter:
+    def __init__(self, filename: str = None):
+        self.f = open_text(filename, "w") if filename else None
+
+    def write(self, value) -> None:
+        if self.f is not None:
+            self.f.write(f"{value}\n")
+
+    def close(self) -> None:
+        if self.f is not None:
+            self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
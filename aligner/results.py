@@ -0,0 +1,216 @@
+# read 매핑 결과 저장소 (numpy structured array, read당 24바이트)
+# 필드: read_id, pos(0-based, 실패 -1), score, mismatches, mapq(0~60), flags(SAM flag)
+# - append로 추가, 용량은 두 배씩 늘림
+# - save / load: index 파일과 같은 section 포맷(aligner.index_store)으로 필드별 열을 저장
+# - write_sam / write_paf: read 파일을 다시 스트리밍하며 SAM / PAF 텍스트로 내보냄
+# - gapped 정렬(SW)의 CIGAR는 "<길이>M"이 아닌 read만 열 배열(행 번호 / 시작 위치 / 끝 offset / uint8 문자열)로 보관
+#   (없으면 pos에서 시작하는 mismatch 기반 "<길이>M" 정렬로 봄)
+# - evaluate: 정답 위치와 비교한 (맞힌 read 수, 전체 read 수)
+
+import re
+
+import numpy as np
+
+from aligner.dna import reverse_complement
+from aligner.index_store import load_index, save_index
+from aligner.read_io import LineWriter
+
+RESULT_DTYPE = np.dtype([
+    ("read_id", np.int64),
+    ("pos", np.int64),
+    ("score", np.int32),
+    ("mismatches", np.int16),
+    ("mapq", np.uint8),
+    ("flags", np.uint16),
+])
+
+# SAM flag
+FLAG_REVERSE = 0x10
+FLAG_UNMAPPED = 0x4
+FLAG_SECONDARY = 0x100
+
+MAPQ_MAX = 60
+
+_CIGAR_OP = re.compile(r"(\d+)([MIDNSHP=X])")
+_UNGAPPED = re.compile(r"\d+M")
+_CIGAR_COLUMNS = ("cigar_rows", "cigar_pos", "cigar_ends")
+
+
+# array를 need 이상 길이로 두 배씩 늘린 복사본 (앞 size개 유지). 충분하면 그대로
+def _grow(array: np.ndarray, size: int, need: int) -> np.ndarray:
+    if need <= len(array):
+        return array
+    grown = np.zeros(max(need, len(array) * 2), dtype=array.dtype)
+    grown[:size] = array[:size]
+    return grown
+
+
+# CIGAR 문자열을 (길이, 연산) 목록으로
+def parse_cigar(cigar: str) -> list:
+    return [(int(length), op) for length, op in _CIGAR_OP.findall(cigar)]
+
+
+# 최적 위치 개수와 mismatch 수로 MAPQ 비슷한 신뢰도 추정 (실패했거나 동률 위치가 여러 개면 0)
+def estimate_mapq(pos: int, mismatches: int, num_best: int = 1) -> int:
+    if pos < 0 or num_best != 1:
+        return 0
+    return max(0, MAPQ_MAX - 10 * max(0, mismatches))
+
+
+class AlignmentResults:
+    def __init__(self, capacity: int = 1024):
+        self._data = np.zeros(max(1, capacity), dtype=RESULT_DTYPE)
+        self._size = 0
+        # gapped CIGAR 열: 행 번호(오름차순), 정렬 시작 위치, cigar_text 안의 끝 offset
+        self._cigar = {name: np.zeros(16, dtype=np.int64) for name in _CIGAR_COLUMNS}
+        self._cigar_text = np.zeros(256, dtype=np.uint8)
+        self._cigar_count = 0
+
+    @classmethod
+    def from_array(cls, array: np.ndarray) -> "AlignmentResults":
+        results = cls(0)
+        results._data = array
+        results._size = len(array)
+        return results
+
+    def __len__(self) -> int:
+        return self._size
+
+    # 채워진 부분의 structured array (복사 없음)
+    @property
+    def array(self) -> np.ndarray:
+        return self._data[:self._size]
+
+    # 필드 이름이면 열 배열, 정수 / 슬라이스면 레코드
+    def __getitem__(self, key):
+        return self.array[key]
+
+    # cigar: gapped 정렬의 CIGAR, cigar_pos: 그 정렬이 reference에서 시작하는 위치 (None이면 pos)
+    # pos에서 시작하는 "<길이>M"은 기본 정렬과 같으므로 저장하지 않음
+    def append(self, read_id: int, pos: int, score: int = 0, mismatches: int = 0, mapq: int = 0,
+               flags: int = 0, cigar: str = None, cigar_pos: int = None) -> None:
+        self._data = _grow(self._data, self._size, self._size + 1)
+        cigar_pos = pos if cigar_pos is None else cigar_pos
+        if pos < 0:
+            flags |= FLAG_UNMAPPED
+        elif cigar and not (cigar_pos == pos and _UNGAPPED.fullmatch(cigar)):
+            self._append_cigar(self._size, cigar_pos, cigar.encode("ascii"))
+        self._data[self._size] = (read_id, pos, score, mismatches, mapq, flags)
+        self._size += 1
+
+    def _append_cigar(self, row: int, cigar_pos: int, text: bytes) -> None:
+        count = self._cigar_count
+        start = int(self._cigar["cigar_ends"][count - 1]) if count else 0
+        for name in _CIGAR_COLUMNS:
+            self._cigar[name] = _grow(self._cigar[name], count, count + 1)
+        self._cigar_text = _grow(self._cigar_text, start, start + len(text))
+        self._cigar_text[start:start + len(text)] = np.frombuffer(text, dtype=np.uint8)
+        self._cigar["cigar_rows"][count] = row
+        self._cigar["cigar_pos"][count] = cigar_pos
+        self._cigar["cigar_ends"][count] = start + len(text)
+        self._cigar_count += 1
+
+    # row번째 결과의 (정렬 시작 위치, CIGAR). 저장된 CIGAR가 없으면 (pos, "<read 길이>M")
+    def alignment(self, row: int, read_length: int) -> tuple:
+        rows = self._cigar["cigar_rows"][:self._cigar_count]
+        i = int(np.searchsorted(rows, row))
+        if i == len(rows) or rows[i] != row:
+            return int(self._data["pos"][row]), f"{read_length}M"
+        start = int(self._cigar["cigar_ends"][i - 1]) if i else 0
+        text = self._cigar_text[start:int(self._cigar["cigar_ends"][i])].tobytes().decode("ascii")
+        return int(self._cigar["cigar_pos"][i]), text
+
+    # 정답 위치(list / generator)와 비교해 (맞힌 read 수, 비교한 read 수)
+    def evaluate(self, truth_positions) -> tuple:
+        truth = np.fromiter(truth_positions, dtype=np.int64, count=-1)
+        n = min(len(truth), self._size)
+        correct = int(np.count_nonzero(self.array["pos"][:n] == truth[:n]))
+        return correct, n
+
+    # 열 단위 바이너리 파일로 저장
+    def save(self, path: str, params: dict = None) -> None:
+        arrays = {name: self.array[name] for name in RESULT_DTYPE.names}
+        count = self._cigar_count
+        arrays.update((name, self._cigar[name][:count]) for name in _CIGAR_COLUMNS)
+        arrays["cigar_text"] = self._cigar_text[:int(self._cigar["cigar_ends"][count - 1]) if count else 0]
+        save_index(path, "results", params or {}, "", arrays)
+
+    @classmethod
+    def load(cls, path: str) -> "AlignmentResults":
+        idx = load_index(path)
+        if idx.kind != "results":
+            raise ValueError(f"결과 파일이 아닙니다: {path} ({idx.kind})")
+        columns = [idx[name] for name in RESULT_DTYPE.names]
+        array = np.zeros(len(columns[0]), dtype=RESULT_DTYPE)
+        for name, column in zip(RESULT_DTYPE.names, columns):
+            array[name] = column
+        results = cls.from_array(array)
+        if "cigar_rows" in idx:
+            results._cigar = {name: np.array(idx[name]) for name in _CIGAR_COLUMNS}
+            results._cigar_text = np.array(idx["cigar_text"])
+            results._cigar_count = len(results._cigar["cigar_rows"])
+        return results
+
+    # SAM 텍스트로 내보내기. reads: (이름, 서열) 또는 서열을 결과와 같은 순서로 주는 iterable
+    # CIGAR / POS는 read별로 저장된 정렬을 쓰고, 없으면 mismatch 기반 정렬(indel 없음)의 "<길이>M"
+    # FLAG_REVERSE인 read는 SAM 규칙대로 SEQ를 역상보(reference 방향)로 기록
+    def write_sam(self, filename: str, reads, reference_name: str, reference_length: int) -> None:
+        with LineWriter(filename) as out:
+            out.write("@HD\tVN:1.6\tSO:unsorted")
+            out.write(f"@SQ\tSN:{reference_name}\tLN:{reference_length}")
+            for row, (record, read) in enumerate(zip(self.array.tolist(), reads)):
+                read_id, pos, score, mismatches, mapq, flags = record
+                name, seq = read if isinstance(read, tuple) else (f"read_{read_id}", read)
+                if pos < 0:
+                    out.write(f"{name}\t{flags | FLAG_UNMAPPED}\t*\t0\t0\t*\t*\t0\t0\t{seq}\t*")
+                    continue
+                if flags & FLAG_REVERSE:
+                    seq = reverse_complement(seq)
+                start, cigar = self.alignment(row, len(seq))
+                out.write(f"{name}\t{flags}\t{reference_name}\t{start + 1}\t{mapq}\t{cigar}\t*\t0\t0\t{seq}\t*"
+                          f"\tNM:i:{mismatches}\tAS:i:{score}")
+
+    # PAF 텍스트로 내보내기 (매핑된 read만). reads는 write_sam과 같음
+    # read / reference 구간, 일치 염기 수, 정렬 길이는 write_sam과 같은 정렬(CIGAR)에서 계산
+    # (역방향 read의 CIGAR는 역상보 read 기준이므로 read 구간은 원래 read 좌표로 뒤집음)
+    def write_paf(self, filename: str, reads, reference_name: str, reference_length: int) -> None:
+        with LineWriter(filename) as out:
+            for row, (record, read) in enumerate(zip(self.array.tolist(), reads)):
+                read_id, pos, score, mismatches, mapq, flags = record
+                if pos < 0:
+                    continue
+                name, seq = read if isinstance(read, tuple) else (f"read_{read_id}", read)
+                length = len(seq)
+                start, cigar = self.alignment(row, length)
+                ops = parse_cigar(cigar)
+                clip_start = ops[0][0] if ops and ops[0][1] == "S" else 0
+                clip_end = ops[-1][0] if len(ops) > 1 and ops[-1][1] == "S" else 0
+                spans = {op: 0 for op in "MID"}
+                for n, op in ops:
+                    if op in spans:
+                        spans[op] += n
+                block = spans["M"] + spans["I"] + spans["D"]
+                matches = block - mismatches
+                if flags & FLAG_REVERSE:
+                    clip_start, clip_end = clip_end, clip_start
+                strand = "-" if flags & FLAG_REVERSE else "+"
+                out.write(f"{name}\t{length}\t{clip_start}\t{length - clip_end}\t{strand}\t{reference_name}\t"
+                          f"{reference_length}\t{start}\t{start + spans['M'] + spans['D']}\t{matches}\t{block}\t"
+                          f"{mapq}\tNM:i:{mismatches}")
+
+
+# 매핑 스크립트 공통 옵션: --results FILE / --sam FILE / --paf FILE
+def add_arguments(parser) -> None:
+    parser.add_argument("--results", metavar="FILE", help="매핑 결과를 열 단위 바이너리 파일로 저장")
+    parser.add_argument("--sam", metavar="FILE", help="매핑 결과를 SAM으로 저장")
+    parser.add_argument("--paf", metavar="FILE", help="매핑 결과를 PAF로 저장 (매핑된 read만)")
+
+
+# add_arguments로 받은 옵션에 따라 결과 저장. reads_fn은 호출할 때마다 새 read iterable을 반환
+def export_from_args(args, results: AlignmentResults, reads_fn, reference_name: str, reference_length: int) -> None:
+    if getattr(args, "results", None):
+        results.save(args.results)
+    if getattr(args, "sam", None):
+        results.write_sam(args.sam, reads_fn(), reference_name, reference_length)
+    if getattr(args, "paf", None):
+        results.write_paf(args.paf, reads_fn(), reference_name, reference_length)
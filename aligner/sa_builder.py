@@ -0,0 +1,123 @@
+# suffix array 생성 엔진
+# divsufsort(C 구현) -> numpy prefix doubling -> 기존 비교 정렬(reference) 순으로 사용
+
+import functools
+
+import numpy as np
+
+
+# pydivsufsort는 suffix array를 실제로 만들 때 처음 import (index를 로딩만 하는 실행은 import 비용 없음)
+# 미설치 환경이면 None (auto는 numpy fallback 사용)
+@functools.lru_cache(maxsize=None)
+def _load_divsufsort():
+    try:
+        from pydivsufsort import divsufsort
+    except ImportError:
+        return None
+    return divsufsort
+
+
+# 문자열/bytes/ndarray 입력을 uint8 배열로 변환 (ASCII 값 그대로 유지해 사전 순서 보존)
+def as_uint8_array(text) -> np.ndarray:
+    if isinstance(text, np.ndarray):
+        if text.dtype != np.uint8:
+            raise TypeError(f"uint8 배열만 지원합니다: {text.dtype}")
+        return text
+    if isinstance(text, str):
+        text = text.encode("ascii")
+    return np.frombuffer(text, dtype=np.uint8)
+
+
+# SA 인덱스 자료형: 2^31 미만이면 int32, 아니면 int64
+def sa_dtype(n: int):
+    return np.int32 if n <= np.iinfo(np.int32).max else np.int64
+
+
+# libdivsufsort를 이용한 O(n log n) 생성
+def build_suffix_array_divsufsort(text) -> np.ndarray:
+    divsufsort = _load_divsufsort()
+    if divsufsort is None:
+        raise ImportError("pydivsufsort가 설치되어 있지 않습니다 (requirements.txt 참고)")
+    if isinstance(text, str):
+        text = text.encode("ascii")
+    elif isinstance(text, np.ndarray) and not text.flags.writeable:
+        text = text.tobytes()  # ctypes 변환은 읽기 전용 배열(memmap 등)을 받지 않음
+    if len(text) == 0:
+        return np.zeros(0, dtype=np.int32)
+    return np.asarray(divsufsort(text))
+
+
+# numpy 벡터 연산 기반 prefix doubling (Manber-Myers), O(n log^2 n)
+def build_suffix_array_doubling(text) -> np.ndarray:
+    data = as_uint8_array(text)
+    n = len(data)
+    dtype = sa_dtype(n)
+    if n == 0:
+        return np.zeros(0, dtype=dtype)
+
+    # 초기 rank: 등장하는 문자만으로 압축한 문자 순위
+    _, rank = np.unique(data, return_inverse=True)
+    rank = rank.astype(np.int64)
+
+    k = 1
+    while True:
+        # (rank[i], rank[i + k]) 쌍으로 정렬. 범위를 벗어나면 -1 (더 짧은 접미사가 앞)
+        # 두 rank를 int64 하나로 합치면 n이 약 30억을 넘을 때 넘치므로 lexsort로 쌍을 그대로 비교
+        second = np.full(n, -1, dtype=np.int64)
+        if k < n:
+            second[: n - k] = rank[k:]
+        sa = np.lexsort((second, rank))
+
+        sorted_rank, sorted_second = rank[sa], second[sa]
+        changed = (sorted_rank[1:] != sorted_rank[:-1]) | (sorted_second[1:] != sorted_second[:-1])
+        new_rank = np.empty(n, dtype=np.int64)
+        new_rank[sa] = np.concatenate(([0], np.cumsum(changed)))
+        rank = new_rank
+        # 모든 rank가 서로 다르면 정렬 완료
+        if rank[sa[-1]] == n - 1 or k >= n:
+            break
+        k *= 2
+
+    return sa.astype(dtype)
+
+
+# 기존 구현: cmp_to_key 기반 순수 파이썬 비교 정렬 (검증용 reference, O(n^2 log n))
+def build_suffix_array_reference(text) -> np.ndarray:
+    if not isinstance(text, str):
+        text = as_uint8_array(text).tobytes().decode("ascii")
+
+    # i번째 접미사와 j번째 접미사를 비교
+    def compare(i, j):
+        while i < len(text) and j < len(text):
+            # 문자 다르면 사전순 비교
+            if text[i] != text[j]:
+                return -1 if text[i] < text[j] else 1
+            i += 1
+            j += 1
+        # 한쪽이 먼저 끝난 경우 비교 결과 처리
+        if i == len(text) and j != len(text):
+            return -1
+        elif j == len(text) and i != len(text):
+            return 1
+        else:
+            return 0
+
+    # 접미사 시작 위치(index)들을 사전 순으로 정렬
+    order = sorted(range(len(text)), key=functools.cmp_to_key(compare))
+    return np.array(order, dtype=sa_dtype(len(text)))
+
+
+SA_BUILDERS = {
+    "divsufsort": build_suffix_array_divsufsort,
+    "doubling": build_suffix_array_doubling,
+    "reference": build_suffix_array_reference,
+}
+
+
+# method에 맞는 생성기로 suffix array 생성. "auto"는 divsufsort가 있으면 사용, 없으면 doubling
+def build_suffix_array(text, method: str = "auto") -> np.ndarray:
+    if method == "auto":
+        method = "divsufsort" if _load_divsufsort() is not None else "doubling"
+    if method not in SA_BUILDERS:
+        raise ValueError(f"알 수 없는 suffix array 생성 방식: {method} (가능: auto, {', '.join(SA_BUILDERS)})")
+    return SA_BUILDERS[method](text)
@@ -0,0 +1,201 @@
+# suffix array 패턴 검색
+# - sa_range: mlr(Manber-Myers) LCP 가속 이진 탐색. text를 잘라 새 문자열을 만들지 않고 위치별로 직접 비교
+# - SuffixArraySearcher.batch_ranges: 여러 패턴을 numpy로 동시에(lockstep) 이진 탐색
+#   앞 bucket_k 염기로 미리 계산한 SA 구간 테이블(prefix bucket)로 탐색 범위를 좁히고, 같은 패턴은 한 번만 검색
+# 결과는 위치 리스트가 아니라 SA 구간 (lo, hi): 일치 위치는 sa[lo:hi]
+# suffix array는 reference 원문(ASCII byte) 순서로 정렬돼 있으므로 비교도 원문 byte로 함
+# (N / 소문자를 염기 코드로 바꿔 비교하면 SA 순서와 어긋남. 대소문자는 구분)
+# text가 PackedSequence(2-bit 압축 reference, index 파일의 memmap)면 원문 복사 없이 압축 배열에서 바로 비교.
+# 이때 reference는 A/C/G/T/N 대문자로 정규화된 서열이므로 SA도 정규화된 서열로 만든 것이어야 하고,
+# 패턴도 같은 방식으로 정규화해 비교함 (소문자 -> 대문자, 그 외 문자 -> N)
+
+import numpy as np
+
+from aligner.dna import decode_bases, encode_bases
+from aligner.packed_sequence import PackedSequence
+
+# prefix bucket 계산용: 대문자 A/C/G/T -> 0~3 (ASCII 순서와 같음), 나머지 byte는 -1
+_BUCKET_RANK = np.full(256, -1, dtype=np.int8)
+for _rank, _base in enumerate(b"ACGT"):
+    _BUCKET_RANK[_base] = _rank
+
+# PackedSequence 코드(0~3, N / 범위 밖은 OUT_OF_RANGE) -> 정규화된 서열의 byte
+_PACKED_BYTES = np.full(256, ord("N"), dtype=np.uint8)
+_PACKED_BYTES[:4] = np.frombuffer(b"ACGT", dtype=np.uint8)
+# 원문 byte -> 정규화된 byte (A/C/G/T 대문자, 그 외 N)
+_NORMALIZED = np.frombuffer(decode_bases(encode_bases(bytes(range(256)))).encode("ascii"), dtype=np.uint8)
+
+
+# str / bytes / uint8 배열을 ASCII byte 배열로 (배열은 이미 원문 byte라고 봄)
+def as_bytes(seq) -> np.ndarray:
+    if isinstance(seq, str):
+        seq = seq.encode("ascii")
+    if isinstance(seq, bytes):
+        return np.frombuffer(seq, dtype=np.uint8)
+    return np.asarray(seq, dtype=np.uint8)
+
+
+# lcp: pattern과 text[pos:]의 공통 접두사 길이를 start부터 이어서 계산
+def _extend_lcp(text, n: int, pos: int, pattern, start: int) -> int:
+    h = start
+    m = len(pattern)
+    while h < m and pos + h < n and text[pos + h] == pattern[h]:
+        h += 1
+    return h
+
+
+# pattern으로 시작하는 접미사들의 SA 구간 [lo, hi)
+# text는 str / bytes 등 인덱싱 가능한 서열 (pattern과 같은 타입). 비교한 접두사 길이(lcp)를 양 끝에서 기억해
+# min(lcp_lo, lcp_hi) 글자는 다시 비교하지 않음
+def sa_range(sa, text, pattern, lo: int = 0, hi: int = None) -> tuple:
+    n = len(text)
+    m = len(pattern)
+    hi = len(sa) if hi is None else hi
+
+    # lower bound: pattern 이상인 첫 접미사
+    left, right = lo, hi
+    lcp_left = lcp_right = 0
+    while left < right:
+        mid = (left + right) // 2
+        pos = int(sa[mid])
+        h = _extend_lcp(text, n, pos, pattern, min(lcp_left, lcp_right))
+        if h < m and (pos + h >= n or text[pos + h] < pattern[h]):
+            left = mid + 1
+            lcp_left = h
+        else:
+            right = mid
+            lcp_right = h
+    lower = left
+
+    # upper bound: 앞 m글자가 pattern보다 큰 첫 접미사
+    left, right = lower, hi
+    lcp_left = lcp_right = 0
+    while left < right:
+        mid = (left + right) // 2
+        pos = int(sa[mid])
+        h = _extend_lcp(text, n, pos, pattern, min(lcp_left, lcp_right))
+        if h == m or pos + h >= n or text[pos + h] < pattern[h]:
+            left = mid + 1
+            lcp_left = h
+        else:
+            right = mid
+            lcp_right = h
+    return lower, left
+
+
+class SuffixArraySearcher:
+    # sa: suffix array, text: suffix array를 만든 reference 원문 (str / bytes / ASCII uint8 배열)
+    #   또는 정규화된 서열로 만든 suffix array의 PackedSequence (원문 byte 배열을 만들지 않음)
+    # bucket_k: prefix bucket 길이 (4^bucket_k 칸의 구간 테이블, 0이면 사용하지 않음)
+    #   text가 대문자 A/C/G/T로만 이뤄졌을 때만 사용 (N / 소문자가 있으면 bucket 없이 전체 구간에서 탐색)
+    def __init__(self, sa: np.ndarray, text, bucket_k: int = 10, chunk_size: int = 1 << 22):
+        self.sa = sa
+        self.packed = text if isinstance(text, PackedSequence) else None
+        self.codes = None if self.packed is not None else as_bytes(text)
+        self.n = len(text) if self.packed is not None else len(self.codes)
+        if self.packed is not None:
+            acgt_only = len(self.packed.n_runs) == 0
+        else:
+            acgt_only = not np.any(_BUCKET_RANK[self.codes] < 0)
+        self.bucket_k = bucket_k if bucket_k and acgt_only else 0
+        self.bucket_starts = None
+        if self.bucket_k:
+            self.bucket_starts = self._build_buckets(chunk_size)
+
+    # SA 순서대로 접미사의 앞 bucket_k 염기를 세어 각 prefix의 SA 시작 위치 테이블을 만듦
+    # (끝에서 bucket_k보다 짧은 접미사는 A로 채워서 계산해도 SA 순서와 어긋나지 않음)
+    def _build_buckets(self, chunk_size: int) -> np.ndarray:
+        k = self.bucket_k
+        counts = np.zeros(4 ** k, dtype=np.int64)
+        for start in range(0, len(self.sa), chunk_size):
+            pos = np.asarray(self.sa[start:start + chunk_size], dtype=np.int64)
+            keys = np.zeros(len(pos), dtype=np.int64)
+            for j in range(k):
+                values = self._bytes_at(pos + j)
+                rank = _BUCKET_RANK[np.maximum(values, 0)].astype(np.int64)
+                keys = (keys << 2) | np.where(values >= 0, rank, 0)
+            counts += np.bincount(keys, minlength=4 ** k)
+        starts = np.zeros(4 ** k + 1, dtype=np.int64)
+        np.cumsum(counts, out=starts[1:])
+        return starts
+
+    # 위치 배열의 text byte (int16). text 끝을 넘어간 위치는 모든 염기보다 작은 -1 (짧은 접미사가 앞)
+    def _bytes_at(self, idx: np.ndarray) -> np.ndarray:
+        valid = idx < self.n
+        if self.packed is not None:
+            values = _PACKED_BYTES[self.packed.at(idx)]
+        else:
+            values = self.codes[np.minimum(idx, self.n - 1)]
+        return np.where(valid, values.astype(np.int16), -1)
+
+    # 패턴의 비교용 byte (PackedSequence text면 정규화)
+    def _pattern_bytes(self, pattern) -> np.ndarray:
+        codes = as_bytes(pattern)
+        return _NORMALIZED[codes] if self.packed is not None else codes
+
+    # 패턴 하나의 SA 구간 (원문 text는 mlr 이진 탐색, PackedSequence는 batch_ranges와 같은 방식)
+    def range(self, pattern) -> tuple:
+        if self.packed is not None:
+            lo, hi = self.batch_ranges([pattern])
+            return int(lo[0]), int(hi[0])
+        codes = as_bytes(pattern)
+        lo, hi = self._initial_bounds(codes[None, :])
+        return sa_range(self.sa, self.codes, codes, int(lo[0]), int(hi[0]))
+
+    # prefix bucket으로 정한 초기 탐색 구간
+    def _initial_bounds(self, patterns: np.ndarray):
+        p, m = patterns.shape
+        lo = np.zeros(p, dtype=np.int64)
+        hi = np.full(p, len(self.sa), dtype=np.int64)
+        k = self.bucket_k
+        if k and m >= k:
+            ranks = _BUCKET_RANK[patterns[:, :k]].astype(np.int64)
+            usable = ~np.any(ranks < 0, axis=1)
+            keys = np.zeros(p, dtype=np.int64)
+            for j in range(k):
+                keys = (keys << 2) | (ranks[:, j] & 3)
+            lo = np.where(usable, self.bucket_starts[keys], lo)
+            hi = np.where(usable, self.bucket_starts[keys + 1], hi)
+        return lo, hi
+
+    # 같은 길이의 패턴 (p, m) byte 행렬을 동시에 이진 탐색. upper=False면 lower bound, True면 upper bound
+    def _lockstep(self, patterns: np.ndarray, lo: np.ndarray, hi: np.ndarray, upper: bool) -> np.ndarray:
+        lo, hi = lo.copy(), hi.copy()
+        m = patterns.shape[1]
+        offsets = np.arange(m, dtype=np.int64)
+        active = np.nonzero(lo < hi)[0]
+        while len(active):
+            mid = (lo[active] + hi[active]) // 2
+            idx = np.asarray(self.sa[mid], dtype=np.int64)[:, None] + offsets[None, :]
+            window = self._bytes_at(idx)
+            pat = patterns[active].astype(np.int16)
+            diff = window != pat
+            first = diff.argmax(axis=1)
+            rows = np.arange(len(active))
+            differs = diff[rows, first]
+            suffix_less = differs & (window[rows, first] < pat[rows, first])
+            go_right = (suffix_less | ~differs) if upper else suffix_less
+            lo[active] = np.where(go_right, mid + 1, lo[active])
+            hi[active] = np.where(go_right, hi[active], mid)
+            active = active[lo[active] < hi[active]]
+        return lo
+
+    # 여러 패턴의 SA 구간 (lo, hi) 배열. 패턴 길이가 달라도 되며, 같은 패턴은 한 번만 검색
+    def batch_ranges(self, patterns) -> tuple:
+        codes = [self._pattern_bytes(p) for p in patterns]
+        out_lo = np.zeros(len(codes), dtype=np.int64)
+        out_hi = np.zeros(len(codes), dtype=np.int64)
+        by_len = {}
+        for i, c in enumerate(codes):
+            by_len.setdefault(len(c), []).append(i)
+        for m, members in by_len.items():
+            members = np.array(members)
+            mat = np.stack([codes[i] for i in members]) if m else np.zeros((len(members), 0), dtype=np.uint8)
+            uniq, inverse = np.unique(mat, axis=0, return_inverse=True)
+            inverse = inverse.reshape(-1)
+            lo, hi = self._initial_bounds(uniq)
+            lower = self._lockstep(uniq, lo, hi, upper=False)
+            upper = self._lockstep(uniq, lower, hi, upper=True)
+            out_lo[members] = lower[inverse]
+            out_hi[members] = upper[inverse]
+        return out_lo, out_hi
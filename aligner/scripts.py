@@ -0,0 +1,41 @@
+# 하이픈이 들어간 디렉터리에 있는 정렬 / 데이터 생성 스크립트 목록과 로더
+# 스크립트는 처음 쓸 때 한 번만 import하므로 (CLI / 서버 / 벤치마크) 시작할 때 numpy 등을 미리 읽지 않음
+
+import importlib.util
+import os
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 이름 -> (REPO_ROOT 기준 스크립트 경로, 설명)
+SCRIPTS = {
+    "sw": ("Smith-Waterman/smith_waterman.py", "Seed-and-extend (Smith-Waterman) read 매핑"),
+    "minimizer": ("Minimizer-indexing/minimizer_indexing.py", "Minimizer 기반 read 매핑"),
+    "sa": ("suffix_array/suffix_array_algorithm.py", "Suffix array 기반 read 정렬 및 복원"),
+    "fm": ("BWT_FMIndex/fm_index.py", "FM-index(BWT) 기반 read 매핑"),
+    "genome": ("genome_generation/generate_elephant_genome.py", "인공 reference 유전체 생성"),
+    "simulate": ("genome_generation/simulate_ancient_reads.py", "고대 DNA read 시뮬레이션"),
+}
+
+
+# 스크립트 파일을 파일 이름(확장자 제외)을 모듈 이름으로 로딩 (이미 로딩한 스크립트는 그대로 반환)
+def load_script(relative_path: str):
+    path = os.path.join(REPO_ROOT, relative_path)
+    name = os.path.splitext(os.path.basename(path))[0]
+    module = sys.modules.get(name)
+    if module is not None and os.path.abspath(getattr(module, "__file__", "") or "") == path:
+        return module
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module  # fork worker로 넘기는 함수를 pickle할 수 있도록 모듈 이름으로 등록
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        del sys.modules[name]
+        raise
+    return module
+
+
+# SCRIPTS의 이름으로 스크립트 모듈 로딩
+def load(name: str):
+    return load_script(SCRIPTS[name][0])
@@ -0,0 +1,392 @@
+# index를 메모리에 올려 둔 채 매핑 요청을 받는 asyncio 서버 (Unix socket 또는 localhost TCP)
+# 요청 / 응답은 한 줄에 JSON 하나 (연결 하나로 여러 요청을 차례로 보낼 수 있음)
+#   {"op": "load", "method": "fm", "reference": "ref.txt"}                 -> index 로딩 (캐시에 있으면 재사용)
+#   {"op": "map", "method": "fm", "reference": "ref.txt", "reads": [...],
+#    "options": {"workers": 2, "both_strands": true}}                     -> read별 결과를 한 줄씩 스트리밍 후 완료 줄
+#                                                                          (완료 줄에 fast path tier별 read 수)
+#   {"op": "stats"} / {"op": "evict", "method": ..., "reference": ...} / {"op": "shutdown"}
+# - index는 (method, reference, index 경로) 별로 한 번만 로딩하고, 추정 메모리 합이 cache_bytes를 넘으면
+#   가장 오래 쓰지 않은 것부터 내림 (LRU). 같은 index를 동시에 요청하면 로딩은 한 번만 함
+# - 로딩 / 매핑은 thread pool에서 실행하고 (workers > 1이면 그 안에서 aligner.parallel 프로세스 병렬),
+#   결과는 나오는 대로 chunk 단위로 event loop에 넘겨 바로 전송
+#   python -m aligner.server serve --socket /tmp/aligner.sock --cache-mb 4096
+#   python -m aligner.server map --socket /tmp/aligner.sock --method fm ref.txt reads.txt
+
+import argparse
+import asyncio
+import collections
+import concurrent.futures
+import json
+import os
+import socket
+import sys
+import threading
+import time
+
+from aligner import scripts
+from aligner.fast_path import TierCounts
+from aligner.read_io import iter_reads
+
+DEFAULT_CACHE_MB = 4096
+DEFAULT_JOBS = 2       # 동시에 실행할 로딩 / 매핑 작업 수
+STREAM_CHUNK = 256     # 결과를 event loop로 넘기는 단위 (read 수)
+MAX_LINE = 1 << 30     # 요청 한 줄의 최대 크기 (read batch 포함)
+
+
+# 각 정렬기(aligner.scripts.SCRIPTS의 이름): (index 기본 확장자, 로딩 함수, 매핑 함수, 결과 tuple 필드 이름)
+# 로딩 함수 (module, ref_file, index_file) -> state, 매핑 함수 (module, state, reads, options) -> 결과 iterator
+def _sw_load(module, ref_file, index_file):
+    return module.load_kmer_index(ref_file, index_file, 20)
+
+def _sw_map(module, state, reads, options):
+    kmer_index, reference = state
+    return module.iter_map_reads(reference, reads, kmer_index, seed_len=20, **options)
+
+def _minimizer_load(module, ref_file, index_file):
+    return module.load_minimizer_index(ref_file, index_file)
+
+def _minimizer_map(module, state, reads, options):
+    index, reference = state
+    return module.iter_map_reads(reference, index, reads, k=module.K, w=module.W, max_mismatch=module.MAX_MM,
+                                 seed_min=module.SEED_MIN, **options)
+
+def _sa_load(module, ref_file, index_file):
+    sa, reference = module.load_suffix_array_index(ref_file, index_file)
+    return reference, sa, module.prepare_searcher(reference, sa)
+
+def _sa_map(module, state, reads, options):
+    reference, sa, prepared = state
+    return module.iter_alignments(reference, reads, 2, sa, prepared=prepared, **options)
+
+def _fm_load(module, ref_file, index_file):
+    return module.load_fm_index(ref_file, index_file)
+
+def _fm_map(module, state, reads, options):
+    return module.iter_map_reads(state, reads, module.MAX_MM, **options)
+
+
+METHODS = {
+    "sw": (".kmer.idx", _sw_load, _sw_map, ("pos", "score", "reverse")),
+    "minimizer": (".minimizer.idx", _minimizer_load, _minimizer_map, ("pos", "mismatches", "reverse")),
+    "sa": (".sa.idx", _sa_load, _sa_map, ("pos", "mismatches", "num_best", "reverse")),
+    "fm": (".fm.idx", _fm_load, _fm_map, ("pos", "mismatches", "num_best", "reverse")),
+}
+MAP_OPTIONS = ("workers", "both_strands", "dedup", "exact")  # 요청에서 매핑 함수로 넘기는 옵션
+
+
+class RequestError(Exception):
+    pass
+
+
+# state가 잡고 있는 메모리 추정 (numpy 배열 / memoryview / 문자열 / 객체 속성을 따라가며 합산, 같은 객체는 한 번만)
+def estimate_nbytes(obj, seen=None) -> int:
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    if isinstance(getattr(obj, "nbytes", None), int):  # numpy 배열 / memoryview (numpy를 import하지 않고 판별)
+        return obj.nbytes
+    if isinstance(obj, (str, bytes)):
+        return len(obj)
+    if isinstance(obj, dict):
+        return sum(estimate_nbytes(value, seen) for value in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return sum(estimate_nbytes(value, seen) for value in obj)
+    if hasattr(obj, "__dict__"):
+        return estimate_nbytes(vars(obj), seen)
+    return 0
+
+
+class CacheEntry:
+    def __init__(self, key: tuple, module, state, nbytes: int, load_sec: float):
+        self.key = key
+        self.module = module
+        self.state = state
+        self.nbytes = nbytes
+        self.load_sec = load_sec
+        self.hits = 0
+
+
+# 추정 메모리 기준 LRU index 캐시
+class IndexCache:
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.entries = collections.OrderedDict()  # key -> CacheEntry (앞쪽이 가장 오래 쓰지 않은 것)
+        self.evictions = 0
+
+    @property
+    def nbytes(self) -> int:
+        return sum(entry.nbytes for entry in self.entries.values())
+
+    def get(self, key: tuple):
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+            entry.hits += 1
+        return entry
+
+    # 새 entry 추가 후 한도를 넘으면 오래된 것부터 제거 (방금 넣은 entry는 한도보다 커도 유지)
+    def put(self, entry: CacheEntry) -> None:
+        self.entries[entry.key] = entry
+        self.entries.move_to_end(entry.key)
+        while self.nbytes > self.max_bytes and len(self.entries) > 1:
+            old_key, _ = self.entries.popitem(last=False)
+            self.evictions += 1
+            print(f"> Evicted {old_key[0]} index for {old_key[1]}", file=sys.stderr)
+
+    def pop(self, key: tuple):
+        return self.entries.pop(key, None)
+
+
+class MappingServer:
+    def __init__(self, cache_bytes: int = DEFAULT_CACHE_MB << 20, jobs: int = DEFAULT_JOBS, workers: int = 1):
+        self.cache = IndexCache(cache_bytes)
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=jobs)
+        self.workers = workers  # 요청에 workers가 없을 때 기본값
+        self._loading = {}      # key -> 로딩 중인 asyncio.Future (같은 index 중복 로딩 방지)
+        self._modules = {}
+        self._stopped = None
+
+    # 요청의 method / reference / index로 캐시 key (경로는 절대 경로)
+    def _key(self, request: dict) -> tuple:
+        method = request.get("method")
+        if method not in METHODS:
+            raise RequestError(f"지원하지 않는 method: {method} (가능: {', '.join(METHODS)})")
+        reference = request.get("reference")
+        if not reference or not os.path.exists(reference):
+            raise RequestError(f"reference 파일이 없습니다: {reference}")
+        reference = os.path.abspath(reference)
+        index = request.get("index") or reference + METHODS[method][0]
+        return method, reference, os.path.abspath(index)
+
+    def _module(self, method: str):
+        if method not in self._modules:
+            self._modules[method] = scripts.load(method)
+        return self._modules[method]
+
+    # 캐시에서 index를 찾고, 없으면 thread pool에서 로딩 (동시에 같은 key를 요청하면 한 번만 로딩)
+    async def get_index(self, key: tuple) -> tuple:
+        entry = self.cache.get(key)
+        if entry is not None:
+            return entry, True
+        if key in self._loading:
+            return await asyncio.shield(self._loading[key]), True
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._loading[key] = future
+        try:
+            method, reference, index = key
+            module = self._module(method)
+            start = time.time()
+            state = await loop.run_in_executor(self.executor, METHODS[method][1], module, reference, index)
+            entry = CacheEntry(key, module, state, estimate_nbytes(state), time.time() - start)
+            self.cache.put(entry)
+            future.set_result(entry)
+            return entry, False
+        except BaseException as exc:
+            future.set_exception(exc)
+            future.exception()  # 기다리는 요청이 없어도 경고가 나지 않도록
+            raise
+        finally:
+            del self._loading[key]
+
+    async def handle_load(self, request: dict, send) -> None:
+        entry, cached = await self.get_index(self._key(request))
+        await send({"ok": True, "cached": cached, "nbytes": entry.nbytes, "load_sec": round(entry.load_sec, 3)})
+
+    # read batch를 thread pool에서 매핑하며 결과를 STREAM_CHUNK개씩 받아 read 하나당 한 줄로 전송
+    # 전송이 실패하면(연결 끊김) cancelled로 알려 매핑 thread가 chunk 하나 안에 멈추게 함
+    async def handle_map(self, request: dict, send) -> None:
+        reads = request.get("reads")
+        if not isinstance(reads, list):
+            raise RequestError("reads는 read 문자열 목록이어야 합니다")
+        options = {"workers": self.workers}
+        options.update({name: value for name, value in (request.get("options") or {}).items()
+                        if name in MAP_OPTIONS})
+        options["tiers"] = tiers = TierCounts()
+        entry, cached = await self.get_index(self._key(request))
+        map_fn, fields = METHODS[entry.key[0]][2], METHODS[entry.key[0]][3]
+
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        cancelled = threading.Event()
+
+        def produce():
+            results = map_fn(entry.module, entry.state, reads, options)
+            try:
+                chunk = []
+                for result in results:
+                    chunk.append(result)
+                    if len(chunk) >= STREAM_CHUNK:
+                        if cancelled.is_set():
+                            return
+                        loop.call_soon_threadsafe(queue.put_nowait, chunk)
+                        chunk = []
+                if chunk:
+                    loop.call_soon_threadsafe(queue.put_nowait, chunk)
+                loop.call_soon_threadsafe(queue.put_nowait, None)
+            except BaseException as exc:  # 매핑 오류는 event loop 쪽에서 다시 발생시킴
+                loop.call_soon_threadsafe(queue.put_nowait, exc)
+            finally:
+                close = getattr(results, "close", None)
+                if close is not None:  # 중간에 멈춘 generator의 병렬 worker 정리
+                    close()
+
+        start = time.time()
+        job = loop.run_in_executor(self.executor, produce)
+        count = 0
+        try:
+            while True:
+                chunk = await queue.get()
+                if chunk is None:
+                    break
+                if isinstance(chunk, BaseException):
+                    raise chunk
+                for result in chunk:
+                    record = {"id": count}
+                    record.update((name, int(value)) for name, value in zip(fields, result))
+                    await send(record, flush=False)
+                    count += 1
+                await send(None)
+        finally:
+            cancelled.set()
+            await job
+        await send({"ok": True, "done": count, "cached": cached, "map_sec": round(time.time() - start, 3),
+                    "tiers": tiers.counts})
+
+    async def handle_stats(self, request: dict, send) -> None:
+        entries = [{"method": entry.key[0], "reference": entry.key[1], "index": entry.key[2],
+                    "nbytes": entry.nbytes, "hits": entry.hits, "load_sec": round(entry.load_sec, 3)}
+                   for entry in self.cache.entries.values()]
+        await send({"ok": True, "entries": entries, "nbytes": self.cache.nbytes,
+                    "max_bytes": self.cache.max_bytes, "evictions": self.cache.evictions})
+
+    async def handle_evict(self, request: dict, send) -> None:
+        await send({"ok": True, "evicted": self.cache.pop(self._key(request)) is not None})
+
+    async def handle_shutdown(self, request: dict, send) -> None:
+        await send({"ok": True})
+        self._stopped.set()
+
+    # 연결 하나: 요청 줄을 차례로 처리. 잘못된 요청은 {"ok": false, "error": ...}로 응답하고 연결은 유지
+    async def handle_connection(self, reader, writer) -> None:
+        async def send(message, flush=True):
+            if message is not None:
+                writer.write(json.dumps(message).encode() + b"\n")
+            if flush:
+                await writer.drain()
+
+        handlers = {"load": self.handle_load, "map": self.handle_map, "stats": self.handle_stats,
+                    "evict": self.handle_evict, "shutdown": self.handle_shutdown}
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    handler = handlers.get(request.get("op"))
+                    if handler is None:
+                        raise RequestError(f"알 수 없는 op: {request.get('op')}")
+                    await handler(request, send)
+                    if self._stopped.is_set():
+                        break
+                except Exception as exc:  # 요청 하나의 실패로 서버가 멈추지 않도록
+                    await send({"ok": False, "error": f"{type(exc).__name__}: {exc}"})
+        except (ConnectionResetError, BrokenPipeError, asyncio.CancelledError):
+            pass  # 클라이언트가 끊었거나 shutdown으로 서버가 닫힘
+        finally:
+            writer.close()
+
+    # socket_path가 있으면 Unix socket, 없으면 host:port TCP로 shutdown 요청까지 실행
+    async def serve(self, socket_path: str = None, host: str = "127.0.0.1", port: int = 8765) -> None:
+        self._stopped = asyncio.Event()
+        if socket_path:
+            if os.path.exists(socket_path):
+                os.remove(socket_path)
+            server = await asyncio.start_unix_server(self.handle_connection, socket_path, limit=MAX_LINE)
+            print(f"> Serving on {socket_path}")
+        else:
+            server = await asyncio.start_server(self.handle_connection, host, port, limit=MAX_LINE)
+            print(f"> Serving on {host}:{port}")
+        async with server:
+            await self._stopped.wait()
+        self.executor.shutdown(wait=False)
+        if socket_path and os.path.exists(socket_path):
+            os.remove(socket_path)
+
+
+# 동기 client: 요청 하나를 보내고 응답 줄(dict)을 차례로 yield ("ok"가 있는 줄이 마지막)
+def iter_request(request: dict, socket_path: str = None, host: str = "127.0.0.1", port: int = 8765):
+    if socket_path:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(socket_path)
+    else:
+        sock = socket.create_connection((host, port))
+    with sock, sock.makefile("rb") as stream:
+        sock.sendall(json.dumps(request).encode() + b"\n")
+        for line in stream:
+            message = json.loads(line)
+            yield message
+            if "ok" in message:
+                return
+
+
+#   serve --socket PATH | --port N [--cache-mb MB] [--jobs N] [--workers N] : 서버 실행
+#   load / map / stats / evict / shutdown                                  : 서버에 요청 (map은 예측 위치를 한 줄씩 출력)
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="index를 메모리에 유지하는 매핑 서버")
+    parser.add_argument("--socket", help="Unix socket 경로 (없으면 --host / --port TCP)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_serve = sub.add_parser("serve", help="서버 실행")
+    p_serve.add_argument("--cache-mb", type=int, default=DEFAULT_CACHE_MB, help="캐시할 index의 추정 메모리 한도 (MB)")
+    p_serve.add_argument("--jobs", type=int, default=DEFAULT_JOBS, help="동시에 실행할 로딩 / 매핑 작업 수")
+    p_serve.add_argument("--workers", type=int, default=1, help="요청에 없을 때 매핑 프로세스 수")
+    for name in ("load", "map", "evict"):
+        p = sub.add_parser(name)
+        p.add_argument("--method", choices=sorted(METHODS), required=True)
+        p.add_argument("reference")
+        p.add_argument("--index", help="index 파일 경로 (기본: <reference>.<method>.idx)")
+        if name == "map":
+            p.add_argument("reads", help="read 파일 (plain / FASTA / FASTQ, .gz 가능)")
+            p.add_argument("--workers", type=int, help="매핑 프로세스 수")
+            p.add_argument("--forward-only", action="store_true", help="역상보 가닥은 검색하지 않음")
+            p.add_argument("--no-dedup", action="store_true", help="같은 서열의 read도 각각 매핑")
+            p.add_argument("--no-exact", action="store_true", help="read 전체 exact 조회 없이 기존 매핑 경로로 처리")
+    sub.add_parser("stats")
+    sub.add_parser("shutdown")
+    args = parser.parse_args(argv)
+    address = {"socket_path": args.socket, "host": args.host, "port": args.port}
+
+    if args.command == "serve":
+        server = MappingServer(args.cache_mb << 20, jobs=args.jobs, workers=args.workers)
+        asyncio.run(server.serve(args.socket, args.host, args.port))
+        return
+
+    request = {"op": args.command}
+    if args.command in ("load", "map", "evict"):
+        request.update(method=args.method, reference=os.path.abspath(args.reference),
+                       index=os.path.abspath(args.index) if args.index else None)
+    if args.command == "map":
+        request["reads"] = list(iter_reads(args.reads))
+        request["options"] = {"both_strands": not args.forward_only, "dedup": not args.no_dedup,
+                              "exact": not args.no_exact}
+        if args.workers:
+            request["options"]["workers"] = args.workers
+    message = {}
+    for message in iter_request(request, **address):
+        if args.command == "map" and "ok" not in message:
+            print(message["pos"])
+        else:
+            print(json.dumps(message, ensure_ascii=False), file=sys.stderr if args.command == "map" else sys.stdout)
+    if "ok" not in message:  # 최종 응답 전에 서버가 연결을 닫음
+        print(json.dumps({"ok": False, "error": "connection closed"}), file=sys.stderr)
+    if not message.get("ok"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
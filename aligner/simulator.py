@@ -0,0 +1,102 @@
+# 인공 reference / 고대 DNA read 시뮬레이터 (numpy Generator 기반, chunk 단위 스트리밍)
+# 같은 seed와 같은 chunk_size면 항상 같은 결과. 메모리 사용량은 chunk 크기에만 비례
+# (read 생성 시 reference는 np.memmap으로 열어 필요한 부분만 읽음)
+# reverse_fraction > 0이면 그 비율의 read를 역상보 가닥에서 만듦 (정답 위치는 reference 상의 왼쪽 끝 그대로)
+# 정답 파일 형식은 가닥과 관계없이 한 줄에 위치 하나 그대로이고, 가닥(+ / -)은 별도 strand 파일에만 기록
+
+import os
+
+import numpy as np
+
+BASE_BYTES = np.frombuffer(b"ACGT", dtype=np.uint8)
+GENOME_CHUNK = 1 << 24   # reference 생성 단위 (염기)
+READ_CHUNK = 1 << 14     # read 생성 단위 (read 수)
+END_LENGTH = 5           # 변이 확률이 높아지는 read 말단 길이
+END_FACTOR = 5           # 말단 변이 확률 배수
+
+_DAMAGE = np.arange(256, dtype=np.uint8)  # C -> T, G -> A (그 외 염기는 무작위 염기로 치환)
+_DAMAGE[ord("C")] = ord("T")
+_DAMAGE[ord("G")] = ord("A")
+
+_COMPLEMENT = np.arange(256, dtype=np.uint8)  # A <-> T, C <-> G
+for _a, _b in (("A", "T"), ("C", "G")):
+    _COMPLEMENT[ord(_a)], _COMPLEMENT[ord(_b)] = ord(_b), ord(_a)
+
+
+# 길이 length의 무작위 ACGT 서열을 chunk_size씩 ASCII uint8 배열로 yield
+def iter_genome_chunks(length: int, rng: np.random.Generator, chunk_size: int = GENOME_CHUNK):
+    for start in range(0, length, chunk_size):
+        size = min(chunk_size, length - start)
+        yield BASE_BYTES[rng.integers(0, 4, size=size, dtype=np.uint8)]
+
+
+# 무작위 reference를 파일에 chunk 단위로 기록 (줄바꿈 없이 한 줄)
+def write_genome(filename: str, length: int, seed=None, chunk_size: int = GENOME_CHUNK) -> None:
+    rng = np.random.default_rng(seed)
+    with open(filename, "wb") as f:
+        for chunk in iter_genome_chunks(length, rng, chunk_size):
+            f.write(chunk.tobytes())
+
+
+# 한 줄짜리 reference 텍스트 파일을 복사 없이 uint8 배열(memmap)로 열기 (끝의 공백/줄바꿈 제외)
+def open_reference(filename: str) -> np.ndarray:
+    data = np.memmap(filename, dtype=np.uint8, mode="r")
+    end = len(data)
+    while end and data[end - 1] in b" \t\r\n":
+        end -= 1
+    return data[:end]
+
+
+# read 위치별 변이 확률: 양 끝 END_LENGTH 염기는 END_FACTOR배
+def damage_profile(read_len: int, mutation_rate: float) -> np.ndarray:
+    prob = np.full(read_len, mutation_rate)
+    prob[:END_LENGTH] *= END_FACTOR
+    prob[max(END_LENGTH, read_len - END_LENGTH):] *= END_FACTOR
+    return prob
+
+
+# reference(ASCII uint8 배열)에서 read를 무작위로 잘라 말단 손상(C->T, G->A)을 넣은 뒤
+# (reads: (m, read_len) ASCII 배열, 시작 위치, read별 변이 수, 역상보 가닥 여부)를 chunk_size개씩 yield
+# 역상보 read는 잘라낸 구간을 역상보로 뒤집은 뒤 손상을 넣음 (손상은 시퀀싱된 분자 기준)
+# reverse_fraction=0이면 난수를 더 쓰지 않으므로 같은 seed의 기존 결과와 같음
+def iter_ancient_read_chunks(reference: np.ndarray, read_len: int, num_reads: int, mutation_rate: float,
+                             rng: np.random.Generator, chunk_size: int = READ_CHUNK, reverse_fraction: float = 0.0):
+    if len(reference) < read_len:
+        raise ValueError(f"reference 길이({len(reference)})가 read 길이({read_len})보다 짧습니다")
+    prob = damage_profile(read_len, mutation_rate)
+    offsets = np.arange(read_len, dtype=np.int64)
+    for done in range(0, num_reads, chunk_size):
+        m = min(chunk_size, num_reads - done)
+        starts = rng.integers(0, len(reference) - read_len + 1, size=m, dtype=np.int64)
+        reads = np.asarray(reference[starts[:, None] + offsets])
+        reverse = np.zeros(m, dtype=bool)
+        if reverse_fraction > 0:
+            reverse = rng.random(m) < reverse_fraction
+            reads[reverse] = _COMPLEMENT[reads[reverse, ::-1]]
+        mutated = rng.random((m, read_len)) < prob
+        damaged = _DAMAGE[reads]
+        is_ct_ga = damaged != reads
+        random_bases = BASE_BYTES[rng.integers(0, 4, size=(m, read_len), dtype=np.uint8)]
+        reads = np.where(mutated, np.where(is_ct_ga, damaged, random_bases), reads)
+        yield reads, starts, mutated.sum(axis=1), reverse
+
+
+# read / 정답 위치 파일을 chunk 단위로 기록하고 생성한 read 수 반환
+# strand_file이 주어지면 read별 가닥(+ / -)을 한 줄에 하나씩 기록 (truth_file 형식은 바뀌지 않음)
+def write_ancient_reads(reference_file: str, reads_file: str, truth_file: str, read_len: int = 100,
+                        num_reads: int = 100000, mutation_rate: float = 0.01, seed=None,
+                        chunk_size: int = READ_CHUNK, reverse_fraction: float = 0.0, strand_file: str = None) -> int:
+    rng = np.random.default_rng(seed)
+    reference = open_reference(reference_file)
+    newline = np.full((1, 1), ord("\n"), dtype=np.uint8)
+    written = 0
+    with open(reads_file, "wb") as f_reads, open(truth_file, "w") as f_truth, \
+            open(strand_file or os.devnull, "w") as f_strand:
+        for reads, starts, _, reverse in iter_ancient_read_chunks(reference, read_len, num_reads, mutation_rate,
+                                                                  rng, chunk_size, reverse_fraction):
+            f_reads.write(np.hstack((reads, np.repeat(newline, len(reads), axis=0))).tobytes())
+            f_truth.write("\n".join(map(str, starts.tolist())) + "\n")
+            if strand_file:
+                f_strand.write("\n".join("-" if r else "+" for r in reverse.tolist()) + "\n")
+            written += len(reads)
+    return written
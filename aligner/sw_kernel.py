@@ -0,0 +1,178 @@
+# 벡터화된 Smith-Waterman (local alignment, linear gap) 커널
+#
+# 한 행(read의 i번째 염기)씩 진행 (전체 DP는 이전 행과 현재 행 두 줄만 유지)
+#   D[j] = max(0, H[i-1][j-1] + s(i, j), H[i-1][j] + gap)
+#   H[j] = max(D[j], H[j-1] + gap)  ->  H[j] = j*gap + cummax_{t<=j}(D[t] - t*gap)
+# 같은 행 안의 왼쪽 의존성을 누적 최댓값(np.maximum.accumulate)으로 풀어 행 전체를 한 번에 계산하고,
+# 여러 후보 window를 행렬의 행으로 묶어 한 read를 여러 window와 동시에 점수 계산함
+#
+# band가 주어지면 대각선 주변 |j - i| <= band 칸만 계산 (read는 indel이 적으므로 window 시작과 거의 같은 대각선 위에 있음)
+# band 행은 (read 길이) x (2 * band + 1) 크기뿐이므로 모두 보관했다가 최댓값 위치를 한 번에 찾음
+# band 좌표 d = j - i + band 에서 diag -> 같은 d, up -> d + 1, left -> d - 1
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from aligner.dna import encode_bases
+
+_NEG = -(1 << 30)
+
+STOP, DIAG, UP, LEFT = 0, 1, 2, 3
+
+
+def _as_codes(seq) -> np.ndarray:
+    return encode_bases(seq) if isinstance(seq, (str, bytes)) else np.asarray(seq, dtype=np.uint8)
+
+
+# 전체 DP: read 하나와 window 행렬 (m, n)의 점수. 반환: (점수, 끝 위치 i, 끝 위치 j) 각각 (m,) 배열
+def _full_scores(read, windows, match, mismatch, gap, keep_trace=False):
+    m, n = windows.shape
+    ramp = np.arange(n + 1, dtype=np.int64) * gap
+    prev = np.zeros((m, n + 1), dtype=np.int64)
+    best = np.zeros(m, dtype=np.int64)
+    best_i = np.zeros(m, dtype=np.int64)
+    best_j = np.zeros(m, dtype=np.int64)
+    trace = np.zeros((len(read) + 1, m, n + 1), dtype=np.uint8) if keep_trace else None
+
+    for i in range(1, len(read) + 1):
+        sub = np.where(windows == read[i - 1], match, mismatch)
+        diag = prev[:, :-1] + sub
+        up = prev[:, 1:] + gap
+        d = np.zeros((m, n + 1), dtype=np.int64)
+        d[:, 1:] = np.maximum(np.maximum(diag, up), 0)
+        cur = np.maximum.accumulate(d - ramp, axis=1) + ramp
+
+        if keep_trace:
+            t = np.full((m, n + 1), LEFT, dtype=np.uint8)
+            t[:, 1:][cur[:, 1:] == up] = UP
+            t[:, 1:][cur[:, 1:] == diag] = DIAG
+            t[cur == 0] = STOP
+            trace[i] = t
+
+        row_best = cur.argmax(axis=1)
+        row_max = cur[np.arange(m), row_best]
+        better = row_max > best
+        best = np.where(better, row_max, best)
+        best_i = np.where(better, i, best_i)
+        best_j = np.where(better, row_best, best_j)
+        prev = cur
+    return best, best_i, best_j, trace
+
+
+# banded DP: 계산 칸 수가 (read 길이) x (2 * band + 1)로 제한됨
+# 행마다 반복되는 numpy 호출을 줄이기 위해 치환 점수와 band 밖 mask를 미리 한 번에 계산
+def _banded_scores(read, windows, band, match, mismatch, gap, keep_trace=False):
+    m, n = windows.shape
+    L = len(read)
+    width = 2 * band + 1
+    ramp = np.arange(width, dtype=np.int32) * gap
+    # window 앞뒤에 band만큼 여유를 둬서 각 행의 band 구간을 sliding view로 가져옴 (범위 밖은 255)
+    # i번째 행의 band 칸 d는 window[i - 1 + d - band] == padded[i - 1 + d]
+    padded = np.full((m, max(n, L) + 2 * band + 1), 255, dtype=np.uint8)
+    padded[:, band:band + n] = windows
+    bands = sliding_window_view(padded, width, axis=1)[:, :L]  # (m, L, width)
+    sub = np.where(bands == read[None, :, None], match, mismatch).astype(np.int32)
+    j = np.arange(1, L + 1)[:, None] + np.arange(width)[None, :] - band  # (L, width)
+    valid = ((j >= 1) & (j <= n)).astype(np.int32)
+
+    rows = np.zeros((L + 1, m, width), dtype=np.int32)
+    up = np.full((m, width), _NEG, dtype=np.int32)
+    trace = np.zeros((L + 1, m, width), dtype=np.uint8) if keep_trace else None
+
+    for i in range(1, L + 1):
+        prev = rows[i - 1]
+        diag = prev + sub[:, i - 1]
+        up[:, :-1] = prev[:, 1:] + gap
+        d = np.maximum(np.maximum(diag, up), 0)
+        d *= valid[i - 1]
+        cur = np.maximum.accumulate(d - ramp, axis=1) + ramp
+        cur *= valid[i - 1]
+        rows[i] = cur
+
+        if keep_trace:
+            t = np.full((m, width), LEFT, dtype=np.uint8)
+            t[cur == up] = UP
+            t[cur == diag] = DIAG
+            t[cur == 0] = STOP
+            trace[i] = t
+
+    # 행 우선 순서로 처음 나타나는 최댓값 위치 (smith_waterman의 strict > 갱신과 같음)
+    flat = rows.transpose(1, 0, 2).reshape(m, -1)
+    arg = flat.argmax(axis=1)
+    best = flat[np.arange(m), arg].astype(np.int64)
+    best_i = arg // width
+    best_j = best_i + arg % width - band
+    best_i = np.where(best > 0, best_i, 0)
+    best_j = np.where(best > 0, best_j, 0)
+    return best, best_i, best_j, trace
+
+
+# read 하나를 여러 window와 한 번에 정렬해 window별 (최고 점수, 끝 위치 i, 끝 위치 j) 반환
+# windows: 길이가 같은 window들의 염기 코드 행렬 (m, n) 또는 문자열 리스트
+# band=None이면 전체 DP, 정수이면 |j - i| <= band 인 칸만 계산
+def sw_score_batch(read, windows, match_score=2, mismatch_penalty=-1, gap_penalty=-2, band=None):
+    read = _as_codes(read)
+    if not isinstance(windows, np.ndarray):
+        windows = np.array([_as_codes(w) for w in windows], dtype=np.uint8).reshape(len(windows), -1)
+    if windows.ndim == 1:
+        windows = windows[None, :]
+    if band is None:
+        best, bi, bj, _ = _full_scores(read, windows, match_score, mismatch_penalty, gap_penalty)
+    else:
+        best, bi, bj, _ = _banded_scores(read, windows, band, match_score, mismatch_penalty, gap_penalty)
+    return best, bi, bj
+
+
+# 한 쌍의 점수와 끝 위치. smith_waterman(seq1, seq2)와 같은 (max_score, (i, j)) 형식
+def sw_score(seq1, seq2, match_score=2, mismatch_penalty=-1, gap_penalty=-2, band=None):
+    best, bi, bj = sw_score_batch(seq1, _as_codes(seq2)[None, :], match_score, mismatch_penalty, gap_penalty, band)
+    return int(best[0]), (int(bi[0]), int(bj[0]))
+
+
+# 한 쌍의 정렬 + traceback. 반환: (점수, window 시작, window 끝, CIGAR)
+# CIGAR: M(match/mismatch), I(read에만 있음), D(window에만 있음), S(정렬되지 않은 read 양 끝)
+def sw_align(seq1, seq2, match_score=2, mismatch_penalty=-1, gap_penalty=-2, band=None):
+    read = _as_codes(seq1)
+    window = _as_codes(seq2)[None, :]
+    if band is None:
+        best, bi, bj, trace = _full_scores(read, window, match_score, mismatch_penalty, gap_penalty, keep_trace=True)
+    else:
+        best, bi, bj, trace = _banded_scores(read, window, band, match_score, mismatch_penalty, gap_penalty, keep_trace=True)
+
+    score, i, j = int(best[0]), int(bi[0]), int(bj[0])
+    if score == 0:
+        return 0, 0, 0, f"{len(read)}S" if len(read) else ""
+    end_i, end_j = i, j
+    ops = []
+    while i > 0 and j > 0:
+        col = j if band is None else j - i + band
+        move = trace[i, 0, col]
+        if move == STOP:
+            break
+        if move == DIAG:
+            ops.append("M")
+            i, j = i - 1, j - 1
+        elif move == UP:
+            ops.append("I")
+            i -= 1
+        else:
+            ops.append("D")
+            j -= 1
+
+    ops.reverse()
+    cigar = []
+    if i > 0:
+        cigar.append(f"{i}S")
+    run_op, run_len = None, 0
+    for op in ops:
+        if op == run_op:
+            run_len += 1
+        else:
+            if run_op is not None:
+                cigar.append(f"{run_len}{run_op}")
+            run_op, run_len = op, 1
+    if run_op is not None:
+        cigar.append(f"{run_len}{run_op}")
+    if end_i < len(read):
+        cigar.append(f"{len(read) - end_i}S")
+    return score, j, end_j, "".join(cigar)
@@ -1,22 +1,22 @@
-import random
-def generate_artificial_elephant_genome(length=3000000000):
-    """
-    코끼리 유전체처럼 보이는 염기서열을 인위적으로 생성한다.
-    Parameters:
-        length (int): 생성할 유전체 길이
-    Returns:
-        str: 랜덤으로 생성된 ACGT 시퀀스 문자열
-    """
-    bases = ['A', 'C', 'G', 'T']
-    genome = ''.join(random.choices(bases, k=length))
-    return genome
+import argparse
+import os
+import sys
 
-def save_reference_as_txt(sequence, filename="3_3_reference_100M.txt"):
-    with open(filename, "w") as f:
-        f.write(sequence)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from aligner.simulator import GENOME_CHUNK, write_genome  # noqa: E402
 
 
-# 100만 bp짜리 유전체 생성
-genome_seq = generate_artificial_elephant_genome(length=100000000)
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="인공 reference 유전체 생성 (chunk 단위로 파일에 바로 기록)")
+    parser.add_argument("--length", type=int, default=100000000, help="유전체 길이 (기본 100M bp)")
+    parser.add_argument("--seed", type=int, help="난수 seed (같은 seed면 같은 서열)")
+    parser.add_argument("--out", default="3_3_reference_100M.txt", help="저장할 파일")
+    parser.add_argument("--chunk-size", type=int, default=GENOME_CHUNK, help="한 번에 생성할 염기 수")
+    args = parser.parse_args(argv)
 
-save_reference_as_txt(genome_seq)
\ No newline at end of file
+    # 1억 bp짜리 유전체 생성 (메모리는 chunk 크기만큼만 사용)
+    write_genome(args.out, args.length, seed=args.seed, chunk_size=args.chunk_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,59 +1,30 @@
-import random
-
-# reference txt 파일 불러오기
-def load_reference(filename="3_3_reference_100M.txt"):
-    with open(filename, "r") as f:
-        return f.read().strip()  # 줄바꿈 제거
-
-# 고대 DNA read 생성 함수
-def simulate_ancient_reads(reference_seq, read_len=100, num_reads=100000, mutation_rate=0.01):
-    """
-    reference_seq에서 M개의 read를 랜덤하게 자르고,
-    고대 DNA 특성에 따라 read 말단에 C→T, G→A 변이를 삽입합니다.
-    """
-    reads = []
-    truth = []
-    print(len(reference_seq))
-    for i in range(num_reads):
-        start = random.randint(0, len(reference_seq) - read_len)
-        original = list(reference_seq[start:start + read_len])
-        mutated = []
-        mutation_count = 0
-
-        for j in range(read_len):
-            prob = mutation_rate
-            if j < 5 or j >= read_len - 5:
-                prob *= 5  # 말단에서 변이 확률 증가
-
-            base = original[j]
-            if random.random() < prob:
-                if base == 'C':
-                    mutated.append('T')
-                elif base == 'G':
-                    mutated.append('A')
-                else:
-                    mutated.append(random.choice(['A', 'C', 'G', 'T']))
-                mutation_count += 1
-            else:
-                mutated.append(base)
-
-        read_str = ''.join(mutated)
-        reads.append(read_str)
-        truth.append((f'read_{i}', start, mutation_count))
-    return reads, truth
-
-# reference 불러오기
-reference = load_reference("3_3_reference_100M.txt")
-
-# read 생성
-reads, ground_truth = simulate_ancient_reads(reference)
-
-# read 저장
-with open("3_3_mammoth_reads_100K.txt", "w") as f:
-    for read in reads:
-        f.write(read + "\n")
-
-# ground_truth (index만) 저장
-with open("3_3_ground_truth_100K.txt", "w") as f:
-    for _, pos, _ in ground_truth:
-        f.write(f"{pos}\n")
\ No newline at end of file
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from aligner.simulator import READ_CHUNK, write_ancient_reads  # noqa: E402
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="고대 DNA read 시뮬레이션 (chunk 단위로 파일에 바로 기록)")
+    parser.add_argument("--reference", default="3_3_reference_100M.txt", help="reference 파일 (한 줄)")
+    parser.add_argument("--reads-out", default="3_3_mammoth_reads_100K.txt", help="read 저장 파일")
+    parser.add_argument("--truth-out", default="3_3_ground_truth_100K.txt", help="정답 위치 저장 파일")
+    parser.add_argument("--read-len", type=int, default=100)
+    parser.add_argument("--num-reads", type=int, default=100000)
+    parser.add_argument("--mutation-rate", type=float, default=0.01, help="염기당 변이 확률 (말단은 5배)")
+    parser.add_argument("--seed", type=int, help="난수 seed (같은 seed면 같은 read)")
+    parser.add_argument("--chunk-size", type=int, default=READ_CHUNK, help="한 번에 생성할 read 수")
+    parser.add_argument("--reverse-fraction", type=float, default=0.0, help="역상보 가닥에서 만들 read 비율 (0~1)")
+    parser.add_argument("--strand-out", help="read별 가닥(+ / -)을 기록할 파일")
+    args = parser.parse_args(argv)
+
+    # read 생성 + read / ground_truth (index만) 저장
+    written = write_ancient_reads(args.reference, args.reads_out, args.truth_out, read_len=args.read_len,
+                                  num_reads=args.num_reads, mutation_rate=args.mutation_rate,
+                                  seed=args.seed, chunk_size=args.chunk_size,
+                                  reverse_fraction=args.reverse_fraction, strand_file=args.strand_out)
+    print(f"{written} reads -> {args.reads_out}, {args.truth_out}")
+
+if __name__ == "__main__":
+    main()
@@ -1,29 +1,42 @@
 # suffix_array 알고리즘
 # 2021111930 전유민
 
+import argparse
+import itertools
+import os
+import sys
 import time
-import functools # 비교 함수를 정렬에 사용할 수 있게 변환하는 데 사용 (cmp_to_key)
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from aligner import checkpoint as checkpoint_io  # noqa: E402
+from aligner import fast_path  # noqa: E402
+from aligner import instrument  # noqa: E402
+from aligner.index_store import load_or_build_index  # noqa: E402
+from aligner.packed_sequence import PackedSequence, count_mismatches  # noqa: E402
+from aligner.pileup import Pileup  # noqa: E402
+from aligner.sa_search import SuffixArraySearcher, sa_range  # noqa: E402
+from aligner.dna import decode_bases, encode_bases, reverse_complement  # noqa: E402
+from aligner.read_io import LineWriter, iter_positions, iter_reads, iter_records  # noqa: E402
+from aligner import results as results_io  # noqa: E402
+from aligner.results import FLAG_REVERSE, AlignmentResults, estimate_mapq  # noqa: E402
+from aligner.sa_builder import build_suffix_array as build_suffix_array_with  # noqa: E402
 
 # 주어진 문자열의 접미사를 사전 순으로 정렬한 suffix array 생성
-def build_suffix_array(text: str) -> list:
-    # i번째 접미사와 j번째 접미사를 비교
-    def compare(i, j):
-        while i < len(text) and j < len(text):
-            # 문자 다르면 사전순 비교
-            if text[i] != text[j]:
-                return -1 if text[i] < text[j] else 1
-            i += 1
-            j += 1
-        # 한쪽이 먼저 끝난 경우 비교 결과 처리
-        if i == len(text) and j != len(text):
-            return -1
-        elif j == len(text) and i != len(text):
-            return 1
-        else:
-            return 0
+# method: "auto"(divsufsort, 없으면 numpy doubling) / "divsufsort" / "doubling" / "reference"(기존 비교 정렬)
+def build_suffix_array(text: str, method: str = "auto") -> np.ndarray:
+    return build_suffix_array_with(text, method=method)
 
-    # 접미사 시작 위치(index)들을 사전 순으로 정렬
-    return sorted(range(len(text)), key=functools.cmp_to_key(compare))
+# reference 전체의 suffix array를 index 파일에서 로딩 (reference checksum이 다르거나 파일이 없으면 새로 생성)
+# SA는 A/C/G/T/N 대문자로 정규화한 서열로 만들고, index의 2-bit 압축 reference와 함께 (sa, PackedSequence) 반환
+# (reference 원문은 index를 새로 만들 때만 읽음. 정렬은 memmap된 압축 reference에서 바로 진행)
+def load_suffix_array_index(ref_file: str, index_file: str, reference: str = None, method: str = "auto", force: bool = False) -> tuple:
+    def build(ref):
+        return {"sa": build_suffix_array(decode_bases(encode_bases(ref)), method=method)}
+
+    idx = load_or_build_index(index_file, ref_file, "sa", {"alphabet": "ACGTN"}, build, reference=reference, force=force)
+    return idx["sa"], PackedSequence.from_index(idx)
 
 # pattern과 reference의 특정 위치 substring을 사전 순으로 비교
 def compare_pattern_with_mammoth(text: str, pos: int, pattern: str) -> int:
@@ -34,180 +47,336 @@ def compare_pattern_with_mammoth(text: str, pos: int, pattern: str) -> int:
     return -1 if ref_chunk < pattern else 1
 
 # suffix array를 이용해 정확히 일치하는 pattern의 위치 리스트 반환
-def search_exact_matches_in_mammoth(sa: list, text: str, pattern: str) -> list:
-    n = len(sa)
-
-    # lower bound (pattern 이상인 첫 위치) 찾기
-    left, right = 0, n
-    while left < right:
-        mid = (left + right) // 2
-        if compare_pattern_with_mammoth(text, sa[mid], pattern) < 0:
-            left = mid + 1
-        else:
-            right = mid
-    lower = left
-
-    # upper bound (pattern 초과인 첫 위치) 찾기
-    left, right = 0, n
-    while left < right:
-        mid = (left + right) // 2
-        if compare_pattern_with_mammoth(text, sa[mid], pattern) <= 0:
-            left = mid + 1
-        else:
-            right = mid
-    upper = left
-
+# (LCP 가속 이진 탐색으로 구간을 찾은 뒤 위치로 변환. 구간만 필요하면 sa_range 사용)
+def search_exact_matches_in_mammoth(sa: np.ndarray, text: str, pattern: str) -> list:
+    lower, upper = sa_range(sa, text, pattern)
     # 정렬된 suffix array에서 pattern과 정확히 일치하는 위치들 반환
-    return [sa[i] for i in range(lower, upper)]
+    return sa[lower:upper].tolist()
 
 # 두 문자열 간의 mismatch 개수 반환
 def count_mismatches_in_bases(s1: str, s2: str) -> int:
-    # 같은 위치의 문자가 다를 때 count
-    return sum(1 for a, b in zip(s1, s2) if a != b)
+    # 같은 위치의 문자가 다를 때 count (numpy 벡터 비교)
+    return count_mismatches(s1, s2)
 
-# 하나의 read를 reference에 정렬, 최대 k mismatch 허용
-def align_read_to_mammoth_reference(sa: list, reference: str, read: str, k: int) -> int:
-    read_len = len(read)
+# read를 k+1개 chunk로 나눈 (시작, 끝) 목록 (마지막 chunk가 나머지를 포함, 빈 chunk는 제외)
+def pigeonhole_chunks(read_len: int, k: int) -> list:
     num_chunks = k + 1  # pigeonhole 원리: 하나는 무조건 맞아야 하므로 k+1 개로 쪼갬
     chunk_size = read_len // num_chunks
-    candidates = set()  # 후보 시작 위치 저장
-
-    # read를 여러 chunk로 나누고, 각 chunk에 대해 exact match 검색
+    chunks = []
     for i in range(num_chunks):
         chunk_start = i * chunk_size
         chunk_end = read_len if i == num_chunks - 1 else (i + 1) * chunk_size
+        if chunk_end > chunk_start:
+            chunks.append((chunk_start, chunk_end))
+    return chunks
+
+# pigeonhole 원리로 read를 k+1개 chunk로 나눠 exact match를 찾고, 후보 시작 위치 집합 반환
+def collect_pigeonhole_candidates(sa: np.ndarray, reference: str, read: str, k: int) -> set:
+    read_len = len(read)
+    candidates = set()  # 후보 시작 위치 저장
+
+    # read를 여러 chunk로 나누고, 각 chunk에 대해 exact match 검색
+    for chunk_start, chunk_end in pigeonhole_chunks(read_len, k):
         chunk = read[chunk_start:chunk_end]
-        if not chunk:
-            continue
 
-        # suffix array에서 exact match 위치 찾기
-        matches = search_exact_matches_in_mammoth(sa, reference, chunk)
+        # suffix array에서 exact match 구간 찾기
+        lower, upper = sa_range(sa, reference, chunk)
 
-        for match_pos in matches:
+        for match_pos in sa[lower:upper].tolist():
             # read 전체가 시작될 수 있는 위치 환산
             candidate_pos = match_pos - chunk_start
             if candidate_pos < 0 or candidate_pos + read_len > len(reference):
                 continue
             candidates.add(candidate_pos)
-
-    # 후보 위치들 중에서 실제 mismatch 가장 적은 위치 선택
-    best_pos = -1
-    min_mismatches = k + 1  # 초기값은 허용 범위 밖
-    for pos in candidates:
-        segment = reference[pos : pos + read_len]
-        mismatch_count = count_mismatches_in_bases(segment, read)
-        if mismatch_count < min_mismatches:
-            min_mismatches = mismatch_count
-            best_pos = pos
-            # 완전히 일치하면 바로 종료
-            if mismatch_count == 0:
-                break
-
-    # best_pos 반환 (k 이내 mismatch일 경우만)
-    return best_pos if min_mismatches <= k else -1
-
-# reference를 블록 단위로 나누어 read 전체 정렬 수행
-def align_all_reads_to_mammoth_blocks(reference: str, reads: list, k: int, block_size: int = 500_000, overlap: int = 100) -> dict:
-    total_reads = len(reads)
-    alignments = {}  # 결과 저장: read index -> 위치
-    matched_flags = [False] * total_reads  # 이미 매칭된 read는 생략
-
-    # reference를 block_size 크기로 나누되, 블록 경계에는 overlap 추가
-    total_blocks = (len(reference) + block_size - 1) // block_size
-
-    for block_index in range(total_blocks):
-        block_start = block_index * block_size
-        block_end = min((block_index + 1) * block_size + overlap, len(reference))
-        ref_block = reference[block_start:block_end]
-
-        print(f"Block {block_index + 1}/{total_blocks} (위치 {block_start}~{block_end}) 처리 중")
-
-        # 현재 블록의 suffix array 생성
-        sa = build_suffix_array(ref_block)
-
-        for i, read in enumerate(reads):
-            if matched_flags[i]:
-                continue
-
-            # 해당 read를 현재 블록에 정렬 시도
-            pos_in_block = align_read_to_mammoth_reference(sa, ref_block, read, k)
-            if pos_in_block >= 0:
-                absolute_pos = block_start + pos_in_block
-                if absolute_pos + len(read) <= len(reference):
-                    alignments[i] = absolute_pos
-                    matched_flags[i] = True
-
-    # 정렬 실패한 read는 -1로 처리
-    for i in range(total_reads):
-        if not matched_flags[i]:
-            alignments[i] = -1
-
+    return candidates
+
+# 한 가닥(read 그대로)만 정렬한 (최적 위치, mismatch 수, 같은 mismatch 수의 위치 개수)
+def _best_hits_one_strand(sa: np.ndarray, reference: str, read: str, k: int, packed: PackedSequence = None) -> tuple:
+    positions = sorted(collect_pigeonhole_candidates(sa, reference, read, k))
+    if not positions:
+        return -1, k + 1, 0
+
+    if packed is not None:
+        mismatches = packed.hamming(read, positions)
+    else:
+        mismatches = np.array([count_mismatches_in_bases(reference[pos:pos + len(read)], read) for pos in positions])
+    best = int(np.argmin(mismatches))
+    best_mm = int(mismatches[best])
+    if best_mm > k:
+        return -1, k + 1, 0
+    return positions[best], best_mm, int(np.count_nonzero(mismatches == best_mm))
+
+# 정방향 / 역상보 결과 중 mismatch가 적은 쪽을 골라 (위치, mismatch 수, 동률 위치 개수, 역방향 여부) 반환
+# mismatch가 같으면 정방향 위치를 쓰고, 동률 위치 개수는 두 가닥을 합침
+def _pick_strand(forward: tuple, reverse: tuple) -> tuple:
+    if reverse[0] < 0 or (forward[0] >= 0 and forward[1] <= reverse[1]):
+        if reverse[0] >= 0 and forward[1] == reverse[1]:
+            return forward[0], forward[1], forward[2] + reverse[2], False
+        return forward + (False,)
+    return reverse + (True,)
+
+# 하나의 read를 reference 전체에 정렬해 (최적 위치, mismatch 수, 같은 mismatch 수의 위치 개수, 역방향 여부) 반환
+# 최적 위치는 mismatch가 가장 적은 위치 중 가장 앞 위치. k mismatch 이내 위치가 없으면 (-1, k + 1, 0, False)
+# packed: reference의 PackedSequence. 주어지면 후보 위치 전체를 한 번에 비교
+# both_strands: 같은 suffix array에 역상보 read도 검색 (역방향 위치는 역상보 read의 시작 위치)
+def align_read_best_hits(sa: np.ndarray, reference: str, read: str, k: int, packed: PackedSequence = None,
+                         both_strands: bool = True) -> tuple:
+    forward = _best_hits_one_strand(sa, reference, read, k, packed=packed)
+    if not both_strands:
+        return forward + (False,)
+    return _pick_strand(forward, _best_hits_one_strand(sa, reference, reverse_complement(read), k, packed=packed))
+
+# 하나의 read를 reference에 정렬, 최대 k mismatch 허용 (best_pos 반환, 실패 시 -1)
+def align_read_to_mammoth_reference(sa: np.ndarray, reference: str, read: str, k: int, packed: PackedSequence = None,
+                                    both_strands: bool = True) -> int:
+    return align_read_best_hits(sa, reference, read, k, packed=packed, both_strands=both_strands)[0]
+
+# 여러 read를 한 번에 정렬해 read별 (위치, mismatch 수, 동률 위치 개수, 역방향 여부) 리스트 반환
+# both_strands면 역상보 read를 같은 batch에 넣어 index 하나로 양쪽 가닥을 한 번에 검색
+def align_reads_batch(searcher: SuffixArraySearcher, packed: PackedSequence, reads: list, k: int,
+                      both_strands: bool = True) -> list:
+    if not both_strands:
+        return [hit + (False,) for hit in _best_hits_batch(searcher, packed, reads, k)]
+    hits = _best_hits_batch(searcher, packed, list(reads) + [reverse_complement(read) for read in reads], k)
+    return [_pick_strand(forward, reverse) for forward, reverse in zip(hits[:len(reads)], hits[len(reads):])]
+
+# 한 가닥 batch 정렬: read별 (위치, mismatch 수, 동률 위치 개수)
+# 모든 read의 pigeonhole chunk를 모아 SuffixArraySearcher로 한 번에 검색하고,
+# 후보 위치 검증도 read 길이별로 묶어 한 번의 Hamming 계산으로 처리
+def _best_hits_batch(searcher: SuffixArraySearcher, packed: PackedSequence, reads: list, k: int) -> list:
+    n = len(packed)
+    patterns, owners, starts = [], [], []
+    for r, read in enumerate(reads):
+        for chunk_start, chunk_end in pigeonhole_chunks(len(read), k):
+            patterns.append(read[chunk_start:chunk_end])
+            owners.append(r)
+            starts.append(chunk_start)
+    results = [(-1, k + 1, 0)] * len(reads)
+    if not patterns:
+        return results
+
+    with instrument.stage("sa.search"):
+        lo, hi = searcher.batch_ranges(patterns)
+    instrument.count("sa.reads", len(reads))
+    instrument.count("sa.chunks", len(patterns))
+    counts = hi - lo
+    total = int(counts.sum())
+    if total == 0:
+        return results
+    # chunk 일치 위치 -> read 시작 위치 후보
+    hit_chunk = np.repeat(np.arange(len(patterns)), counts)
+    sa_idx = np.repeat(lo - (np.cumsum(counts) - counts), counts) + np.arange(total)
+    cand_pos = np.asarray(searcher.sa[sa_idx], dtype=np.int64) - np.asarray(starts, dtype=np.int64)[hit_chunk]
+    cand_owner = np.asarray(owners, dtype=np.int64)[hit_chunk]
+    read_lens = np.array([len(read) for read in reads], dtype=np.int64)
+    keep = (cand_pos >= 0) & (cand_pos + read_lens[cand_owner] <= n)
+    # read별로 (read, 위치) 정렬 + 중복 제거
+    pairs = np.unique(np.stack((cand_owner[keep], cand_pos[keep]), axis=1), axis=0)
+    instrument.observe_many("sa.candidates", np.bincount(pairs[:, 0], minlength=len(reads)).tolist())
+
+    for length in np.unique(read_lens[pairs[:, 0]]) if len(pairs) else []:
+        group = pairs[read_lens[pairs[:, 0]] == length]
+        owner, pos = group[:, 0], group[:, 1]
+        read_rows, inverse = np.unique(owner, return_inverse=True)
+        read_codes = np.stack([encode_bases(reads[r]) for r in read_rows])
+        with instrument.stage("sa.verify"):
+            mismatches = np.count_nonzero(packed.windows(pos, int(length)) != read_codes[inverse], axis=1)
+        best_mm = np.full(len(read_rows), np.iinfo(np.int64).max)
+        np.minimum.at(best_mm, inverse, mismatches)
+        is_best = mismatches == best_mm[inverse]
+        # 위치 오름차순이므로 처음 나오는 최적 위치가 가장 앞 위치
+        first_rows, first_idx = np.unique(inverse[is_best], return_index=True)
+        num_best = np.bincount(inverse[is_best], minlength=len(read_rows))
+        best_pos = pos[is_best][first_idx]
+        for row, p in zip(first_rows, best_pos):
+            if best_mm[row] <= k:
+                results[int(read_rows[row])] = (int(p), int(best_mm[row]), int(num_best[row]))
+    return results
+
+# read 전체를 SA 구간 탐색 한 번으로 찾아 read별 align_reads_batch와 같은 결과 또는 None (reference에 그대로 없음)
+# (가장 앞 일치 위치, 0, 양쪽 가닥 일치 위치 개수, 역방향 여부). 정방향에 있으면 정방향 위치를 씀
+def exact_hits_batch(searcher: SuffixArraySearcher, reads: list, both_strands: bool = True) -> list:
+    n = len(reads)
+    queries = list(reads) + [reverse_complement(read) for read in reads] if both_strands else list(reads)
+    with instrument.stage("sa.exact"):
+        lo, hi = searcher.batch_ranges(queries)
+    counts = hi - lo
+    hits = []
+    for i in range(n):
+        reverse_count = int(counts[n + i]) if both_strands else 0
+        if counts[i] > 0:
+            hits.append((int(np.min(searcher.sa[lo[i]:hi[i]])), 0, int(counts[i]) + reverse_count, False))
+        elif reverse_count:
+            hits.append((int(np.min(searcher.sa[lo[n + i]:hi[n + i]])), 0, reverse_count, True))
+        else:
+            hits.append(None)
+    return hits
+
+# 병렬 정렬 worker에서 호출 (state는 fork로 상속되므로 pickle되지 않음)
+def _align_batch(state, reads):
+    searcher, packed, k, both_strands = state
+    return align_reads_batch(searcher, packed, reads, k, both_strands=both_strands)
+
+def _exact_batch(state, reads):
+    searcher, _, _, both_strands = state
+    return exact_hits_batch(searcher, reads, both_strands=both_strands)
+
+# 정렬에 쓰는 (SuffixArraySearcher, PackedSequence). 여러 번 정렬할 때 한 번만 만들어 iter_alignments에 넘길 수 있음
+# reference가 PackedSequence(load_suffix_array_index 결과)면 검색기도 압축 배열에서 바로 비교 (원문 복사본 없음)
+def prepare_searcher(reference, sa: np.ndarray) -> tuple:
+    if isinstance(reference, PackedSequence):
+        return SuffixArraySearcher(sa, reference), reference
+    return SuffixArraySearcher(sa, reference), PackedSequence.from_string(reference)
+
+# reference 전체 SA 하나로 reads(iterable)를 순서대로 정렬해 (위치, mismatch 수, 동률 위치 개수, 역방향 여부)를 yield
+# 각 read는 reference 전체에 대해 한 번만 검색되므로 처리량은 read 수에만 비례함 (스트리밍 가능)
+# prepared: prepare_searcher 결과 (없으면 새로 만듦)
+# 같은 서열의 read는 한 번만 정렬하고(dedup), reference에 그대로 있는 read는 read 전체 SA 구간으로 끝냄(exact)
+# tiers(aligner.fast_path.TierCounts)가 주어지면 read별로 결과를 낸 tier를 집계
+def iter_alignments(reference: str, reads, k: int, sa: np.ndarray, workers: int = 1, both_strands: bool = True,
+                    prepared: tuple = None, dedup: bool = True, exact: bool = True,
+                    tiers: fast_path.TierCounts = None):
+    searcher, packed = prepared or prepare_searcher(reference, sa)
+    state = (searcher, packed, k, both_strands)
+    return fast_path.map_batches_tiered(_align_batch, _exact_batch if exact else None, state, reads,
+                                        workers=workers, dedup=dedup, tiers=tiers)
+
+# read 전체 정렬. 예전처럼 reference를 블록으로 나눠 블록마다 read를 다시 검색하지 않고,
+# 전체 reference의 suffix array(sa, 없으면 생성) 하나에서 read마다 한 번에 전역 최적 위치를 찾음
+# 결과는 AlignmentResults (read별 위치 / mismatch 수 / MAPQ, 정렬 실패한 read는 위치 -1)
+# multimap(dict)이 주어지면 최적 위치가 여러 개인 read의 (read index -> 위치 개수)를 기록
+def align_all_reads_to_mammoth_blocks(reference: str, reads: list, k: int, sa: np.ndarray = None, sa_method: str = "auto", workers: int = 1, multimap: dict = None, both_strands: bool = True) -> AlignmentResults:
+    if sa is None:
+        sa = build_suffix_array(reference, method=sa_method)
+
+    alignments = AlignmentResults(len(reads))
+    hits = iter_alignments(reference, reads, k, sa, workers=workers, both_strands=both_strands)
+    for i, (read, (pos, mm, num_best, reverse)) in enumerate(zip(reads, hits)):
+        record_alignment(alignments, i, read, pos, mm, num_best, reverse)
+        if multimap is not None and num_best > 1:
+            multimap[i] = num_best
     return alignments
 
-# 정렬된 read들을 reference에 덮어써서 최종 서열 복원
-def rebuild_mammoth_with_aligned_reads(reference: str, reads: list, alignments: dict) -> str:
-    reference_list = list(reference)
+# 정렬 결과 하나를 AlignmentResults에 추가 (점수는 일치 염기 수)
+def record_alignment(alignments: AlignmentResults, read_id: int, read: str, pos: int, mm: int, num_best: int,
+                     reverse: bool = False) -> None:
+    score = len(read) - mm if pos >= 0 else 0
+    alignments.append(read_id, pos, score, mm if pos >= 0 else 0, estimate_mapq(pos, mm, num_best),
+                      FLAG_REVERSE if reverse else 0)
+
+# 정렬된 read들의 위치별 염기 count(pileup)로 consensus를 만들어 최종 서열 복원
+# (마지막 read가 덮어쓰는 대신 다수결, read 말단의 C->T / G->A 손상 의심 염기는 낮은 가중치)
+def rebuild_mammoth_with_aligned_reads(reference: str, reads: list, alignments: AlignmentResults) -> str:
     if not reads:
         return reference
 
-    read_len = len(reads[0])
-
-    for i, read in enumerate(reads):
-        pos = alignments.get(i, -1)
-        if pos < 0:
-            continue
-        # reference의 해당 위치를 read로 덮어씀
-        for j, base in enumerate(read):
-            if pos + j < len(reference_list):
-                reference_list[pos + j] = base
-
-    return "".join(reference_list)
+    pileup = Pileup(reference)
+    for read, pos, flags in zip(reads, alignments["pos"].tolist(), alignments["flags"].tolist()):
+        pileup.add(pos, reverse_complement(read) if flags & FLAG_REVERSE else read)
+    return str(pileup)
 
 # 전체 정렬 및 복원 작업 흐름
-def main():
+# read 파일을 스트리밍으로 읽어 정렬하고, 위치는 정렬되는 즉시 파일에 기록
+# 정렬 결과(AlignmentResults)로 정확도를 평가하고 반환. export_args가 있으면 결과 파일 / SAM / PAF 저장
+# both_strands=False면 역상보 가닥은 검색하지 않음
+# checkpoint_dir이 주어지면 checkpoint_every개 read마다 정렬 결과를 저장하고, 다시 실행하면 이어서 정렬
+# dedup / exact: 중복 read 접기 / exact fast path 사용 여부 (tier별 read 비율을 출력)
+def run_alignment(ref_file: str, read_file: str, truth_file: str, index_file: str = None, workers: int = 1,
+                  export_args=None, both_strands: bool = True, checkpoint_dir: str = None,
+                  checkpoint_every: int = checkpoint_io.CHECKPOINT_EVERY, dedup: bool = True,
+                  exact: bool = True) -> AlignmentResults:
     max_mismatches = 2           # 허용 mismatch 개수
-    BLOCK_SIZE = 500_000         # reference 블록 크기
-    OVERLAP = 100                # 블록 경계 겹침
 
     start_time = time.time()
 
-    # reference, read, 정답 위치 로드
-    with open("../genome_generation/3_1_reference_1M.txt", "r") as f_ref:
-        reference = f_ref.read().strip()
-    with open("../genome_generation/3_1_mammoth_reads_100K.txt", "r") as f_reads:
-        reads = [line.strip() for line in f_reads if line.strip()]
-    with open("../genome_generation/3_1_ground_truth_100K.txt", "r") as f_gt:
-        ground_truth = [int(line.strip()) for line in f_gt if line.strip()]
-
-    # 전체 read 정렬
-    alignments = align_all_reads_to_mammoth_blocks(reference, reads, max_mismatches, block_size=BLOCK_SIZE, overlap=OVERLAP)
-
-    # 정확도 평가
-    total_reads = len(reads)
-    correct_matches = 0
-    for i, true_pos in enumerate(ground_truth):
-        predicted_pos = alignments.get(i, -1)
-        if predicted_pos == true_pos:
-            correct_matches += 1
-    accuracy = correct_matches / total_reads * 100
-
-    print(f"Alignment accuracy: {accuracy:.2f}%\n")
-
-    # read로 reference 복원
-    reconstructed = rebuild_mammoth_with_aligned_reads(reference, reads, alignments)
-
-    # 복원 결과 저장
-    with open("reconstructed_mammoth_dna.txt", "w") as f_out:
-        f_out.write(reconstructed)
+    # read는 스트리밍 (plain / FASTA / FASTQ, .gz 가능)
+    reads = iter_reads(read_file)
+
+    # 전체 reference suffix array와 2-bit 압축 reference 로딩 (index 파일 재사용, 원문은 index를 만들 때만 읽음)
+    sa, reference = load_suffix_array_index(ref_file, index_file or ref_file + ".sa.idx")
+    prepared = prepare_searcher(reference, sa)
+
+    # 전체 read 정렬 + 정확도 평가 + read로 reference 복원을 한 번에 진행
+    reads, reads_to_align = itertools.tee(reads)  # 정렬이 앞서 읽은 만큼만 버퍼링됨
+    checkpoint = checkpoint_io.open_checkpoint(checkpoint_dir, ref_file, read_file, checkpoint_every, method="sa",
+                                               max_mismatches=max_mismatches, both_strands=both_strands)
+    tiers = fast_path.TierCounts()
+    alignments = checkpoint_io.iter_checkpointed(
+        lambda rest: iter_alignments(reference, rest, max_mismatches, sa, workers=workers, both_strands=both_strands,
+                                     prepared=prepared, dedup=dedup, exact=exact, tiers=tiers),
+        reads_to_align, checkpoint)
+    pileup = Pileup(reference)
+    results = AlignmentResults()
+    multimapped = reversed_reads = 0
+    # 각 read의 정렬 위치 출력
+    with LineWriter("read_alignment_positions.txt") as f_pos:
+        for i, (read, (predicted_pos, mm, num_best, reverse)) in enumerate(zip(reads, alignments)):
+            record_alignment(results, i, read, predicted_pos, mm, num_best, reverse)
+            if num_best > 1:
+                multimapped += 1
+            if reverse:
+                reversed_reads += 1
+            f_pos.write(predicted_pos)
+            pileup.add(predicted_pos, reverse_complement(read) if reverse else read)
+    correct_matches, total_reads = results.evaluate(iter_positions(truth_file))
+    accuracy = correct_matches / total_reads * 100 if total_reads else 0.0
+
+    print(f"Alignment accuracy: {accuracy:.2f}%")
+    print(f"동률 최적 위치가 여러 개인 read: {multimapped}/{total_reads}")
+    print(f"역상보 가닥에 정렬된 read: {reversed_reads}/{total_reads}")
+    print(f"Fast path tier: {tiers.summary()}\n")
+
+    # 복원 결과 저장 (consensus를 chunk 단위로 기록)
+    pileup.write_consensus("reconstructed_mammoth_dna.txt")
     print("복원된 mammoth DNA 시퀀스 저장 완료\n")
 
-    # 각 read의 정렬 위치 출력
-    with open("read_alignment_positions.txt", "w") as f_pos:
-        for i in range(total_reads):
-            f_pos.write(f"{alignments[i]}\n")
+    if export_args is not None:
+        results_io.export_from_args(export_args, results, lambda: iter_records(read_file),
+                                    os.path.basename(ref_file), len(reference))
 
     end_time = time.time()
     print(f"전체 실행 시간: {end_time - start_time:.2f}초")
+    return results
+
+# 인자 없이 실행하면 기본 데이터셋(3_1) 실행
+#   build-index REF [--index IDX]          : suffix array index 파일만 생성
+#   map REF READS TRUTH [--index IDX]      : index 파일을 재사용해 정렬
+#   --workers N                            : 정렬 프로세스 수
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Suffix array 기반 read 정렬 및 복원")
+    parser.add_argument("--workers", type=int, default=1, help="정렬 프로세스 수")
+    sub = parser.add_subparsers(dest="command")
+    p_build = sub.add_parser("build-index", help="suffix array index 파일 생성")
+    p_build.add_argument("reference")
+    p_build.add_argument("--index", help="index 파일 경로 (기본: <reference>.sa.idx)")
+    p_build.add_argument("--method", default="auto", help="auto / divsufsort / doubling / reference")
+    p_build.add_argument("--force", action="store_true", help="checksum이 같아도 다시 생성")
+    p_map = sub.add_parser("map", help="read 정렬 및 복원")
+    p_map.add_argument("reference")
+    p_map.add_argument("reads")
+    p_map.add_argument("truth")
+    p_map.add_argument("--index", help="index 파일 경로 (기본: <reference>.sa.idx)")
+    p_map.add_argument("--workers", type=int, default=argparse.SUPPRESS, help="정렬 프로세스 수")
+    p_map.add_argument("--forward-only", action="store_true", help="역상보 가닥은 검색하지 않음")
+    checkpoint_io.add_arguments(p_map)
+    fast_path.add_arguments(p_map)
+    instrument.add_arguments(p_map)
+    results_io.add_arguments(p_map)
+    args = parser.parse_args(argv)
+
+    if args.command == "build-index":
+        sa, _ = load_suffix_array_index(args.reference, args.index or args.reference + ".sa.idx", method=args.method, force=args.force)
+        print(f"  - Suffix array length: {len(sa)}")
+    elif args.command == "map":
+        with instrument.session_from_args(args):
+            run_alignment(args.reference, args.reads, args.truth, args.index, workers=args.workers, export_args=args,
+                          both_strands=not args.forward_only, checkpoint_dir=args.checkpoint,
+                          checkpoint_every=args.checkpoint_every, dedup=not args.no_dedup,
+                          exact=not args.no_exact)
+    else:
+        run_alignment("../genome_generation/3_1_reference_1M.txt",
+                      "../genome_generation/3_1_mammoth_reads_100K.txt",
+                      "../genome_generation/3_1_ground_truth_100K.txt", workers=args.workers)
 
 # 메인 실행 지점
 if __name__ == "__main__":
@@ -0,0 +1,37 @@
+# 테스트 공통 설정: 저장소 루트를 import 경로에 추가 (정렬 스크립트들과 같은 방식)하고 작은 무작위 서열을 만드는 fixture 제공
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+
+# random_sequence(length, alphabet="ACGT") -> 무작위 염기 문자열 (seed 고정)
+@pytest.fixture
+def random_sequence():
+    rng = np.random.default_rng(12345)
+
+    def make(length: int, alphabet: str = "ACGT") -> str:
+        letters = np.frombuffer(alphabet.encode("ascii"), dtype=np.uint8)
+        return letters[rng.integers(0, len(letters), length)].tobytes().decode("ascii")
+    return make
+
+
+# sample_reads(reference, n, length, mismatches=0) -> (reads, 시작 위치). read마다 무작위 위치에 mismatches개 치환
+@pytest.fixture
+def sample_reads():
+    rng = np.random.default_rng(54321)
+
+    def make(reference: str, n: int, length: int, mismatches: int = 0):
+        starts = rng.integers(0, len(reference) - length + 1, n).tolist()
+        reads = []
+        for start in starts:
+            read = bytearray(reference[start:start + length].upper(), "ascii")
+            for offset in rng.choice(length, mismatches, replace=False).tolist():
+                read[offset] = next(c for c in b"ACGT" if c != read[offset])
+            reads.append(read.decode("ascii"))
+        return reads, starts
+    return make
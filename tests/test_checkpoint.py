@@ -0,0 +1,66 @@
+import pytest
+
+from aligner.checkpoint import Checkpoint, iter_checkpointed
+from aligner.fm_index import FMIndex
+from aligner.scripts import load
+
+
+# count개 결과를 낸 뒤 KeyboardInterrupt (Ctrl-C로 중단된 실행)
+def interrupted(map_fn, count: int):
+    def run(reads):
+        for i, result in enumerate(map_fn(reads)):
+            if i == count:
+                raise KeyboardInterrupt
+            yield result
+    return run
+
+
+@pytest.fixture
+def mapping(random_sequence, sample_reads):
+    fm_script = load("fm")
+    text = random_sequence(20000)
+    reads, _ = sample_reads(text, 400, 60, mismatches=1)
+    fm = FMIndex.from_reference(text)
+    return lambda rest: fm_script.iter_map_reads(fm, rest, max_mismatch=2), reads
+
+
+# 중단 후 같은 key로 다시 실행하면 저장된 batch는 매핑하지 않고, 결과는 중단 없이 실행한 것과 같음
+def test_resume_after_interrupt(tmp_path, mapping):
+    map_fn, reads = mapping
+    expected = list(map_fn(reads))
+    key = {"params": {"max_mismatch": 2}}
+
+    checkpoint = Checkpoint(str(tmp_path), key, batch_size=50)
+    with pytest.raises(KeyboardInterrupt):
+        list(iter_checkpointed(interrupted(map_fn, 175), reads, checkpoint))
+    assert checkpoint.done == 150
+
+    mapped = []
+
+    def counting(rest):  # 실제로 매핑한 read 기록
+        rest = list(rest)
+        mapped.extend(rest)
+        return map_fn(rest)
+
+    resumed = Checkpoint(str(tmp_path), key, batch_size=50)
+    assert resumed.done == 150
+    assert list(iter_checkpointed(counting, reads, resumed)) == expected
+    assert mapped == reads[150:]
+    assert resumed.done == len(reads)
+
+    # 모든 batch가 저장된 뒤에는 매핑 없이 저장된 결과만 내보냄
+    mapped.clear()
+    assert list(iter_checkpointed(counting, reads, Checkpoint(str(tmp_path), key, batch_size=50))) == expected
+    assert mapped == []
+
+
+# key(입력 / 파라미터)가 다르면 이전 batch를 버리고 처음부터 매핑
+def test_changed_key_starts_over(tmp_path, mapping):
+    map_fn, reads = mapping
+    checkpoint = Checkpoint(str(tmp_path), {"params": {"max_mismatch": 2}}, batch_size=50)
+    with pytest.raises(KeyboardInterrupt):
+        list(iter_checkpointed(interrupted(map_fn, 120), reads, checkpoint))
+    assert checkpoint.done == 100
+    changed = Checkpoint(str(tmp_path), {"params": {"max_mismatch": 1}}, batch_size=50)
+    assert changed.done == 0 and changed.batches == []
+    assert list(iter_checkpointed(map_fn, reads, changed)) == list(map_fn(reads))
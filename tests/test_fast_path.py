@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+from aligner.dna import reverse_complement
+from aligner.fast_path import DUPLICATE, EXACT, FULL, TierCounts
+from aligner.fm_index import FMIndex
+from aligner.packed_sequence import PackedSequence
+from aligner.sa_builder import build_suffix_array
+from aligner.scripts import load
+
+
+# exact fast path는 reference가 str이어도 PackedSequence일 때와 같은 결과를 냄
+@pytest.mark.parametrize("exact", [True, False])
+def test_sw_str_reference(random_sequence, sample_reads, exact):
+    sw = load("sw")
+    text = random_sequence(20000)
+    reads, starts = sample_reads(text, 200, 100)
+    kmer_index = sw.build_kmer_index(text, 20)
+    mapped = sw.map_reads(text, reads, kmer_index, seed_len=20, exact=exact)
+    packed = sw.map_reads(PackedSequence.from_string(text), reads, kmer_index, seed_len=20, exact=exact)
+    assert mapped == packed
+    assert [pos for pos, _, _ in mapped] == starts
+
+
+# minimizer_match / minimizer_exact_match도 str reference를 받음
+@pytest.mark.parametrize("exact", [True, False])
+def test_minimizer_str_reference(random_sequence, sample_reads, exact):
+    minimizer = load("minimizer")
+    text = random_sequence(20000)
+    reads, starts = sample_reads(text, 200, 100, mismatches=1)
+    index = minimizer.build_minimizer_index(text, k=15, w=5)
+    mapped = minimizer.map_reads(text, index, reads, k=15, w=5, exact=exact)
+    packed = minimizer.map_reads(PackedSequence.from_string(text), index, reads, k=15, w=5, exact=exact)
+    assert mapped == packed
+    assert [pos for pos, _, _ in mapped] == starts
+
+
+# 정렬기별 매핑 함수 map(reads, dedup, exact, tiers) -> 결과 list
+def make_mapper(method: str, text: str):
+    if method == "sw":
+        sw = load("sw")
+        reference, kmer_index = PackedSequence.from_string(text), sw.build_kmer_index(text, 20)
+        return lambda reads, **options: list(sw.iter_map_reads(reference, reads, kmer_index, seed_len=20, **options))
+    if method == "minimizer":
+        minimizer = load("minimizer")
+        reference, index = PackedSequence.from_string(text), minimizer.build_minimizer_index(text, k=15, w=5)
+        return lambda reads, **options: list(minimizer.iter_map_reads(reference, index, reads, k=15, w=5,
+                                                                      **options))
+    if method == "sa":
+        sa_script = load("sa")
+        prepared = sa_script.prepare_searcher(text, build_suffix_array(text))
+        return lambda reads, **options: list(sa_script.iter_alignments(text, reads, 2, None, prepared=prepared,
+                                                                       **options))
+    fm_script, fm = load("fm"), FMIndex.from_reference(text)
+    return lambda reads, **options: list(fm_script.iter_map_reads(fm, reads, **options))
+
+
+# 중복 / 정확히 일치 / mismatch / 역상보 read가 섞인 입력 (반복 구간이 있어 동률 위치도 생김)
+def mixed_reads(text: str, sample_reads) -> list:
+    exact, _ = sample_reads(text, 150, 100)
+    mismatched, _ = sample_reads(text, 150, 100, mismatches=2)
+    reads = exact + mismatched + [reverse_complement(read) for read in exact[:50] + mismatched[:50]]
+    rng = np.random.default_rng(9)
+    reads += [reads[i] for i in rng.integers(0, len(reads), 200).tolist()]
+    return [reads[i] for i in rng.permutation(len(reads)).tolist()]
+
+
+# 중복 제거 / exact fast path를 켜도 모든 read를 full 경로로 매핑한 결과와 같음
+@pytest.mark.parametrize("method", ["sw", "minimizer", "sa", "fm"])
+def test_fast_path_matches_full_path(random_sequence, sample_reads, method):
+    unit = random_sequence(300)
+    text = random_sequence(8000) + unit + random_sequence(3000) + unit + random_sequence(8000)
+    mapper = make_mapper(method, text)
+    reads = mixed_reads(text, sample_reads)
+    full = mapper(reads, dedup=False, exact=False)
+    for dedup, exact in [(True, False), (False, True), (True, True)]:
+        tiers = TierCounts()
+        assert mapper(reads, dedup=dedup, exact=exact, tiers=tiers) == full
+        assert tiers.total == len(reads)
+        assert (tiers.counts[DUPLICATE] > 0) == dedup and (tiers.counts[EXACT] > 0) == exact
+        assert tiers.counts[FULL] > 0
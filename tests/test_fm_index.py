@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+
+from aligner.dna import reverse_complement
+from aligner.fm_index import FMIndex
+
+
+# pattern이 위치마다 몇 글자 다른지 (read / reference의 N은 항상 mismatch)
+def brute_mismatches(text: str, pattern: str) -> np.ndarray:
+    windows = np.frombuffer(text.encode("ascii"), dtype=np.uint8)
+    windows = np.lib.stride_tricks.sliding_window_view(windows, len(pattern))
+    mismatch = (windows != np.frombuffer(pattern.encode("ascii"), dtype=np.uint8)) | (windows == ord("N"))
+    return np.count_nonzero(mismatch, axis=1)
+
+
+# best_hits와 같은 규칙: 가장 적은 mismatch 수(max_mm 이하)에서 정방향 우선 -> 앞 위치, 동률 개수는 두 가닥 합
+def brute_best_hits(text: str, read: str, max_mm: int, both_strands: bool) -> tuple:
+    strands = [read, reverse_complement(read)] if both_strands else [read]
+    counts = [brute_mismatches(text, strand) for strand in strands]
+    best = min(int(c.min()) for c in counts)
+    if best > max_mm:
+        return -1, max_mm + 1, 0, False
+    hits = [np.flatnonzero(c == best) for c in counts]
+    reverse = len(hits[0]) == 0
+    return int(hits[int(reverse)][0]), best, sum(len(h) for h in hits), reverse
+
+
+def make_reads(text: str, rng, count: int = 80) -> list:
+    reads = []
+    for _ in range(count):
+        length = int(rng.integers(8, 30))
+        start = int(rng.integers(0, len(text) - length))
+        read = list(text[start:start + length])
+        for i in rng.choice(length, int(rng.integers(0, 4)), replace=False).tolist():
+            read[i] = "ACGTN"[int(rng.integers(0, 5))]
+        read = "".join(read)
+        reads.append(reverse_complement(read) if rng.random() < 0.4 else read)
+    return reads
+
+
+# 반복이 많은 reference (짧은 단위를 이어 붙인 뒤 일부 치환)로 동률 위치도 생기게 함
+@pytest.fixture
+def repetitive_text(random_sequence):
+    rng = np.random.default_rng(3)
+    units = [random_sequence(int(rng.integers(15, 40))) for _ in range(6)]
+    text = list("".join(units[int(i)] for i in rng.integers(0, len(units), 60)))
+    for i in rng.choice(len(text), len(text) // 50, replace=False).tolist():
+        text[i] = "ACGT"[int(rng.integers(0, 4))]
+    return "".join(text)
+
+
+@pytest.mark.parametrize("occ_rate, sa_rate", [(4, 1), (64, 32)])
+def test_search_with_mismatches(repetitive_text, occ_rate, sa_rate):
+    fm = FMIndex.from_reference(repetitive_text, occ_rate=occ_rate, sa_rate=sa_rate)
+    rng = np.random.default_rng(5)
+    for read in make_reads(repetitive_text, rng):
+        counts = brute_mismatches(repetitive_text, read)
+        for max_mm in range(3):
+            assert fm.search_with_mismatches(read, max_mm) == np.flatnonzero(counts <= max_mm).tolist()
+
+
+@pytest.mark.parametrize("both_strands", [True, False])
+def test_best_hits(repetitive_text, both_strands):
+    fm = FMIndex.from_reference(repetitive_text, occ_rate=8, sa_rate=4)
+    rng = np.random.default_rng(6)
+    for read in make_reads(repetitive_text, rng):
+        expected = brute_best_hits(repetitive_text, read, 2, both_strands)
+        assert fm.best_hits(read, 2, both_strands=both_strands) == expected
+        exact = fm.exact_hits(read, both_strands=both_strands)
+        assert exact == (expected if expected[1] == 0 else None)
+
+
+# reference의 N 구간은 A로 검색하되 결과에서는 항상 mismatch (N 자리에 A가 놓인 read도 brute force와 같음)
+def test_reference_with_unknown_bases(repetitive_text):
+    rng = np.random.default_rng(8)
+    text = list(repetitive_text)
+    for start in rng.choice(len(text) - 6, 12, replace=False).tolist():
+        length = int(rng.integers(1, 6))
+        text[start:start + length] = "N" * length
+    text = "".join(text)
+    fm = FMIndex.from_reference(text, occ_rate=8, sa_rate=4)
+    assert len(fm.n_runs) > 0
+    reads = [read.replace("N", "A") if i % 2 else read for i, read in enumerate(make_reads(text, rng, 120))]
+    for read in reads:
+        counts = brute_mismatches(text, read)
+        assert fm.search_with_mismatches(read, 2) == np.flatnonzero(counts <= 2).tolist()
+        expected = brute_best_hits(text, read, 2, True)
+        assert fm.best_hits(read, 2) == expected
+        assert fm.exact_hits(read) == (expected if expected[1] == 0 else None)
@@ -0,0 +1,55 @@
+import pytest
+
+from aligner.dna import kmer_to_int
+from aligner.kmer_table import KmerTable, build_kmer_table
+from aligner.packed_sequence import PackedSequence
+
+
+# stride 배수 위치의 k-mer(N 포함 제외)를 dict로 모음
+def dict_index(text: str, k: int, stride: int) -> dict:
+    index = {}
+    for pos in range(0, len(text) - k + 1, stride):
+        kmer = text[pos:pos + k]
+        if "N" not in kmer:
+            index.setdefault(kmer, []).append(pos)
+    return index
+
+
+def assert_same_table(table: KmerTable, index: dict) -> None:
+    assert len(table) == len(index)
+    for kmer, positions in index.items():
+        assert table[kmer].tolist() == positions
+    expected = KmerTable.from_dict(index, table.k)
+    assert table.keys.tolist() == expected.keys.tolist()
+    assert table.offsets.tolist() == expected.offsets.tolist()
+    assert table.positions.tolist() == expected.positions.tolist()
+
+
+# chunk 경계 / stride / N이 섞여도 dict로 만든 테이블과 같음
+@pytest.mark.parametrize("k, stride, chunk_size", [(5, 1, 7), (5, 3, 7), (8, 4, 13), (11, 2, 1 << 22)])
+def test_chunked_strided_table(random_sequence, k, stride, chunk_size):
+    text = random_sequence(3000, alphabet="ACGT" * 20 + "N")
+    table = build_kmer_table(text, k, stride=stride, chunk_size=chunk_size)
+    assert table.stride == stride
+    assert_same_table(table, dict_index(text, k, stride))
+
+
+# PackedSequence reference도 chunk 단위로 같은 테이블을 만듦 (2-bit 압축은 N을 A로 저장하므로 ACGT만)
+def test_packed_reference_table(random_sequence):
+    text = random_sequence(3000)
+    table = build_kmer_table(PackedSequence.from_string(text), 7, stride=3, chunk_size=10)
+    assert_same_table(table, dict_index(text, 7, 3))
+
+
+# max_occ를 넘는 k-mer는 테이블에서 빠지고 masked_keys / masked_counts에 기록
+def test_repeat_masking(random_sequence):
+    text = random_sequence(500) + "ACGTA" * 40 + random_sequence(500)
+    k, max_occ = 5, 10
+    index = dict_index(text, k, 1)
+    table = build_kmer_table(text, k, max_occ=max_occ, chunk_size=64)
+    repeats = {kmer: len(poses) for kmer, poses in index.items() if len(poses) > max_occ}
+    assert repeats
+    assert_same_table(table, {kmer: poses for kmer, poses in index.items() if kmer not in repeats})
+    assert dict(zip(table.masked_keys.tolist(), table.masked_counts.tolist())) == \
+        {kmer_to_int(kmer): count for kmer, count in sorted(repeats.items())}
+    assert all(table.is_masked(kmer) for kmer in repeats)
@@ -0,0 +1,41 @@
+import collections
+import threading
+
+import pytest
+
+from aligner.parallel import fork_available, map_batches_parallel, map_reads_parallel
+
+
+def _state_of(state, read):
+    return state
+
+
+def _double(state, read):
+    return read * state
+
+
+def _double_batch(state, reads):
+    return [read * state for read in reads]
+
+
+def test_results_keep_input_order():
+    assert list(map_reads_parallel(_double, 2, range(1000), workers=2, chunk_size=7)) == [i * 2 for i in range(1000)]
+    assert list(map_batches_parallel(_double_batch, 3, range(1000), workers=2, chunk_size=13)) == \
+        [i * 3 for i in range(1000)]
+
+
+@pytest.mark.skipif(not fork_available(), reason="fork 미지원 환경")
+def test_concurrent_pools_keep_their_own_state():
+    results = {}
+
+    def run(name):
+        results[name] = collections.Counter(map_reads_parallel(_state_of, name, range(2000), workers=2,
+                                                               chunk_size=16))
+
+    for _ in range(3):
+        threads = [threading.Thread(target=run, args=(name,)) for name in ("A", "B")]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert results == {"A": {"A": 2000}, "B": {"B": 2000}}
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from aligner.dna import UNKNOWN_CODE
+from aligner.index_store import load_index, packed_reference_arrays, save_index
+from aligner.packed_sequence import OUT_OF_RANGE, PackedSequence
+from aligner.pileup import Pileup
+
+
+# 앞 / 중간 / 끝에 N 구간이 있는 reference
+@pytest.fixture
+def n_text(random_sequence):
+    return ("NN" + random_sequence(300) + "N" * 37 + random_sequence(200) + "N" + random_sequence(150)
+            + "NNNNN")
+
+
+# from_string / from_file(chunk 경계에 걸친 N 구간) / index section 모두 N을 그대로 복원
+def test_packed_sequence_keeps_n(tmp_path, n_text):
+    path = tmp_path / "ref.txt"
+    path.write_text("\n".join(n_text[i:i + 60] for i in range(0, len(n_text), 60)) + "\n")
+    save_index(str(tmp_path / "ref.idx"), "test", {}, "", packed_reference_arrays(n_text))
+    sequences = [PackedSequence.from_string(n_text), PackedSequence.from_file(str(path), chunk_size=16),
+                 PackedSequence.from_index(load_index(str(tmp_path / "ref.idx")))]
+    for packed in sequences:
+        assert str(packed) == n_text
+        assert packed.n_runs.tolist() == [[0, 2], [302, 339], [539, 540], [690, 695]]
+        assert str(packed[290:350]) == n_text[290:350]
+        assert packed[538] + packed[539] == n_text[538:540]
+
+
+# mismatch 비교용 window에서는 N이 어떤 read 염기와도 다름
+def test_windows_mark_n(n_text):
+    packed = PackedSequence.from_string(n_text)
+    windows = packed.windows([0, 295, 680], 20)
+    for row, start in enumerate([0, 295, 680]):
+        text = n_text[start:start + 20].ljust(20, "N")
+        is_n = np.array([c == "N" for c in text])
+        assert np.all((windows[row] == OUT_OF_RANGE) == is_n)
+    assert packed.hamming("N" * 5 + "A" * 15, [690])[0] == 20
+
+
+# read가 덮지 않은 reference N은 consensus에서 N으로 남고, 덮인 N은 read 염기로 채움
+def test_consensus_restores_uncovered_n(n_text):
+    pileup = Pileup(n_text)
+    read = "ACGT" * 5
+    pileup.add(310, read)  # N 구간 [302, 339)의 일부를 덮음
+    pileup.add(0, "AC")
+    consensus = str(pileup)
+    expected = "AC" + n_text[2:310] + read + n_text[330:]
+    assert consensus == expected
+    assert pileup.consensus(305, 315).tolist() == [UNKNOWN_CODE] * 5 + [0, 1, 2, 3, 0]
+    assert pileup.count_differences(n_text) == sum(a != b for a, b in zip(consensus, n_text)) == 22
@@ -0,0 +1,89 @@
+import numpy as np
+
+from aligner.dna import reverse_complement
+from aligner.packed_sequence import PackedSequence
+from aligner.results import FLAG_REVERSE, AlignmentResults, parse_cigar
+from aligner.scripts import load
+
+
+# CIGAR가 소비하는 (read 길이, reference 길이, 삽입 / 결실 길이)
+def cigar_spans(cigar: str) -> tuple:
+    ops = parse_cigar(cigar)
+    query = sum(n for n, op in ops if op in "MIS")
+    target = sum(n for n, op in ops if op in "MD")
+    return query, target, sum(n for n, op in ops if op in "ID")
+
+
+def sam_records(path: str) -> list:
+    with open(path) as f:
+        return [line.rstrip("\n").split("\t") for line in f if not line.startswith("@")]
+
+
+# SW 경로: indel이 있는 read는 gapped CIGAR / 정렬 시작 위치 / NM(불일치 + indel)으로 SAM에 기록
+def test_sw_sam_uses_gapped_alignment(tmp_path, random_sequence):
+    sw = load("sw")
+    text = random_sequence(2000)
+    reference = PackedSequence.from_string(text)
+    exact = text[300:400]
+    deletion = text[500:550] + text[553:603]                # reference 3칸 결실
+    insertion = text[800:850] + "TT" + text[850:898]        # read 2칸 삽입
+    substituted = text[1100:1150] + ("A" if text[1150] != "A" else "C") + text[1151:1200]
+    reads = [exact, deletion, insertion, substituted, reverse_complement(deletion)]
+    mapped = [(300, False), (500, False), (800, False), (1100, False), (500, True)]
+
+    results = AlignmentResults()
+    for i, (read, (pos, reverse)) in enumerate(zip(reads, mapped)):
+        score, start, cigar, nm = sw.align_read(reference, read, pos, reverse=reverse)
+        results.append(i, pos, score, nm, 60, FLAG_REVERSE if reverse else 0, cigar=cigar, cigar_pos=start)
+    results.append(len(reads), -1)
+
+    sam = tmp_path / "out.sam"
+    results.write_sam(str(sam), reads + ["ACGT"], "ref", len(text))
+    records = sam_records(str(sam))
+    # 같은 점수의 indel 배치가 여러 개일 수 있으므로 CIGAR가 소비하는 길이로 비교
+    assert [cigar_spans(r[5]) for r in records[:5]] == [(100, 100, 0), (100, 103, 3), (100, 98, 2),
+                                                         (100, 100, 0), (100, 103, 3)]
+    assert records[0][5] == "100M" and records[5][5] == "*"
+    assert [r[3] for r in records] == ["301", "501", "801", "1101", "501", "0"]
+    assert [r[11] for r in records[:5]] == ["NM:i:0", "NM:i:3", "NM:i:2", "NM:i:1", "NM:i:3"]
+
+    # 저장 / 로딩 후에도 CIGAR가 유지됨
+    results.save(str(tmp_path / "out.results"))
+    loaded = AlignmentResults.load(str(tmp_path / "out.results"))
+    sam2 = tmp_path / "loaded.sam"
+    loaded.write_sam(str(sam2), reads + ["ACGT"], "ref", len(text))
+    assert sam2.read_text() == sam.read_text()
+
+
+# CIGAR가 없는 결과(mismatch 기반 정렬기)는 "<길이>M"
+def test_sam_without_cigar_is_ungapped(tmp_path):
+    results = AlignmentResults()
+    results.append(0, 10, 0, 1, 50)
+    sam = tmp_path / "out.sam"
+    results.write_sam(str(sam), ["ACGTACGT"], "ref", 100)
+    record = sam_records(str(sam))[0]
+    assert (record[3], record[5], record[11]) == ("11", "8M", "NM:i:1")
+
+
+def test_paf_uses_alignment_spans(tmp_path):
+    results = AlignmentResults()
+    results.append(0, 10, 0, 3, 60, cigar="2S50M3D48M", cigar_pos=12)
+    paf = tmp_path / "out.paf"
+    results.write_paf(str(paf), ["A" * 100], "ref", 1000)
+    fields = paf.read_text().split("\t")
+    assert fields[2:4] == ["2", "100"]
+    assert fields[7:11] == ["12", "113", "98", "101"]
+    assert np.all(results["mismatches"] == [3])
+
+
+# pos에서 시작하는 "<길이>M"은 저장하지 않고, gapped CIGAR만 열 배열에 쌓임
+def test_only_gapped_cigars_are_stored():
+    results = AlignmentResults(4)
+    for i in range(1000):
+        results.append(i, i, cigar="100M", cigar_pos=i)
+    results.append(1000, 5, cigar="100M", cigar_pos=7)
+    results.append(1001, 9, cigar="50M3D50M")
+    assert results._cigar_count == 2
+    assert results.alignment(3, 100) == (3, "100M")
+    assert results.alignment(1000, 100) == (7, "100M")
+    assert results.alignment(1001, 100) == (9, "50M3D50M")
@@ -0,0 +1,11 @@
+import pytest
+
+from aligner.sa_builder import build_suffix_array_doubling, build_suffix_array_reference
+
+
+# 반복 / N / 소문자 / 한 글자 / 빈 문자열까지 doubling 결과가 비교 정렬 결과와 같음
+@pytest.mark.parametrize("length, alphabet", [(0, "A"), (1, "A"), (50, "A"), (300, "ACGT"), (300, "AC"),
+                                              (500, "ACGTNacgt")])
+def test_doubling_matches_reference(random_sequence, length, alphabet):
+    text = random_sequence(length, alphabet)
+    assert build_suffix_array_doubling(text).tolist() == build_suffix_array_reference(text).tolist()
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from aligner.dna import decode_bases, encode_bases
+from aligner.packed_sequence import PackedSequence
+from aligner.sa_builder import build_suffix_array
+from aligner.sa_search import SuffixArraySearcher, sa_range
+
+
+def naive_positions(text: str, pattern: str) -> list:
+    positions = []
+    pos = text.find(pattern)
+    while pos >= 0:
+        positions.append(pos)
+        pos = text.find(pattern, pos + 1)
+    return positions
+
+
+def make_patterns(text: str, rng, count: int = 300) -> list:
+    patterns = []
+    for _ in range(count):
+        length = int(rng.integers(1, 25))
+        start = int(rng.integers(0, len(text) - length))
+        pattern = text[start:start + length]
+        if rng.random() < 0.3:  # 일부는 한 글자를 바꿔 없는 패턴도 섞음
+            j = int(rng.integers(0, length))
+            pattern = pattern[:j] + "ACGTNacgt"[int(rng.integers(0, 9))] + pattern[j + 1:]
+        patterns.append(pattern)
+    return patterns
+
+
+# N / 소문자가 섞인 reference는 원문 byte 순서로 정렬된 SA에서 찾아야 함 (prefix bucket은 ACGT만일 때 사용)
+@pytest.mark.parametrize("alphabet, tail, bucket_k", [("ACGT", "", 4), ("ACGT", "", 0), ("ACGT", "NNNNacgtNN", 4),
+                                                      ("ACGTNacgt", "", 4), ("ACGTTTN", "nn", 10)])
+def test_batch_ranges_match_naive_scan(random_sequence, alphabet, tail, bucket_k):
+    text = random_sequence(5000, alphabet) + tail
+    sa = build_suffix_array(text)
+    assert SuffixArraySearcher(sa, text, bucket_k=bucket_k).bucket_k == (bucket_k if set(text) <= set("ACGT") else 0)
+    searcher = SuffixArraySearcher(sa, text, bucket_k=bucket_k)
+    patterns = make_patterns(text, np.random.default_rng(7))
+    lo, hi = searcher.batch_ranges(patterns)
+    for pattern, a, b in zip(patterns, lo.tolist(), hi.tolist()):
+        assert sorted(sa[a:b].tolist()) == naive_positions(text, pattern), pattern
+        assert searcher.range(pattern) == (a, b)
+        assert sa_range(sa, text, pattern) == (a, b)
+
+
+# PackedSequence text: 정규화된 서열(소문자 -> 대문자, 그 외 -> N)의 SA에서 원문 없이 같은 구간을 찾음
+@pytest.mark.parametrize("alphabet, tail", [("ACGT", ""), ("ACGTNacgt", "NNxx")])
+def test_packed_text_matches_normalized_text(random_sequence, alphabet, tail):
+    raw = random_sequence(5000, alphabet) + tail
+    text = decode_bases(encode_bases(raw))
+    sa = build_suffix_array(text)
+    searcher = SuffixArraySearcher(sa, PackedSequence.from_string(raw), bucket_k=4)
+    assert searcher.codes is None and searcher.bucket_k == (4 if set(raw) <= set("ACGT") else 0)
+    patterns = make_patterns(text, np.random.default_rng(11))
+    expected = SuffixArraySearcher(sa, text, bucket_k=0).batch_ranges([decode_bases(encode_bases(p)) for p in patterns])
+    lo, hi = searcher.batch_ranges([p.lower() for p in patterns])
+    assert np.array_equal(lo, expected[0]) and np.array_equal(hi, expected[1])
+    assert searcher.range(patterns[0]) == (int(lo[0]), int(hi[0]))
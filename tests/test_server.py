@@ -0,0 +1,109 @@
+import asyncio
+import json
+import os
+import socket
+import threading
+import time
+
+import pytest
+
+from aligner import scripts
+from aligner.parallel import fork_available
+from aligner.server import METHODS, STREAM_CHUNK, MappingServer, iter_request, main
+
+
+@pytest.fixture
+def server(tmp_path):
+    socket_path = str(tmp_path / "server.sock")
+    thread = threading.Thread(target=asyncio.run, args=(MappingServer(jobs=2).serve(socket_path),), daemon=True)
+    thread.start()
+    for _ in range(100):
+        if os.path.exists(socket_path):
+            break
+        time.sleep(0.05)
+    yield socket_path
+    list(iter_request({"op": "shutdown"}, socket_path))
+    thread.join(timeout=10)
+
+
+@pytest.mark.skipif(not fork_available(), reason="fork 미지원 환경")
+def test_concurrent_map_requests_use_their_own_index(server, tmp_path, random_sequence, sample_reads):
+    jobs = {}
+    for name in ("a", "b"):
+        reference = random_sequence(20000)
+        path = tmp_path / f"{name}.txt"
+        path.write_text(reference)
+        reads, starts = sample_reads(reference, 3000, 60, mismatches=1)
+        jobs[name] = (str(path), reads, starts)
+
+    positions = {}
+
+    def run(name):
+        path, reads, _ = jobs[name]
+        request = {"op": "map", "method": "sa", "reference": path, "reads": reads,
+                   "options": {"workers": 2, "dedup": False}}
+        messages = list(iter_request(request, server))
+        assert messages[-1]["ok"], messages[-1]
+        positions[name] = [message["pos"] for message in messages[:-1]]
+
+    for name in jobs:  # index는 미리 만들어 두고 매핑만 동시에 실행
+        assert list(iter_request({"op": "load", "method": "sa", "reference": jobs[name][0]}, server))[-1]["ok"]
+    threads = [threading.Thread(target=run, args=(name,)) for name in jobs]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for name, (_, _, starts) in jobs.items():
+        assert positions[name] == starts
+
+
+# 응답 없이 연결을 닫는 서버: client는 "connection closed"를 알리고 실패 코드로 종료
+def test_client_reports_closed_connection(tmp_path, capsys):
+    socket_path = str(tmp_path / "closing.sock")
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(socket_path)
+    listener.listen(1)
+
+    def accept_and_close():
+        conn, _ = listener.accept()
+        conn.makefile("rb").readline()
+        conn.close()
+
+    thread = threading.Thread(target=accept_and_close, daemon=True)
+    thread.start()
+    with listener, pytest.raises(SystemExit) as exc:
+        main(["--socket", socket_path, "stats"])
+    thread.join(timeout=10)
+    assert exc.value.code == 1
+    assert json.loads(capsys.readouterr().err) == {"ok": False, "error": "connection closed"}
+
+
+# 전송이 실패하면(클라이언트 연결 끊김) 매핑 thread도 남은 read를 더 만들지 않고 멈춤
+def test_map_stops_producing_after_send_fails(tmp_path, monkeypatch):
+    produced = []
+    send_failed = threading.Event()
+
+    def map_many(module, state, reads, options):
+        for i in range(1000000):
+            if i == STREAM_CHUNK:
+                send_failed.wait(10)  # 첫 chunk 전송이 실패할 때까지 대기
+            produced.append(i)
+            yield (i,)
+
+    monkeypatch.setitem(METHODS, "many", (".many.idx", lambda module, reference, index: None, map_many, ("pos",)))
+    monkeypatch.setattr(scripts, "load", lambda method: None)
+    reference = tmp_path / "ref.txt"
+    reference.write_text("ACGT")
+
+    async def send(message, flush=True):
+        if message is not None and message["id"] == 10:
+            send_failed.set()
+            raise BrokenPipeError
+
+    async def run():
+        request = {"op": "map", "method": "many", "reference": str(reference), "reads": []}
+        with pytest.raises(BrokenPipeError):
+            await MappingServer(jobs=1).handle_map(request, send)
+
+    asyncio.run(run())
+    assert len(produced) <= 3 * STREAM_CHUNK
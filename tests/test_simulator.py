@@ -0,0 +1,27 @@
+from aligner.dna import reverse_complement
+from aligner.simulator import write_ancient_reads, write_genome
+
+
+def simulate(tmp_path, name: str, **kwargs) -> tuple:
+    paths = [tmp_path / f"{name}.{ext}" for ext in ("reads", "truth")]
+    write_ancient_reads(str(tmp_path / "ref.txt"), str(paths[0]), str(paths[1]), read_len=30, num_reads=200,
+                        seed=4, chunk_size=64, **kwargs)
+    return tuple(path.read_text().split("\n")[:-1] for path in paths)
+
+
+# 정답 파일은 가닥과 관계없이 위치만 기록. reverse_fraction=0이면 strand 파일 유무와 관계없이 같은 결과
+def test_truth_file_keeps_positions_only(tmp_path):
+    write_genome(str(tmp_path / "ref.txt"), 5000, seed=1)
+    reference = (tmp_path / "ref.txt").read_text()
+    plain = simulate(tmp_path, "plain")
+    assert simulate(tmp_path, "strand", strand_file=str(tmp_path / "strand.strand")) == plain
+    assert (tmp_path / "strand.strand").read_text() == "+\n" * 200
+    assert all(line.isdigit() for line in plain[1])
+
+    reads, truth = simulate(tmp_path, "both", mutation_rate=0.0, reverse_fraction=0.5,
+                            strand_file=str(tmp_path / "both.strand"))
+    strands = (tmp_path / "both.strand").read_text().split()
+    assert all(line.isdigit() for line in truth) and 0 < strands.count("-") < 200
+    for read, pos, strand in zip(reads, map(int, truth), strands):
+        window = reference[pos:pos + 30]
+        assert read == (reverse_complement(window) if strand == "-" else window)
@@ -0,0 +1,107 @@
+import numpy as np
+import pytest
+
+from aligner.dna import encode_bases
+from aligner.packed_sequence import PackedSequence
+from aligner.results import parse_cigar
+from aligner.scripts import load
+from aligner.sw_kernel import sw_align, sw_score, sw_score_batch
+
+
+# seq 하나를 무작위로 치환 / 삽입 / 결실해 비슷한 서열을 만듦
+def mutate(seq: str, rng, edits: int) -> str:
+    seq = list(seq)
+    for _ in range(edits):
+        i = int(rng.integers(0, len(seq)))
+        kind = int(rng.integers(0, 3))
+        base = "ACGT"[int(rng.integers(0, 4))]
+        if kind == 0:
+            seq[i] = base
+        elif kind == 1:
+            seq.insert(i, base)
+        elif len(seq) > 1:
+            del seq[i]
+    return "".join(seq)
+
+
+def make_pairs(random_sequence, count: int = 60) -> list:
+    rng = np.random.default_rng(7)
+    pairs = []
+    for _ in range(count):
+        read = random_sequence(int(rng.integers(5, 40)))
+        window = mutate(read, rng, int(rng.integers(0, 6)))
+        if rng.random() < 0.3:  # 관계없는 window도 섞음
+            window = random_sequence(len(window))
+        pairs.append((read, window))
+    return pairs
+
+
+# CIGAR를 window의 start 위치부터 다시 따라가며 계산한 점수 (read 길이 / window 구간도 확인)
+def replay_score(read: str, window: str, start: int, end: int, cigar: str) -> int:
+    score, i, j = 0, 0, start
+    for n, op in parse_cigar(cigar):
+        if op == "M":
+            score += sum(2 if read[i + t] == window[j + t] else -1 for t in range(n))
+            i, j = i + n, j + n
+        elif op == "I":
+            score, i = score - 2 * n, i + n
+        elif op == "D":
+            score, j = score - 2 * n, j + n
+        else:
+            i += n
+    assert i == len(read) and j == end
+    return score
+
+
+def test_full_dp_matches_reference(random_sequence):
+    reference_sw = load("sw").smith_waterman
+    for read, window in make_pairs(random_sequence):
+        assert sw_score(read, window) == reference_sw(read, window)
+
+
+def test_batch_scores_match_reference(random_sequence):
+    reference_sw = load("sw").smith_waterman
+    rng = np.random.default_rng(11)
+    read = random_sequence(30)
+    windows = [mutate(read, rng, 3)[:30].ljust(30, "A") for _ in range(12)]
+    best, bi, bj = sw_score_batch(read, windows)
+    expected = [reference_sw(read, window) for window in windows]
+    assert [(int(s), (int(i), int(j))) for s, i, j in zip(best, bi, bj)] == expected
+
+
+# band가 두 서열 길이보다 넓으면 전체 DP와 같음. 좁은 band는 전체 DP 점수를 넘지 않음
+@pytest.mark.parametrize("band", [2, 5, 64])
+def test_banded_scores(random_sequence, band):
+    reference_sw = load("sw").smith_waterman
+    for read, window in make_pairs(random_sequence):
+        score, pos = sw_score(read, window, band=band)
+        full_score, full_pos = reference_sw(read, window)
+        if band >= max(len(read), len(window)):
+            assert (score, pos) == (full_score, full_pos)
+        else:
+            assert score <= full_score
+
+
+# traceback CIGAR를 따라 계산한 점수가 보고된 점수와 같고, 전체 DP면 reference 점수와 같음
+@pytest.mark.parametrize("band", [None, 3])
+def test_cigar_replays_to_score(random_sequence, band):
+    reference_sw = load("sw").smith_waterman
+    for read, window in make_pairs(random_sequence):
+        score, start, end, cigar = sw_align(read, window, band=band)
+        if band is None:
+            assert score == reference_sw(read, window)[0]
+        if score == 0:
+            assert cigar == f"{len(read)}S"
+            continue
+        assert replay_score(read, window, start, end, cigar) == score
+        assert sw_align(encode_bases(read), encode_bases(window), band=band) == (score, start, end, cigar)
+
+
+# str reference의 N은 PackedSequence와 같이 255(항상 mismatch)로 가져옴
+def test_candidate_windows_mask_unknown_bases():
+    sw = load("sw")
+    text = "ACGTNNACGTacgtN"
+    starts = [0, 4, 12]
+    windows = sw.candidate_windows(text, starts, 6)
+    assert np.array_equal(windows, sw.candidate_windows(PackedSequence.from_string(text), starts, 6))
+    assert windows[1].tolist() == [255, 255, 0, 1, 2, 3]